@@ -0,0 +1,117 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from importlib.metadata import version
+
+from . import bench_batch, bench_cache, bench_import, bench_openai, bench_remote
+from .common import Config, Result, load_encoding
+
+SUITES = {
+    'openai': bench_openai.run,
+    'batch': bench_batch.run,
+    'cache': bench_cache.run,
+    'remote': bench_remote.run,
+    'import': bench_import.run,
+}
+# Lower is better for both; remote scenarios only have a wall time.
+TIMING_METRICS = ('median_s', 'wall_s')
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Offline tokemon benchmarks with JSON output.',
+    )
+    parser.add_argument('--only', nargs='+', choices=SUITES, default=list(SUITES))
+    parser.add_argument('--quick', action='store_true', help='smaller inputs')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument(
+        '--encoding', default='synthetic',
+        help="a tiktoken encoding name, or 'synthetic' (default) to stay offline",
+    )
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    parser.add_argument('--compare', help='a previous JSON run to check against')
+    parser.add_argument(
+        '--threshold', type=float, default=0.25,
+        help='fractional slowdown that counts as a regression (default 0.25)',
+    )
+    return parser
+
+
+def _metadata(config: Config) -> dict:
+    return {
+        'tokemon': version('tokemon'),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'encoding': config.encoding_name,
+        'quick': config.quick,
+        'repeat': config.repeat,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+
+
+def _timing(metrics: dict) -> tuple[str, float] | None:
+    for name in TIMING_METRICS:
+        if name in metrics:
+            return name, metrics[name]
+    return None
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    previous = {r['key']: r['metrics'] for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        before = previous.get(result['key'])
+        now = _timing(result['metrics'])
+        if before is None or now is None or now[0] not in before:
+            continue
+        name, value = now
+        ratio = value / before[name] if before[name] else 1.0
+        if ratio > 1 + threshold:
+            regressions.append(
+                f'{result["key"]}: {name} {before[name]:.6f} -> {value:.6f} '
+                f'({ratio:.2f}x)'
+            )
+    return regressions
+
+
+def _report(result: Result) -> None:
+    timing = _timing(result.metrics)
+    summary = f'{timing[0]}={timing[1]:.6f}' if timing else 'skipped'
+    print(f'{result.key}: {summary}', file=sys.stderr)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parser().parse_args(argv)
+    encoding, label = load_encoding(args.encoding)
+    config = Config(
+        quick=args.quick, repeat=args.repeat, encoding=encoding, encoding_name=label
+    )
+    results = []
+    for suite in args.only:
+        for result in SUITES[suite](config):
+            _report(result)
+            results.append(result.as_dict())
+    report = {'meta': _metadata(config), 'results': results}
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        for line in regressions:
+            print(f'REGRESSION {line}', file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
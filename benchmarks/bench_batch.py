@@ -0,0 +1,81 @@
+import os
+import tempfile
+
+from tokemon.tokenizers.parallel import ParallelTokenizer
+
+from .common import Config, Result, corpus, measure, openai_tokenizer
+
+CONCURRENCY = (1, 2, 4, 8)
+
+
+def _workers() -> list[int]:
+    cpus = os.cpu_count() or 1
+    return sorted({1, min(2, cpus), cpus})
+
+
+def _batch(tokenizer, texts: list[str], config: Config) -> list[Result]:
+    results = []
+    for concurrency in CONCURRENCY:
+        metrics = measure(
+            lambda: tokenizer.count_tokens_batch(texts, max_concurrency=concurrency),
+            config.repeat,
+            items=len(texts),
+        )
+        results.append(Result(
+            'batch', 'count_tokens_batch',
+            {'texts': len(texts), 'max_concurrency': concurrency}, metrics,
+        ))
+    return results
+
+
+def _parallel(texts: list[str], config: Config) -> list[Result]:
+    results, baseline = [], None
+    for workers in _workers():
+        with ParallelTokenizer(
+            'gpt-4o', max_workers=workers, encoding=config.encoding
+        ) as tokenizer:
+            # The warm-up call inside measure() also starts the pool.
+            metrics = measure(
+                lambda: tokenizer.count_tokens_batch(texts), config.repeat,
+                items=len(texts),
+            )
+        baseline = baseline or metrics['median_s']
+        metrics['speedup'] = baseline / metrics['median_s']
+        results.append(Result(
+            'batch', 'parallel', {'texts': len(texts), 'workers': workers}, metrics
+        ))
+    return results
+
+
+def _count_file(tokenizer, text: str, config: Config) -> list[Result]:
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'corpus.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        size = os.path.getsize(path)
+        candidates = [('serial', tokenizer)]
+        parallel = ParallelTokenizer(
+            'gpt-4o', max_workers=os.cpu_count(), encoding=config.encoding
+        )
+        candidates.append(('parallel', parallel))
+        with parallel:
+            for label, counter in candidates:
+                metrics = measure(lambda: counter.count_file(path), config.repeat)
+                metrics['mb_per_s'] = size / metrics['median_s'] / 1e6
+                results.append(Result(
+                    'batch', 'count_file', {'bytes': size, 'tokenizer': label}, metrics
+                ))
+    return results
+
+
+def run(config: Config) -> list[Result]:
+    tokenizer = openai_tokenizer(config.encoding)
+    count = 256 if config.quick else 2048
+    texts = [corpus('english', 1_000, seed=i) for i in range(count)]
+    file_size = 1_000_000 if config.quick else 16_000_000
+    return [
+        *_batch(tokenizer, texts, config),
+        *_parallel(texts, config),
+        *_count_file(tokenizer, corpus('english', file_size), config),
+    ]
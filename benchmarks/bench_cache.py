@@ -0,0 +1,70 @@
+import os
+import tempfile
+
+from tokemon.cache import MemoryCache, SqliteCache, TokenCountCache
+from tokemon.tokenizers.cached import CachedTokenizer
+
+from .common import Config, Result, corpus, measure, openai_tokenizer
+
+
+def _count_all(tokenizer, texts: list[str]) -> None:
+    for text in texts:
+        tokenizer.count_tokens(text)
+
+
+def _cached(tokenizer, texts: list[str], config: Config) -> list[Result]:
+    params = {'texts': len(texts)}
+    results = [Result('cache', 'uncached', params, measure(
+        lambda: _count_all(tokenizer, texts), config.repeat, items=len(texts)
+    ))]
+
+    # Every call counts through a fresh cache: hashing and insert overhead.
+    def miss():
+        _count_all(CachedTokenizer(tokenizer), texts)
+
+    results.append(Result('cache', 'memory_miss', params, measure(
+        miss, config.repeat, items=len(texts)
+    )))
+    warm = CachedTokenizer(tokenizer)
+    results.append(Result('cache', 'memory_hit', params, measure(
+        lambda: _count_all(warm, texts), config.repeat, items=len(texts)
+    )))
+    with tempfile.TemporaryDirectory() as directory:
+        store = SqliteCache(os.path.join(directory, 'counts.db'))
+        # A memory tier too small to hold anything, so every read hits SQLite.
+        sqlite = CachedTokenizer(tokenizer, TokenCountCache(MemoryCache(0), store))
+        results.append(Result('cache', 'sqlite_hit', params, measure(
+            lambda: _count_all(sqlite, texts), config.repeat, items=len(texts)
+        )))
+        store.close()
+    return results
+
+
+def _prefix(tokenizer, config: Config) -> list[Result]:
+    prefix = corpus('english', 100_000 if config.quick else 400_000)
+    suffixes = [corpus('english', 200, seed=i) for i in range(16)]
+    params = {'prefix_chars': len(prefix), 'suffixes': len(suffixes)}
+
+    def full():
+        for suffix in suffixes:
+            tokenizer.count_tokens(prefix + suffix)
+
+    def shared():
+        for suffix in suffixes:
+            tokenizer.count_with_prefix(prefix, suffix)
+
+    return [
+        Result('cache', 'prefix_full', params, measure(
+            full, config.repeat, items=len(suffixes)
+        )),
+        Result('cache', 'prefix_shared', params, measure(
+            shared, config.repeat, items=len(suffixes)
+        )),
+    ]
+
+
+def run(config: Config) -> list[Result]:
+    tokenizer = openai_tokenizer(config.encoding)
+    count = 500 if config.quick else 5_000
+    texts = [corpus('english', 1_000, seed=i) for i in range(count)]
+    return [*_cached(tokenizer, texts, config), *_prefix(tokenizer, config)]
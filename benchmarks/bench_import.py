@@ -0,0 +1,31 @@
+import statistics
+import subprocess
+import sys
+
+from .common import Config, Result
+
+MODULES = ('tokemon', 'tokemon.tokenizers.openai')
+_SCRIPT = (
+    'import time; start = time.perf_counter(); import {module}; '
+    'print(time.perf_counter() - start)'
+)
+
+
+def _import_time(module: str) -> float:
+    output = subprocess.run(
+        [sys.executable, '-c', _SCRIPT.format(module=module)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return float(output)
+
+
+def run(config: Config) -> list[Result]:
+    results = []
+    for module in MODULES:
+        samples = [_import_time(module) for _ in range(config.repeat)]
+        results.append(Result('import', 'import', {'module': module}, {
+            'median_s': statistics.median(samples),
+            'min_s': min(samples),
+            'repeat': len(samples),
+        }))
+    return results
@@ -0,0 +1,21 @@
+from .common import LANGUAGES, Config, Result, corpus, measure, openai_tokenizer
+
+SIZES = (1_000, 64_000, 1_000_000)
+QUICK_SIZES = (1_000, 64_000)
+
+
+def run(config: Config) -> list[Result]:
+    tokenizer = openai_tokenizer(config.encoding)
+    results = []
+    for language in LANGUAGES:
+        for size in QUICK_SIZES if config.quick else SIZES:
+            text = corpus(language, size)
+            tokens = tokenizer.count_tokens(text).input_tokens
+            metrics = measure(lambda: tokenizer.count_tokens(text), config.repeat)
+            metrics['tokens'] = tokens
+            metrics['mb_per_s'] = len(text.encode()) / metrics['median_s'] / 1e6
+            metrics['tokens_per_s'] = tokens / metrics['median_s']
+            results.append(Result(
+                'openai', 'count_tokens', {'language': language, 'chars': size}, metrics
+            ))
+    return results
@@ -0,0 +1,149 @@
+import asyncio
+import gc
+import importlib.util
+import time
+from collections.abc import Callable
+
+from tokemon import RateLimit, Resilience
+from tokemon.limits import limiters
+from tokemon.resilience import health
+
+from .common import Config, Result, corpus, percentiles
+from .stub_server import (
+    ANTHROPIC_MODEL,
+    GOOGLE_MODEL,
+    XAI_MODEL,
+    StubBehaviour,
+    StubServer,
+    async_xai_stub,
+)
+
+ERROR_RATES = (0.0, 0.05)
+RESILIENCE = Resilience(retries=3, backoff=0.005, max_backoff=0.05)
+
+
+def _anthropic(server: StubServer, limit: RateLimit):
+    from anthropic import AsyncAnthropic
+
+    from tokemon.tokenizers.anthropic_ai import AsyncAnthropicTokenizer
+
+    client = AsyncAnthropic(base_url=server.url, api_key='bench', max_retries=0)
+    return AsyncAnthropicTokenizer(
+        ANTHROPIC_MODEL, client=client, rate_limit=limit, resilience=RESILIENCE
+    )
+
+
+def _google(server: StubServer, limit: RateLimit):
+    from google import genai
+
+    from tokemon.tokenizers.google_ai import AsyncGoogleAITokenizer
+
+    client = genai.Client(api_key='bench', http_options={'base_url': server.url})
+    return AsyncGoogleAITokenizer(
+        GOOGLE_MODEL, client=client, rate_limit=limit, resilience=RESILIENCE
+    )
+
+
+def _xai(server: StubServer, limit: RateLimit):
+    from tokemon.tokenizers.xai import AsyncXaiTokenizer
+
+    return AsyncXaiTokenizer(
+        XAI_MODEL, client=async_xai_stub(server.backend), rate_limit=limit,
+        resilience=RESILIENCE,
+    )
+
+
+PROVIDERS: dict[str, Callable] = {
+    'anthropic': _anthropic,
+    'google': _google,
+    'xai': _xai,
+}
+SDKS = {'anthropic': 'anthropic', 'google': 'google.genai', 'xai': 'xai_sdk'}
+
+
+async def _aclose(client) -> None:
+    # Close pooled connections while their event loop is still running.
+    if hasattr(client, 'aio'):
+        await client.aio.aclose()
+    elif hasattr(client, 'close'):
+        await client.close()
+
+
+async def _drive(tokenizer, texts: list[str]) -> dict:
+    latencies, failures = [], 0
+
+    async def one(text: str) -> None:
+        nonlocal failures
+        start = time.perf_counter()
+        try:
+            await tokenizer.count_tokens(text)
+        except Exception:
+            failures += 1
+        else:
+            latencies.append(time.perf_counter() - start)
+
+    try:
+        await tokenizer.count_tokens('warm up')
+        start = time.perf_counter()
+        await asyncio.gather(*map(one, texts))
+        wall = time.perf_counter() - start
+    finally:
+        await _aclose(tokenizer.client)
+    return {
+        'wall_s': wall,
+        'ops_per_s': len(texts) / wall,
+        'failures': failures,
+        **percentiles(latencies),
+    }
+
+
+def _scenario(
+    provider: str, behaviour: StubBehaviour, texts: list[str], concurrency: int
+) -> dict:
+    # Registries are process-wide; start every scenario from a cold limiter
+    # and a closed breaker.
+    limiters.clear()
+    health.clear()
+    gc.collect()
+    with StubServer(behaviour) as server:
+        tokenizer = PROVIDERS[provider](server, RateLimit(max_concurrency=concurrency))
+        metrics = asyncio.run(_drive(tokenizer, texts))
+        metrics['upstream_requests'] = server.backend.requests
+        metrics['upstream_errors'] = server.backend.errors
+    return metrics
+
+
+def _available(provider: str) -> bool:
+    try:
+        return importlib.util.find_spec(SDKS[provider]) is not None
+    except ModuleNotFoundError:  # the parent package is missing
+        return False
+
+
+def run(config: Config) -> list[Result]:
+    latency = 0.005 if config.quick else 0.02
+    requests = 64 if config.quick else 512
+    concurrency = 16 if config.quick else 64
+    texts = [corpus('english', 400, seed=i) for i in range(requests)]
+    results = []
+    for provider in PROVIDERS:
+        if not _available(provider):
+            results.append(Result('remote', provider, {}, {'skipped': True}))
+            continue
+        for error_rate in ERROR_RATES:
+            behaviour = StubBehaviour(
+                latency=latency, jitter=latency, error_rate=error_rate
+            )
+            params = {'requests': requests, 'concurrency': concurrency,
+                      'latency_s': latency, 'error_rate': error_rate}
+            metrics = _scenario(provider, behaviour, texts, concurrency)
+            results.append(Result('remote', provider, params, metrics))
+        # Identical concurrent texts share one upstream request.
+        params = {'requests': requests, 'concurrency': concurrency,
+                  'latency_s': latency}
+        metrics = _scenario(
+            provider, StubBehaviour(latency=latency), [texts[0]] * requests,
+            concurrency,
+        )
+        results.append(Result('remote', f'{provider}_coalesced', params, metrics))
+    return results
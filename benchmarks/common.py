@@ -0,0 +1,175 @@
+import asyncio
+import gc
+import random
+import statistics
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+import tiktoken
+
+# The o200k_base pre-tokenizer, so pieces split the way they do in production.
+O200K_PATTERN = '|'.join([
+    r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]*[\p{Ll}\p{Lm}\p{Lo}\p{M}]+"""
+    r"""(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+    r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]+[\p{Ll}\p{Lm}\p{Lo}\p{M}]*"""
+    r"""(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+    r"""\p{N}{1,3}""",
+    r""" ?[^\s\p{L}\p{N}]+[\r\n/]*""",
+    r"""\s*[\r\n]+""",
+    r"""\s+(?!\S)""",
+    r"""\s+""",
+])
+
+_WORDS = {
+    'english': (
+        'the of and to in is that for it as with was on be by this are from at '
+        'or an have not which but they their can more one all would there about '
+        'token model request latency provider counting prompt budget context window'
+    ).split(),
+    'russian': (
+        'и в не на что я с он как это по но из у за от то все она так его для '
+        'модель запрос токен задержка контекст бюджет окно подсчёт'
+    ).split(),
+    'chinese': list(
+        '的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发'
+    ),
+    'code': (
+        'def return self if else for in import from class None True False async '
+        'await lambda yield with try except raise dict list str int tokens count'
+    ).split(),
+}
+_SEPARATORS = {'english': ' ', 'russian': ' ', 'chinese': '', 'code': ' '}
+LANGUAGES = tuple(_WORDS)
+
+
+def corpus(language: str, size: int, seed: int = 0) -> str:
+    # Deterministic text of about `size` characters.
+    rng = random.Random(seed)
+    words, separator = _WORDS[language], _SEPARATORS[language]
+    parts, length = [], 0
+    while length < size:
+        word = rng.choice(words)
+        if rng.random() < 0.08:
+            word += rng.choice(['.', ',', '\n', ':', '()', ' 42'])
+        parts.append(word)
+        length += len(word) + len(separator)
+    return separator.join(parts)[:size]
+
+
+def synthetic_encoding(max_merges: int = 4096) -> tiktoken.Encoding:
+    # Offline stand-in for o200k_base: byte ranks plus merge chains for the
+    # corpus vocabulary (with and without a leading space), so common words
+    # become one token and the BPE loop does realistic work.
+    ranks = {bytes([i]): i for i in range(256)}
+    pieces: Counter[bytes] = Counter()
+    for language, words in _WORDS.items():
+        for word in words:
+            for form in (word, ' ' + word):
+                data = form.encode('utf-8')
+                for end in range(2, len(data) + 1):
+                    pieces[data[:end]] += 1
+    for piece in sorted(pieces, key=len)[:max_merges]:
+        ranks.setdefault(piece, len(ranks))
+    return tiktoken.Encoding(
+        'synthetic_o200k',
+        pat_str=O200K_PATTERN,
+        mergeable_ranks=ranks,
+        special_tokens={},
+    )
+
+
+def load_encoding(name: str) -> tuple[tiktoken.Encoding, str]:
+    # The real encoding when tiktoken can load it (cached or online),
+    # otherwise the synthetic stand-in.
+    if name == 'synthetic':
+        return synthetic_encoding(), 'synthetic'
+    try:
+        return tiktoken.get_encoding(name), name
+    except Exception:
+        return synthetic_encoding(), 'synthetic'
+
+
+@dataclass(frozen=True)
+class Config:
+    quick: bool = False
+    repeat: int = 5
+    encoding: tiktoken.Encoding | None = None
+    encoding_name: str = 'synthetic'
+
+
+def openai_tokenizer(encoding: tiktoken.Encoding, model: str = 'gpt-4o'):
+    from tokemon.tokenizers.openai import OpenAITokenizer
+
+    tokenizer = OpenAITokenizer(model)
+    # Prime the cached encoding so no model lookup or download happens.
+    tokenizer.__dict__['encoding'] = encoding
+    return tokenizer
+
+
+@dataclass
+class Result:
+    suite: str
+    name: str
+    params: dict
+    metrics: dict = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        params = ','.join(f'{k}={v}' for k, v in sorted(self.params.items()))
+        return f'{self.suite}/{self.name}[{params}]'
+
+    def as_dict(self) -> dict:
+        return {'key': self.key, 'suite': self.suite, 'name': self.name,
+                'params': self.params, 'metrics': self.metrics}
+
+
+def _summary(samples: list[float], items: int) -> dict:
+    median = statistics.median(samples)
+    return {
+        'median_s': median,
+        'min_s': min(samples),
+        'stdev_s': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'ops_per_s': items / median if median else float('inf'),
+        'repeat': len(samples),
+    }
+
+
+def measure(func: Callable[[], object], repeat: int = 5, items: int = 1) -> dict:
+    # One warm-up call, then `repeat` timed calls with the GC paused.
+    func()
+    samples = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return _summary(samples, items)
+
+
+def measure_async(
+    func: Callable[[], Awaitable[object]], repeat: int = 5, items: int = 1
+) -> dict:
+    async def run() -> list[float]:
+        await func()
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await func()
+            samples.append(time.perf_counter() - start)
+        return samples
+
+    return _summary(asyncio.run(run()), items)
+
+
+def percentiles(latencies: list[float]) -> dict:
+    if not latencies:
+        return {}
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {'p50_s': cuts[49], 'p95_s': cuts[94], 'p99_s': cuts[98]}
@@ -0,0 +1,177 @@
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+ANTHROPIC_MODEL = 'claude-bench-20250101'
+GOOGLE_MODEL = 'gemini-bench'
+XAI_MODEL = 'grok-bench'
+
+_GOOGLE_COUNT = re.compile(r'^/v1beta/models/[^/:]+:countTokens$')
+
+
+@dataclass(frozen=True)
+class StubBehaviour:
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    retry_after: float | None = None
+    seed: int = 0
+
+
+class StubBackend:
+    # Shared by the HTTP stub and the in-process xAI stub: decides each
+    # request's delay and failure from a seeded RNG, and counts traffic.
+    def __init__(self, behaviour: StubBehaviour):
+        self.behaviour = behaviour
+        self.requests = 0
+        self.errors = 0
+        self._rng = random.Random(behaviour.seed)
+        self._lock = threading.Lock()
+
+    def next(self) -> tuple[float, bool]:
+        b = self.behaviour
+        with self._lock:
+            self.requests += 1
+            delay = b.latency + b.jitter * self._rng.random()
+            failed = self._rng.random() < b.error_rate
+            self.errors += failed
+        return delay, failed
+
+
+def count_words(payload) -> int:
+    # Stand-in tokenizer: whitespace words in every 'text' or 'content' string.
+    if isinstance(payload, list):
+        return sum(map(count_words, payload))
+    if not isinstance(payload, dict):
+        return 0
+    total = 0
+    for key, value in payload.items():
+        if key in ('text', 'content') and isinstance(value, str):
+            total += len(value.split())
+        else:
+            total += count_words(value)
+    return total
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    backend: StubBackend
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        path = self.path.split('?')[0]
+        if path == '/v1/models':
+            self._send(200, {
+                'data': [{
+                    'id': ANTHROPIC_MODEL, 'type': 'model',
+                    'display_name': 'Claude Bench',
+                    'created_at': '2025-01-01T00:00:00Z',
+                }],
+                'has_more': False, 'first_id': ANTHROPIC_MODEL,
+                'last_id': ANTHROPIC_MODEL,
+            })
+        elif path == '/v1beta/models':
+            self._send(200, {'models': [{'name': f'models/{GOOGLE_MODEL}'}]})
+        else:
+            self._send(404, {'error': {'message': 'not found'}})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get('content-length') or 0)
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        path = self.path.split('?')[0]
+        if path == '/v1/messages/count_tokens':
+            body = {'input_tokens': count_words(payload.get('messages'))}
+        elif _GOOGLE_COUNT.match(path):
+            body = {'totalTokens': count_words(payload.get('contents'))}
+        else:
+            self._send(404, {'error': {'message': 'not found'}})
+            return
+        delay, failed = self.backend.next()
+        time.sleep(delay)
+        if failed:
+            self._error()
+        else:
+            self._send(200, body)
+
+    def _error(self) -> None:
+        behaviour = self.backend.behaviour
+        headers = {}
+        if behaviour.retry_after is not None:
+            headers['retry-after'] = str(behaviour.retry_after)
+        self._send(behaviour.error_status, {
+            'type': 'error',
+            'error': {
+                'type': 'overloaded_error', 'code': behaviour.error_status,
+                'message': 'stub failure', 'status': 'UNAVAILABLE',
+            },
+        }, headers)
+
+    def _send(self, status: int, body: dict, headers: dict | None = None) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('content-type', 'application/json')
+        self.send_header('content-length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StubServer:
+    # Anthropic and Gemini count endpoints on 127.0.0.1, served from a daemon
+    # thread for the duration of a `with` block.
+    def __init__(self, behaviour: StubBehaviour | None = None):
+        self.backend = StubBackend(behaviour or StubBehaviour())
+        handler = type('Handler', (_Handler,), {'backend': self.backend})
+        # The default listen backlog of 5 drops connects under concurrency.
+        server = type('Server', (ThreadingHTTPServer,), {'request_queue_size': 1024})
+        self._server = server(('127.0.0.1', 0), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def __enter__(self) -> 'StubServer':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+
+class StubUnavailable(ConnectionError):
+    pass
+
+
+def async_xai_stub(backend: StubBackend) -> SimpleNamespace:
+    # xAI talks gRPC, so it is stubbed in process at the SDK surface the
+    # tokenizer uses instead of over the wire.
+    async def list_language_models():
+        return [SimpleNamespace(name=XAI_MODEL, aliases=[])]
+
+    async def tokenize_text(model: str, text: str):
+        delay, failed = backend.next()
+        await asyncio.sleep(delay)
+        if failed:
+            raise StubUnavailable('stub failure')
+        return [SimpleNamespace(token_id=i, token_bytes=word.encode())
+                for i, word in enumerate(text.split())]
+
+    return SimpleNamespace(
+        models=SimpleNamespace(list_language_models=list_language_models),
+        tokenize=SimpleNamespace(tokenize_text=tokenize_text),
+    )
@@ -1,4 +1,27 @@
-from .model import Mode, ProviderName
-from .scaffold import tokemon, tokemon_models
+from .clients import ClientOptions
+from .limits import RateLimit
+from .resilience import Resilience
+from .tokenizers.batcher import MicroBatch
+from .model import Accuracy, Mode, ProviderName
+from .scaffold import (
+    tokemon,
+    tokemon_aclose,
+    tokemon_close,
+    tokemon_evict,
+    tokemon_models,
+)
 
-__ALL__ = ['tokemon', 'tokemon_models', 'Mode', 'ProviderName']
+__ALL__ = [
+    'tokemon',
+    'tokemon_models',
+    'tokemon_evict',
+    'tokemon_close',
+    'tokemon_aclose',
+    'ClientOptions',
+    'RateLimit',
+    'Resilience',
+    'MicroBatch',
+    'Accuracy',
+    'Mode',
+    'ProviderName',
+]
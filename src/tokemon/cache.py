@@ -0,0 +1,185 @@
+import abc
+import asyncio
+import hashlib
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor
+from dataclasses import dataclass
+
+CacheKey = tuple[str, str, bytes]
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def cache_key(provider: str, model: str, text: str) -> CacheKey:
+    digest = hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16)
+    return provider, model, digest.digest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class CacheBackend(abc.ABC):
+    @abc.abstractmethod
+    def get(self, key: CacheKey) -> int | None:
+        pass  # pragma: no cover
+
+    @abc.abstractmethod
+    def set(self, key: CacheKey, tokens: int) -> None:
+        pass  # pragma: no cover
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryCache(CacheBackend):
+    # LRU bounded by the approximate memory held by its entries rather than
+    # by entry count, so the budget holds however long the model names are.
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.evictions = 0
+        self._entries: OrderedDict[CacheKey, tuple[int, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _entry_size(key: CacheKey, tokens: int) -> int:
+        return sys.getsizeof(key) + sum(map(sys.getsizeof, key)) + sys.getsizeof(tokens)
+
+    def get(self, key: CacheKey) -> int | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: CacheKey, tokens: int) -> None:
+        size = self._entry_size(key, tokens)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (tokens, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SqliteCache(CacheBackend):
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS token_counts ('
+                'provider TEXT NOT NULL, model TEXT NOT NULL, digest BLOB NOT NULL, '
+                'tokens INTEGER NOT NULL, PRIMARY KEY (provider, model, digest))'
+            )
+
+    def get(self, key: CacheKey) -> int | None:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT tokens FROM token_counts '
+                'WHERE provider = ? AND model = ? AND digest = ?',
+                key,
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: CacheKey, tokens: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO token_counts VALUES (?, ?, ?, ?)',
+                (*key, tokens),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class TokenCountCache:
+    # In-memory LRU in front of an optional persistent store. Keys carry
+    # provider and model, so one cache can serve many tokenizers.
+    def __init__(
+        self,
+        memory: MemoryCache | None = None,
+        store: CacheBackend | None = None,
+    ):
+        self.memory = memory if memory is not None else MemoryCache()
+        self.store = store
+        self._stats = CacheStats()
+        self._stats_lock = threading.Lock()
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self._stats.hits,
+            misses=self._stats.misses,
+            evictions=self.memory.evictions,
+        )
+
+    def get(self, key: CacheKey) -> int | None:
+        tokens = self.memory.get(key)
+        if tokens is None and self.store is not None:
+            tokens = self._load(key)
+        return self._record(tokens)
+
+    def set(self, key: CacheKey, tokens: int) -> None:
+        self.memory.set(key, tokens)
+        if self.store is not None:
+            self.store.set(key, tokens)
+
+    # Async variants: memory hits stay on the event loop; the store is only
+    # touched on `executor` (the loop's default executor when None).
+    async def aget(self, key: CacheKey, executor: Executor | None = None) -> int | None:
+        tokens = self.memory.get(key)
+        if tokens is None and self.store is not None:
+            loop = asyncio.get_running_loop()
+            tokens = await loop.run_in_executor(executor, self._load, key)
+        return self._record(tokens)
+
+    async def aset(
+        self, key: CacheKey, tokens: int, executor: Executor | None = None
+    ) -> None:
+        self.memory.set(key, tokens)
+        if self.store is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(executor, self.store.set, key, tokens)
+
+    def _load(self, key: CacheKey) -> int | None:
+        tokens = self.store.get(key)
+        if tokens is not None:
+            self.memory.set(key, tokens)
+        return tokens
+
+    def _record(self, tokens: int | None) -> int | None:
+        with self._stats_lock:
+            if tokens is None:
+                self._stats.misses += 1
+            else:
+                self._stats.hits += 1
+        return tokens
+
+    def close(self) -> None:
+        if self.store is not None:
+            self.store.close()
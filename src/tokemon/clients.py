@@ -0,0 +1,96 @@
+import hashlib
+import inspect
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+T = TypeVar('T')
+
+
+@dataclass(frozen=True)
+class ClientOptions:
+    api_key: str | None = None
+    timeout: float | None = None
+    max_connections: int | None = None
+    max_keepalive_connections: int | None = None
+    keepalive_expiry: float | None = None
+
+    @property
+    def has_limits(self) -> bool:
+        return any(
+            value is not None
+            for value in (
+                self.max_connections,
+                self.max_keepalive_connections,
+                self.keepalive_expiry,
+            )
+        )
+
+
+DEFAULT_OPTIONS = ClientOptions()
+
+
+def credentials_key(name: str, options: ClientOptions) -> str:
+    # Never put the key itself in cache keys or on-disk snapshots.
+    if options.api_key is None:
+        return name
+    digest = hashlib.sha256(options.api_key.encode()).hexdigest()[:16]
+    return f'{name}:{digest}'
+
+
+def _has_async_close(client: Any) -> bool:
+    # google-genai clients also count: their close() is sync, but the async
+    # transport behind .aio can only be closed with aclose().
+    if hasattr(getattr(client, 'aio', None), 'aclose'):
+        return True
+    return inspect.iscoroutinefunction(getattr(client, 'close', None))
+
+
+class ClientPool:
+    # One SDK client (and so one HTTP connection pool) per client factory
+    # and options, shared by every tokenizer and provider that asks for it.
+    def __init__(self):
+        self._clients: dict[tuple[Callable, ClientOptions], Any] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        factory: Callable[[ClientOptions], T],
+        options: ClientOptions | None = None,
+    ) -> T:
+        key = (factory, options or DEFAULT_OPTIONS)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = factory(key[1])
+            return client
+
+    def _drain(self, keep: Callable[[Any], bool] = lambda client: False) -> list[Any]:
+        with self._lock:
+            drained = [k for k, client in self._clients.items() if not keep(client)]
+            return [self._clients.pop(k) for k in drained]
+
+    def close(self) -> None:
+        # Async clients, and sync ones with an async side, can only be fully
+        # closed from a running loop, so they stay pooled until aclose().
+        for client in self._drain(keep=_has_async_close):
+            close = getattr(client, 'close', None)
+            if close is not None:
+                close()
+
+    async def aclose(self) -> None:
+        for client in self._drain():
+            result = getattr(client, 'close', lambda: None)()
+            if inspect.isawaitable(result):
+                await result
+            # google-genai keeps a separate async transport behind .aio.
+            aio = getattr(client, 'aio', None)
+            if aio is not None and hasattr(aio, 'aclose'):
+                await aio.aclose()
+
+    def clear(self) -> None:
+        self._drain()
+
+
+clients = ClientPool()
@@ -0,0 +1,211 @@
+import asyncio
+import threading
+import time
+import weakref
+from collections.abc import Awaitable, Callable, Mapping
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import TypeVar
+
+from .clients import DEFAULT_OPTIONS, ClientOptions, credentials_key
+
+T = TypeVar('T')
+
+DEFAULT_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+# Penalties never slow a limiter below this fraction of its configured rate.
+MIN_RATE_FRACTION = 1 / 64
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    requests_per_second: float | None = None
+    burst: int = 1
+    max_concurrency: int | None = None
+    # The limiter is the only layer that retries 429s in async mode, so this
+    # matches the SDK retries it replaces.
+    max_retries: int = 2
+
+
+DEFAULT_RATE_LIMIT = RateLimit()
+
+
+def _header(headers: Mapping[str, str], *names: str) -> str | None:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            return value
+    return None
+
+
+def backoff_from_headers(
+    headers: Mapping[str, str], now: datetime | None = None
+) -> float | None:
+    # retry-after(-ms) first, then the provider's reset time once no requests
+    # remain in the current window.
+    if (value := _header(headers, 'retry-after-ms')) is not None:
+        return float(value) / 1000
+    if (value := _header(headers, 'retry-after')) is not None:
+        try:
+            return float(value)
+        except ValueError:
+            pass  # an HTTP date; fall through to the reset headers
+    remaining = headers.get('anthropic-ratelimit-requests-remaining')
+    reset = headers.get('anthropic-ratelimit-requests-reset')
+    if remaining == '0' and reset is not None:
+        try:
+            reset_at = datetime.fromisoformat(reset.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+        now = now or datetime.now(timezone.utc)
+        return max(0.0, (reset_at - now).total_seconds())
+    return None
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    if getattr(exc, 'status_code', None) == 429 or getattr(exc, 'code', None) == 429:
+        return True
+    code = getattr(exc, 'code', None)
+    # grpc.aio.AioRpcError, raised by the xAI SDK
+    return callable(code) and getattr(code(), 'name', None) == 'RESOURCE_EXHAUSTED'
+
+
+def _retry_delay(exc: BaseException, attempt: int) -> float:
+    response = getattr(exc, 'response', None)
+    headers = getattr(response, 'headers', None)
+    delay = backoff_from_headers(headers) if headers is not None else None
+    if delay is None:
+        delay = DEFAULT_BACKOFF * 2**attempt
+    return min(delay, MAX_BACKOFF)
+
+
+class AsyncRateLimiter:
+    # A token bucket (GCRA) and a concurrency cap shared by every async
+    # tokenizer with the same provider and API key. A 429 pauses all callers
+    # until the provider's retry time and halves the rate, at most once per
+    # backoff window and never below MIN_RATE_FRACTION of the configured
+    # rate; each success then wins back a twentieth of the configured rate.
+    def __init__(
+        self,
+        limit: RateLimit = DEFAULT_RATE_LIMIT,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limit = limit
+        self.rate = limit.requests_per_second
+        self._clock = clock
+        self._tat = 0.0
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self._semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def _semaphore(self) -> asyncio.Semaphore | None:
+        if self.limit.max_concurrency is None:
+            return None
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.limit.max_concurrency)
+                self._semaphores[loop] = semaphore
+            return semaphore
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = self._clock()
+            delay = max(0.0, self._blocked_until - now)
+            if self.rate is None:
+                return delay
+            interval = 1 / self.rate
+            tat = max(self._tat, now, self._blocked_until)
+            self._tat = tat + interval
+            return max(delay, tat - now - (self.limit.burst - 1) * interval)
+
+    def try_reserve(self) -> bool:
+        # Takes a request slot only if one is free right now, for optional
+        # requests such as hedges that are better skipped than queued.
+        semaphore = self._semaphore()
+        if semaphore is not None and semaphore.locked():
+            return False
+        with self._lock:
+            now = self._clock()
+            if now < self._blocked_until:
+                return False
+            if self.rate is None:
+                return True
+            interval = 1 / self.rate
+            tat = max(self._tat, now)
+            if tat - now > (self.limit.burst - 1) * interval:
+                return False
+            self._tat = tat + interval
+            return True
+
+    def penalize(self, delay: float) -> None:
+        with self._lock:
+            now = self._clock()
+            # Concurrent 429s from one burst count as a single penalty.
+            if self.rate is not None and now >= self._blocked_until:
+                floor = self.limit.requests_per_second * MIN_RATE_FRACTION
+                self.rate = max(floor, self.rate / 2)
+            self._blocked_until = max(self._blocked_until, now + delay)
+            # Drop the debt reserved at the old rate; the bucket restarts
+            # when the block lifts.
+            self._tat = min(self._tat, self._blocked_until)
+
+    def reward(self) -> None:
+        target = self.limit.requests_per_second
+        if target is None or self.rate is None or self.rate >= target:
+            return
+        with self._lock:
+            self.rate = min(target, self.rate + target / 20)
+
+    async def _attempt(self, request: Callable[[], Awaitable[T]]) -> T:
+        semaphore = self._semaphore()
+        if semaphore is None:
+            await asyncio.sleep(self.reserve())
+            return await request()
+        async with semaphore:
+            await asyncio.sleep(self.reserve())
+            return await request()
+
+    async def call(self, request: Callable[[], Awaitable[T]]) -> T:
+        for attempt in range(self.limit.max_retries + 1):
+            try:
+                result = await self._attempt(request)
+            except Exception as e:
+                if not is_rate_limited(e) or attempt == self.limit.max_retries:
+                    raise
+                self.penalize(_retry_delay(e, attempt))
+            else:
+                self.reward()
+                return result
+        raise AssertionError('unreachable')  # pragma: no cover
+
+
+class LimiterRegistry:
+    def __init__(self):
+        self._limiters: dict[tuple[str, RateLimit], AsyncRateLimiter] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, limit: RateLimit | None = None) -> AsyncRateLimiter:
+        limit = limit or DEFAULT_RATE_LIMIT
+        with self._lock:
+            limiter = self._limiters.get((key, limit))
+            if limiter is None:
+                limiter = self._limiters[(key, limit)] = AsyncRateLimiter(limit)
+            return limiter
+
+    def clear(self) -> None:
+        with self._lock:
+            self._limiters.clear()
+
+
+limiters = LimiterRegistry()
+
+
+def provider_limiter(
+    provider: str,
+    client_options: ClientOptions | None,
+    limit: RateLimit | None,
+) -> AsyncRateLimiter:
+    key = credentials_key(provider, client_options or DEFAULT_OPTIONS)
+    return limiters.get(key, limit)
@@ -1,3 +1,5 @@
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
 from dataclasses import dataclass
 from enum import Enum
 
@@ -7,6 +9,11 @@ class Mode:
     ASYNC = 'async'
 
 
+class Accuracy:
+    EXACT = 'exact'
+    ESTIMATE = 'estimate'
+
+
 class ProviderName(Enum):
     OPENAI = 'openai'
     ANTHROPIC = 'anthropic'
@@ -14,8 +21,102 @@ class ProviderName(Enum):
     GOOGLE = 'google'
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TokenizerResponse:
     input_tokens: int | None
     model: str
     provider: str
+    error_bound: int | None = None
+    tokens: array | None = None
+    offsets: array | None = None
+
+
+class BatchResponse(Sequence[TokenizerResponse]):
+    # Columnar batch results: one int64 per count, with model and provider
+    # stored once. Items are TokenizerResponse views built on access. A
+    # count the provider didn't return is stored as -1 and left out of
+    # sum() and percentile(); so is an exact count's missing error bound.
+    __slots__ = ('model', 'provider', 'counts', 'error_bounds')
+
+    MISSING = -1
+
+    def __init__(
+        self,
+        model: str,
+        provider: str,
+        counts: array,
+        error_bounds: array | None = None,
+    ):
+        self.model = model
+        self.provider = provider
+        self.counts = counts
+        self.error_bounds = error_bounds
+
+    @classmethod
+    def from_counts(
+        cls, model: str, provider: str, counts: Iterable[int | None]
+    ) -> 'BatchResponse':
+        missing = cls.MISSING
+        values = (missing if count is None else count for count in counts)
+        return cls(model, provider, array('q', values))
+
+    @classmethod
+    def from_responses(
+        cls,
+        responses: Iterable[TokenizerResponse],
+        model: str,
+        provider: str,
+    ) -> 'BatchResponse':
+        missing = cls.MISSING
+        counts = array('q')
+        bounds = array('q')
+        for response in responses:
+            tokens, bound = response.input_tokens, response.error_bound
+            counts.append(missing if tokens is None else tokens)
+            bounds.append(missing if bound is None else bound)
+        has_bounds = any(bound != missing for bound in bounds)
+        return cls(model, provider, counts, bounds if has_bounds else None)
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            bounds = None if self.error_bounds is None else self.error_bounds[index]
+            return BatchResponse(self.model, self.provider, self.counts[index], bounds)
+        count = self.counts[index]
+        bound = self.MISSING if self.error_bounds is None else self.error_bounds[index]
+        return TokenizerResponse(
+            input_tokens=None if count == self.MISSING else count,
+            model=self.model,
+            provider=self.provider,
+            error_bound=None if bound == self.MISSING else bound,
+        )
+
+    def __iter__(self) -> Iterator[TokenizerResponse]:
+        for index in range(len(self.counts)):
+            yield self[index]
+
+    def __repr__(self) -> str:
+        return (
+            f'BatchResponse(model={self.model!r}, provider={self.provider!r}, '
+            f'len={len(self)})'
+        )
+
+    def _known(self) -> list[int]:
+        return [count for count in self.counts if count != self.MISSING]
+
+    def sum(self) -> int:
+        return sum(self._known())
+
+    def percentile(self, q: float) -> float:
+        # Linear interpolation between closest ranks, as numpy.percentile.
+        if not 0 <= q <= 100:
+            raise ValueError(f'Percentile must be in [0, 100]: {q}')
+        values = sorted(self._known())
+        if not values:
+            raise ValueError('No counts to take a percentile of')
+        rank = (len(values) - 1) * q / 100
+        low = int(rank)
+        high = min(low + 1, len(values) - 1)
+        return values[low] + (values[high] - values[low]) * (rank - low)
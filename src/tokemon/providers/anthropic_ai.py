@@ -1,26 +1,92 @@
-from functools import lru_cache
+import re
 
+import anthropic
 from anthropic import Anthropic, AsyncAnthropic
-from async_lru import alru_cache
 
 from .base import Provider, AsyncProvider
+from .index import ModelIndex
+from ..clients import DEFAULT_OPTIONS, ClientOptions, clients
+from ..model import ProviderName
+
+_SNAPSHOT_SUFFIX = re.compile(r'-\d{8}$')
+
+
+def _client_kwargs(options: ClientOptions, http_client: type) -> dict:
+    kwargs: dict = {}
+    if options.api_key is not None:
+        kwargs['api_key'] = options.api_key
+    if options.timeout is not None:
+        kwargs['timeout'] = options.timeout
+    if options.has_limits:
+        # Built from the SDK's own defaults so this works whichever httpx
+        # flavour the installed SDK ships with.
+        defaults = anthropic.DEFAULT_CONNECTION_LIMITS
+        limits = type(defaults)(
+            max_connections=options.max_connections or defaults.max_connections,
+            max_keepalive_connections=(
+                options.max_keepalive_connections
+                or defaults.max_keepalive_connections
+            ),
+            keepalive_expiry=options.keepalive_expiry or defaults.keepalive_expiry,
+        )
+        kwargs['http_client'] = http_client(limits=limits)
+    return kwargs
+
+
+def anthropic_client(options: ClientOptions) -> Anthropic:
+    return Anthropic(**_client_kwargs(options, anthropic.DefaultHttpxClient))
+
+
+def async_anthropic_client(options: ClientOptions) -> AsyncAnthropic:
+    # Async tokenizers retry 429s in their rate limiter and other transient
+    # errors per Resilience.retries; SDK retries would stack on both.
+    return AsyncAnthropic(
+        **_client_kwargs(options, anthropic.DefaultAsyncHttpxClient), max_retries=0
+    )
+
+
+def _model_index(ids: list[str]) -> ModelIndex:
+    # The API lists dated snapshots newest first and also accepts the
+    # undated and '-latest' aliases, which point at the newest snapshot.
+    aliases: dict[str, str] = {}
+    for model_id in ids:
+        base = _SNAPSHOT_SUFFIX.sub('', model_id)
+        if base != model_id:
+            aliases.setdefault(base, model_id)
+            aliases.setdefault(f'{base}-latest', model_id)
+    return ModelIndex(ids, aliases=aliases)
 
 
 class AnthropicProvider(Provider):
-    def __init__(self):
-        self.client = Anthropic()
+    name = ProviderName.ANTHROPIC.value
 
-    @lru_cache(maxsize=1)
-    def models(self) -> list[str]:
-        client = Anthropic()
-        return [m.id for m in client.models.list().data]
+    def __init__(
+        self,
+        client: Anthropic | None = None,
+        client_options: ClientOptions | None = None,
+    ):
+        self.client_options = client_options or DEFAULT_OPTIONS
+        self.client = client if client is not None else clients.get(
+            anthropic_client, self.client_options
+        )
+
+    def _fetch_model_index(self) -> ModelIndex:
+        return _model_index([m.id for m in self.client.models.list().data])
 
 
 class AsyncAnthropicProvider(AsyncProvider):
-    def __init__(self):
-        self.client = AsyncAnthropic()
+    name = ProviderName.ANTHROPIC.value
+
+    def __init__(
+        self,
+        client: AsyncAnthropic | None = None,
+        client_options: ClientOptions | None = None,
+    ):
+        self.client_options = client_options or DEFAULT_OPTIONS
+        self.client = client if client is not None else clients.get(
+            async_anthropic_client, self.client_options
+        )
 
-    @alru_cache(maxsize=1, ttl=300)
-    async def models(self) -> list[str]:
+    async def _fetch_model_index(self) -> ModelIndex:
         response = await self.client.models.list()
-        return [m.id for m in response.data]
+        return _model_index([m.id for m in response.data])
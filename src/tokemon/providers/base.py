@@ -1,13 +1,43 @@
 import abc
 
+from .index import ModelIndex
+from .registry import registry
+from ..clients import DEFAULT_OPTIONS, ClientOptions, credentials_key
+
 
 class Provider(abc.ABC):
+    name: str
+    client_options: ClientOptions = DEFAULT_OPTIONS
+
+    @property
+    def cache_key(self) -> str:
+        return credentials_key(self.name, self.client_options)
+
     @abc.abstractmethod
-    def models(self) -> list[str]:
+    def _fetch_model_index(self) -> ModelIndex:
         pass  # pragma: no cover
 
+    def model_index(self) -> ModelIndex:
+        return registry.get(self.cache_key, self._fetch_model_index)
+
+    def models(self) -> list[str]:
+        return list(self.model_index())
+
 
 class AsyncProvider(abc.ABC):
+    name: str
+    client_options: ClientOptions = DEFAULT_OPTIONS
+
+    @property
+    def cache_key(self) -> str:
+        return credentials_key(self.name, self.client_options)
+
     @abc.abstractmethod
-    async def models(self) -> list[str]:
+    async def _fetch_model_index(self) -> ModelIndex:
         pass  # pragma: no cover
+
+    async def model_index(self) -> ModelIndex:
+        return await registry.aget(self.cache_key, self._fetch_model_index)
+
+    async def models(self) -> list[str]:
+        return list(await self.model_index())
@@ -1,9 +1,47 @@
-from functools import lru_cache
-
-from async_lru import alru_cache
+import httpx
 from google import genai
+from google.genai import types
 
 from .base import Provider, AsyncProvider
+from .index import ModelIndex
+from ..clients import DEFAULT_OPTIONS, ClientOptions, clients
+from ..model import ProviderName
+
+# httpx's own pool defaults, which it doesn't export. Unset fields fall back
+# to these rather than to None, which httpx reads as unlimited.
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=100, max_keepalive_connections=20, keepalive_expiry=5.0
+)
+
+
+def google_client(options: ClientOptions) -> genai.Client:
+    # One client serves both modes: async calls go through client.aio.
+    kwargs: dict = {}
+    if options.api_key is not None:
+        kwargs['api_key'] = options.api_key
+    http_options: dict = {}
+    if options.timeout is not None:
+        http_options['timeout'] = int(options.timeout * 1000)
+    if options.has_limits:
+        limits = {
+            'limits': httpx.Limits(
+                max_connections=(
+                    options.max_connections or DEFAULT_LIMITS.max_connections
+                ),
+                max_keepalive_connections=(
+                    options.max_keepalive_connections
+                    or DEFAULT_LIMITS.max_keepalive_connections
+                ),
+                keepalive_expiry=(
+                    options.keepalive_expiry or DEFAULT_LIMITS.keepalive_expiry
+                ),
+            )
+        }
+        http_options['client_args'] = limits
+        http_options['async_client_args'] = limits
+    if http_options:
+        kwargs['http_options'] = types.HttpOptions(**http_options)
+    return genai.Client(**kwargs)
 
 
 def _strip_models_prefix(name: str) -> str:
@@ -12,23 +50,41 @@ def _strip_models_prefix(name: str) -> str:
     return name
 
 
+def _model_index(names: list[str]) -> ModelIndex:
+    ids = [_strip_models_prefix(name) for name in names]
+    return ModelIndex(ids, aliases={f'models/{i}': i for i in ids})
+
+
 class GoogleProvider(Provider):
-    def __init__(self):
-        self.client = genai.Client()
+    name = ProviderName.GOOGLE.value
 
-    @lru_cache(maxsize=1)
-    def models(self) -> list[str]:
-        client = genai.Client()
-        return [_strip_models_prefix(m.name) for m in client.models.list()]
+    def __init__(
+        self,
+        client: genai.Client | None = None,
+        client_options: ClientOptions | None = None,
+    ):
+        self.client_options = client_options or DEFAULT_OPTIONS
+        self.client = client if client is not None else clients.get(
+            google_client, self.client_options
+        )
+
+    def _fetch_model_index(self) -> ModelIndex:
+        return _model_index([m.name for m in self.client.models.list()])
 
 
 class AsyncGoogleProvider(AsyncProvider):
-    def __init__(self):
-        self.client = genai.Client()
+    name = ProviderName.GOOGLE.value
+
+    def __init__(
+        self,
+        client: genai.Client | None = None,
+        client_options: ClientOptions | None = None,
+    ):
+        self.client_options = client_options or DEFAULT_OPTIONS
+        self.client = client if client is not None else clients.get(
+            google_client, self.client_options
+        )
 
-    @alru_cache(maxsize=1, ttl=300)
-    async def models(self) -> list[str]:
+    async def _fetch_model_index(self) -> ModelIndex:
         response = await self.client.aio.models.list()
-        return [
-            _strip_models_prefix(m.name) for m in response
-        ]
+        return _model_index([m.name for m in response])
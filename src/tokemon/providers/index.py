@@ -0,0 +1,51 @@
+from collections.abc import Iterable, Iterator, Mapping
+
+
+class ModelIndex:
+    __slots__ = ('models', 'aliases', 'prefixes', '_ids')
+
+    def __init__(
+        self,
+        models: Iterable[str],
+        aliases: Mapping[str, str] | None = None,
+        prefixes: Iterable[str] = (),
+    ):
+        self.models = tuple(models)
+        self.aliases = dict(aliases or {})
+        # Longest prefix wins, so 'gpt-4o-' is tried before 'gpt-4-'.
+        self.prefixes = tuple(sorted(prefixes, key=len, reverse=True))
+        self._ids = frozenset(self.models)
+
+    def resolve(self, model: str) -> str | None:
+        if model in self._ids:
+            return model
+        if model in self.aliases:
+            return self.aliases[model]
+        for prefix in self.prefixes:
+            if model.startswith(prefix):
+                return prefix
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            'models': list(self.models),
+            'aliases': self.aliases,
+            'prefixes': list(self.prefixes),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> 'ModelIndex':
+        return cls(
+            data['models'],
+            aliases=data.get('aliases'),
+            prefixes=data.get('prefixes', ()),
+        )
+
+    def __contains__(self, model: object) -> bool:
+        return isinstance(model, str) and self.resolve(model) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.models)
+
+    def __len__(self) -> int:
+        return len(self.models)
@@ -2,10 +2,35 @@ from functools import lru_cache
 
 import tiktoken
 
-from .base import Provider
+from .base import AsyncProvider, Provider
+from .index import ModelIndex
+from ..model import ProviderName
+
+
+@lru_cache(maxsize=1)
+def _model_index() -> ModelIndex:
+    return ModelIndex(
+        tiktoken.model.MODEL_TO_ENCODING,
+        prefixes=tiktoken.model.MODEL_PREFIX_TO_ENCODING,
+    )
 
 
 class OpenAIProvider(Provider):
-    @lru_cache(maxsize=1)
-    def models(self) -> list[str]:
-        return list(tiktoken.model.MODEL_TO_ENCODING.keys())
+    name = ProviderName.OPENAI.value
+
+    def _fetch_model_index(self) -> ModelIndex:
+        return _model_index()
+
+    def model_index(self) -> ModelIndex:
+        # tiktoken's tables are fixed for the life of the process.
+        return _model_index()
+
+
+class AsyncOpenAIProvider(AsyncProvider):
+    name = ProviderName.OPENAI.value
+
+    async def _fetch_model_index(self) -> ModelIndex:
+        return _model_index()
+
+    async def model_index(self) -> ModelIndex:
+        return _model_index()
@@ -0,0 +1,168 @@
+import asyncio
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from .index import ModelIndex
+from .snapshot import ModelSnapshot
+
+DEFAULT_TTL = 300.0
+DEFAULT_STALE_TTL = 3600.0
+
+
+@dataclass
+class _Entry:
+    index: ModelIndex
+    fetched_at: float
+    expires_at: float
+
+
+class ModelRegistry:
+    # Process-wide model lists keyed by provider. Entries are fresh for
+    # `ttl` seconds; for a further `stale_ttl` seconds the stale list is
+    # still served while a single background refresh replaces it. With a
+    # snapshot, cold misses are first served from disk (stale for up to
+    # its max_age) and every fetch is written back.
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL,
+        stale_ttl: float = DEFAULT_STALE_TTL,
+        clock: Callable[[], float] = time.time,
+        snapshot: ModelSnapshot | None = None,
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.snapshot = snapshot
+        self._clock = clock
+        self._entries: dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._fetch_locks: dict[str, threading.Lock] = {}
+        self._refreshing: set[str] = set()
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def _lookup(self, key: str) -> tuple[ModelIndex | None, bool]:
+        now = self._clock()
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._load_snapshot(key, now)
+        if entry is None or now >= entry.expires_at:
+            return None, True
+        return entry.index, now - entry.fetched_at >= self.ttl
+
+    def _load_snapshot(self, key: str, now: float) -> _Entry | None:
+        if self.snapshot is None:
+            return None
+        loaded = self.snapshot.load(key, now)
+        if loaded is None:
+            return None
+        index, fetched_at = loaded
+        expires_at = fetched_at + max(self.snapshot.max_age, self.ttl + self.stale_ttl)
+        current = self._entries.get(key)
+        if current is not None and current.fetched_at >= fetched_at:
+            return current
+        entry = self._entries[key] = _Entry(index, fetched_at, expires_at)
+        return entry
+
+    def _fresh_from_snapshot(self, key: str) -> ModelIndex | None:
+        # Another process may already have refreshed this provider.
+        now = self._clock()
+        entry = self._load_snapshot(key, now)
+        if entry is not None and now - entry.fetched_at < self.ttl:
+            return entry.index
+        return None
+
+    def _store(self, key: str, index: ModelIndex) -> ModelIndex:
+        now = self._clock()
+        self._entries[key] = _Entry(index, now, now + self.ttl + self.stale_ttl)
+        if self.snapshot is not None:
+            self.snapshot.save(key, index, now)
+        return index
+
+    def _fetch_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._fetch_locks.setdefault(key, threading.Lock())
+
+    def get(self, key: str, fetch: Callable[[], ModelIndex]) -> ModelIndex:
+        index, stale = self._lookup(key)
+        if index is not None:
+            if stale:
+                self._refresh_in_background(key, fetch)
+            return index
+        with self._fetch_lock(key):
+            # Another thread may have fetched while we waited on the lock.
+            index, stale = self._lookup(key)
+            if index is not None and not stale:
+                return index
+            return self._fetch(key, fetch)
+
+    def _fetch(self, key: str, fetch: Callable[[], ModelIndex]) -> ModelIndex:
+        index = self._fresh_from_snapshot(key)
+        if index is None:
+            index = self._store(key, fetch())
+        return index
+
+    def _refresh_in_background(
+        self, key: str, fetch: Callable[[], ModelIndex]
+    ) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh() -> None:
+            try:
+                with self._fetch_lock(key):
+                    self._fetch(key, fetch)
+            except Exception:
+                pass  # keep serving the stale list; the next read retries
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    async def aget(
+        self, key: str, fetch: Callable[[], Awaitable[ModelIndex]]
+    ) -> ModelIndex:
+        index, stale = self._lookup(key)
+        if index is not None:
+            if stale:
+                self._spawn(key, fetch)
+            return index
+        # Shielded so a cancelled caller doesn't cancel the shared fetch.
+        return await asyncio.shield(self._spawn(key, fetch))
+
+    def _spawn(
+        self, key: str, fetch: Callable[[], Awaitable[ModelIndex]]
+    ) -> asyncio.Task:
+        task = self._tasks.get(key)
+        loop = asyncio.get_running_loop()
+        if task is not None and not task.done() and task.get_loop() is loop:
+            return task
+
+        async def refresh() -> ModelIndex:
+            index = self._fresh_from_snapshot(key)
+            if index is None:
+                index = self._store(key, await fetch())
+            return index
+
+        task = loop.create_task(refresh())
+        self._tasks[key] = task
+        task.add_done_callback(lambda t: self._finish(key, t))
+        return task
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here; awaiting callers still see it
+
+    def invalidate(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+registry = ModelRegistry(snapshot=ModelSnapshot.from_env())
@@ -0,0 +1,68 @@
+import contextlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from .index import ModelIndex
+
+CACHE_DIR_ENV = 'TOKEMON_CACHE_DIR'
+MAX_AGE_ENV = 'TOKEMON_MODEL_CACHE_MAX_AGE'
+DEFAULT_MAX_AGE = 86400.0
+SNAPSHOT_FILE = 'models.json'
+
+
+class ModelSnapshot:
+    # JSON file of model lists shared by every process pointed at it, so
+    # workers can start warm instead of all listing models at once.
+    def __init__(self, path: str | os.PathLike, max_age: float = DEFAULT_MAX_AGE):
+        self.path = Path(path)
+        self.max_age = max_age
+
+    @classmethod
+    def from_env(cls) -> 'ModelSnapshot | None':
+        cache_dir = os.environ.get(CACHE_DIR_ENV)
+        if not cache_dir:
+            return None
+        try:
+            max_age = float(os.environ.get(MAX_AGE_ENV, DEFAULT_MAX_AGE))
+        except ValueError:
+            # A bad setting must not break `import tokemon`.
+            max_age = DEFAULT_MAX_AGE
+        return cls(Path(cache_dir) / SNAPSHOT_FILE, max_age=max_age)
+
+    def _read(self) -> dict:
+        try:
+            with self.path.open(encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def load(self, key: str, now: float) -> tuple[ModelIndex, float] | None:
+        entry = self._read().get(key)
+        try:
+            fetched_at = float(entry['fetched_at'])
+            index = ModelIndex.from_dict(entry)
+        except (KeyError, TypeError, ValueError):
+            return None
+        if now - fetched_at >= self.max_age:
+            return None
+        return index, fetched_at
+
+    def save(self, key: str, index: ModelIndex, fetched_at: float) -> None:
+        data = self._read()
+        data[key] = {'fetched_at': fetched_at, **index.to_dict()}
+        # The snapshot is an optimisation: never fail a count over it.
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp)
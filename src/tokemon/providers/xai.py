@@ -1,25 +1,71 @@
-from functools import lru_cache
-
-from async_lru import alru_cache
 from xai_sdk import AsyncClient, Client
 
 from .base import Provider, AsyncProvider
+from .index import ModelIndex
+from ..clients import DEFAULT_OPTIONS, ClientOptions, clients
+from ..model import ProviderName
+
+
+def _client_kwargs(options: ClientOptions) -> dict:
+    # xAI talks gRPC over one multiplexed HTTP/2 channel, so there is no
+    # connection pool to size; keepalive_expiry maps to the idle timeout.
+    kwargs: dict = {}
+    if options.api_key is not None:
+        kwargs['api_key'] = options.api_key
+    if options.timeout is not None:
+        kwargs['timeout'] = options.timeout
+    if options.keepalive_expiry is not None:
+        kwargs['channel_options'] = [
+            ('grpc.client_idle_timeout_ms', int(options.keepalive_expiry * 1000)),
+        ]
+    return kwargs
+
+
+def xai_client(options: ClientOptions) -> Client:
+    return Client(**_client_kwargs(options))
+
+
+def async_xai_client(options: ClientOptions) -> AsyncClient:
+    return AsyncClient(**_client_kwargs(options))
+
+
+def _model_index(models: list) -> ModelIndex:
+    return ModelIndex(
+        [m.name for m in models],
+        aliases={alias: m.name for m in models for alias in m.aliases},
+    )
 
 
 class XaiProvider(Provider):
-    def __init__(self):
-        self.client = Client()
+    name = ProviderName.XAI.value
 
-    @lru_cache(maxsize=1)
-    def models(self) -> list[str]:
-        return [m.name for m in self.client.models.list_language_models()]
+    def __init__(
+        self,
+        client: Client | None = None,
+        client_options: ClientOptions | None = None,
+    ):
+        self.client_options = client_options or DEFAULT_OPTIONS
+        self.client = client if client is not None else clients.get(
+            xai_client, self.client_options
+        )
+
+    def _fetch_model_index(self) -> ModelIndex:
+        return _model_index(self.client.models.list_language_models())
 
 
 class AsyncXaiProvider(AsyncProvider):
-    def __init__(self):
-        self.client = AsyncClient()
+    name = ProviderName.XAI.value
+
+    def __init__(
+        self,
+        client: AsyncClient | None = None,
+        client_options: ClientOptions | None = None,
+    ):
+        self.client_options = client_options or DEFAULT_OPTIONS
+        self.client = client if client is not None else clients.get(
+            async_xai_client, self.client_options
+        )
 
-    @alru_cache(maxsize=1, ttl=300)
-    async def models(self) -> list[str]:
+    async def _fetch_model_index(self) -> ModelIndex:
         response = await self.client.models.list_language_models()
-        return [m.name for m in response]
+        return _model_index(response)
@@ -0,0 +1,390 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Iterable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from functools import cached_property, partial
+from typing import TYPE_CHECKING, TypeVar
+
+from .clients import DEFAULT_OPTIONS, ClientOptions, credentials_key
+from .limits import AsyncRateLimiter, is_rate_limited
+from .model import TokenizerResponse
+from .tokenizers.messages import Message, render
+
+if TYPE_CHECKING:
+    import tiktoken
+
+T = TypeVar('T')
+
+LATENCY_WINDOW = 256
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MAX_WORKERS = 32
+
+_TRANSIENT_STATUS = frozenset({408, 429})
+_TRANSIENT_CODES = frozenset({'UNAVAILABLE', 'DEADLINE_EXCEEDED', 'RESOURCE_EXHAUSTED'})
+# Matched by name so no provider SDK has to be imported here.
+_TRANSIENT_TYPES = frozenset({'APIConnectionError', 'APITimeoutError', 'TransportError'})
+
+
+@dataclass(frozen=True)
+class Resilience:
+    timeout: float | None = None
+    retries: int = 0
+    backoff: float = 0.1
+    max_backoff: float = 2.0
+    hedge_after: float | None = None
+    failure_threshold: int | None = None
+    recovery_time: float = 30.0
+    fallback: bool = True
+    # Used for fallback estimates. When None, the calibration's encoding is
+    # loaded on the first open-circuit call and must already be in tiktoken's
+    # cache, since the network is likely down by then.
+    encoding: 'tiktoken.Encoding | None' = None
+
+
+DEFAULT_RESILIENCE = Resilience()
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+def is_transient(exc: BaseException) -> bool:
+    # asyncio.TimeoutError is only an alias of TimeoutError from 3.11 on.
+    if isinstance(exc, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = getattr(exc, 'status_code', None) or getattr(exc, 'code', None)
+    if isinstance(status, int):
+        return status in _TRANSIENT_STATUS or status >= 500
+    if callable(status):  # grpc.aio.AioRpcError, raised by the xAI SDK
+        return getattr(status(), 'name', None) in _TRANSIENT_CODES
+    return any(cls.__name__ in _TRANSIENT_TYPES for cls in type(exc).__mro__)
+
+
+class LatencyWindow:
+    def __init__(self, size: int = LATENCY_WINDOW):
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, q: float | None) -> float | None:
+        samples = sorted(self._samples)
+        if q is None or len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[round(q / 100 * (len(samples) - 1))]
+
+
+class CircuitBreaker:
+    # Opens after `threshold` consecutive transient failures. Once
+    # `recovery_time` has passed, one probe request is let through; its
+    # outcome closes the breaker or re-opens it.
+    def __init__(
+        self,
+        threshold: int | None,
+        recovery_time: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.threshold = threshold
+        self.recovery_time = recovery_time
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or self._clock() - self._opened_at < self.recovery_time:
+                return False
+            self._probing = True
+            return True
+
+    def release(self) -> None:
+        # A probe that ended without an outcome (e.g. it was cancelled)
+        # leaves the state alone and lets the next caller probe.
+        with self._lock:
+            self._probing = False
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            self._probing = False
+            if ok:
+                self._failures = 0
+                self._opened_at = None
+                return
+            self._failures += 1
+            if self.threshold is not None and self._failures >= self.threshold:
+                self._opened_at = self._clock()
+
+
+class ProviderHealth:
+    def __init__(self, policy: Resilience):
+        self.breaker = CircuitBreaker(policy.failure_threshold, policy.recovery_time)
+        self.latencies = LatencyWindow()
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # One pool for every sync tokenizer sharing this health entry, made
+        # the first time a timeout or hedge needs it.
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    HEDGE_MAX_WORKERS, thread_name_prefix='tokemon-hedge'
+                )
+            return self._executor
+
+    def shutdown(self) -> None:
+        # Requests still running finish in the background.
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+class HealthRegistry:
+    def __init__(self):
+        self._health: dict[tuple[str, Resilience], ProviderHealth] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, policy: Resilience | None = None) -> ProviderHealth:
+        policy = policy or DEFAULT_RESILIENCE
+        with self._lock:
+            health = self._health.get((key, policy))
+            if health is None:
+                health = self._health[(key, policy)] = ProviderHealth(policy)
+            return health
+
+    def clear(self) -> None:
+        with self._lock:
+            cleared = list(self._health.values())
+            self._health.clear()
+        for entry in cleared:
+            entry.shutdown()
+
+
+health = HealthRegistry()
+
+
+class _Guard:
+    def __init__(
+        self,
+        model: str,
+        provider: str,
+        client_options: ClientOptions | None = None,
+        policy: Resilience | None = None,
+    ):
+        self.model = model
+        self.provider_name = provider
+        self.policy = policy or DEFAULT_RESILIENCE
+        key = credentials_key(provider, client_options or DEFAULT_OPTIONS)
+        self.health = health.get(key, self.policy)
+
+    @cached_property
+    def _estimator(self):
+        # Deferred so that importing tokemon doesn't load tiktoken.
+        from .tokenizers.estimate import (
+            FALLBACK_CALIBRATION,
+            _Estimator,
+            calibration_for,
+        )
+
+        provider, model = self.provider_name, self.model
+        calibration = calibration_for(provider, model, FALLBACK_CALIBRATION)
+        return _Estimator(model, provider, calibration, self.policy.encoding)
+
+    def estimate(self, text: str) -> TokenizerResponse:
+        return self._estimator.response(self._estimator.base_count(text))
+
+    def estimate_messages(
+        self,
+        messages: Iterable[Message],
+        system: str | None = None,
+        tools: list[dict] | None = None,
+    ) -> TokenizerResponse:
+        return self.estimate(render(messages, system, tools))
+
+    def _open(self, fallback: Callable[[], TokenizerResponse]) -> TokenizerResponse:
+        if self.policy.fallback:
+            return fallback()
+        raise CircuitOpenError(f'{self.provider_name} circuit breaker is open')
+
+    def _retry_delay(self, attempt: int) -> float | None:
+        # Full jitter; None once the retries are spent.
+        if attempt >= self.policy.retries:
+            return None
+        cap = min(self.policy.max_backoff, self.policy.backoff * 2**attempt)
+        return random.uniform(0, cap)
+
+    def _hedge_delay(self) -> float | None:
+        return self.health.latencies.percentile(self.policy.hedge_after)
+
+
+class Guard(_Guard):
+    # Sync calls only go through the health entry's thread pool when a
+    # timeout or hedging needs one; a call that loses a hedge or times out
+    # finishes in the background.
+
+    def call(
+        self,
+        request: Callable[[], TokenizerResponse],
+        fallback: Callable[[], TokenizerResponse],
+    ) -> TokenizerResponse:
+        if not self.health.breaker.allow():
+            return self._open(fallback)
+        try:
+            response = self._retrying(request)
+        except Exception as e:
+            self.health.breaker.record(not is_transient(e))
+            raise
+        except BaseException:
+            self.health.breaker.release()
+            raise
+        self.health.breaker.record(True)
+        return response
+
+    def _retrying(self, request: Callable[[], T]) -> T:
+        attempt = 0
+        while True:
+            try:
+                return self._attempt(request)
+            except Exception as e:
+                delay = self._retry_delay(attempt)
+                if delay is None or not is_transient(e):
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+    def _timed(self, request: Callable[[], T]) -> T:
+        start = time.perf_counter()
+        result = request()
+        self.health.latencies.add(time.perf_counter() - start)
+        return result
+
+    def _attempt(self, request: Callable[[], T]) -> T:
+        hedge = self._hedge_delay()
+        if self.policy.timeout is None and hedge is None:
+            return self._timed(request)
+        deadline = None
+        if self.policy.timeout is not None:
+            deadline = time.monotonic() + self.policy.timeout
+        executor = self.health.executor
+        futures = [executor.submit(self._timed, request)]
+        if hedge is not None and not wait(futures, timeout=hedge).done:
+            futures.append(executor.submit(self._timed, request))
+        return _first_result(futures, deadline)
+
+
+def _first_result(futures: list[Future], deadline: float | None):
+    pending, error = set(futures), None
+    while pending:
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            raise TimeoutError('Token count request timed out')
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+class AsyncGuard(_Guard):
+    # With a limiter, each attempt waits for its slot first; the timeout,
+    # hedging and latency samples only cover the provider call itself, so
+    # local queueing can't count against the provider.
+    async def call(
+        self,
+        request: Callable[[], Awaitable[TokenizerResponse]],
+        fallback: Callable[[], TokenizerResponse],
+        limiter: AsyncRateLimiter | None = None,
+    ) -> TokenizerResponse:
+        attempt = partial(self.attempt, request, limiter)
+        if limiter is not None:
+            attempt = partial(limiter.call, attempt)
+        return await self.guarded(attempt, fallback)
+
+    async def guarded(
+        self,
+        attempt: Callable[[], Awaitable[TokenizerResponse]],
+        fallback: Callable[[], TokenizerResponse],
+    ) -> TokenizerResponse:
+        # Breaker and retries only; `attempt` applies its own timeout.
+        if not self.health.breaker.allow():
+            return self._open(fallback)
+        try:
+            response = await self._retrying(attempt)
+        except Exception as e:
+            self.health.breaker.record(not is_transient(e))
+            raise
+        except BaseException:
+            self.health.breaker.release()
+            raise
+        self.health.breaker.record(True)
+        return response
+
+    async def _retrying(self, request: Callable[[], Awaitable[T]]) -> T:
+        # Async tokenizers leave rate limits to their AsyncRateLimiter, which
+        # has already retried them by the time they get here.
+        attempt = 0
+        while True:
+            try:
+                return await request()
+            except Exception as e:
+                delay = self._retry_delay(attempt)
+                if delay is None or not is_transient(e) or is_rate_limited(e):
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _timed(self, request: Callable[[], Awaitable[T]]) -> T:
+        start = time.perf_counter()
+        result = await request()
+        self.health.latencies.add(time.perf_counter() - start)
+        return result
+
+    async def attempt(
+        self,
+        request: Callable[[], Awaitable[T]],
+        limiter: AsyncRateLimiter | None = None,
+    ) -> T:
+        hedge = self._hedge_delay()
+        if hedge is None:
+            return await asyncio.wait_for(self._timed(request), self.policy.timeout)
+        return await asyncio.wait_for(
+            self._hedged(request, hedge, limiter), self.policy.timeout
+        )
+
+    async def _hedged(
+        self,
+        request: Callable[[], Awaitable[T]],
+        hedge: float,
+        limiter: AsyncRateLimiter | None,
+    ) -> T:
+        tasks = [asyncio.ensure_future(self._timed(request))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge)
+            # A hedge only goes out if the limiter has a slot free right now.
+            if not done and (limiter is None or limiter.try_reserve()):
+                tasks.append(asyncio.ensure_future(self._timed(request)))
+            error = None
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    return await next_done
+                except Exception as e:
+                    error = e
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -1,57 +1,245 @@
+import importlib
+import threading
+from functools import partial
+
 from .providers.base import AsyncProvider, Provider
-from .providers.anthropic_ai import AsyncAnthropicProvider, AnthropicProvider
-from .providers.google_ai import AsyncGoogleProvider, GoogleProvider
-from .providers.openai import OpenAIProvider
-from .providers.xai import AsyncXaiProvider, XaiProvider
 from .tokenizers.base import AsyncTokenizer, Tokenizer
-from .tokenizers.anthropic_ai import AsyncAnthropicTokenizer, AnthropicTokenizer
-from .tokenizers.google_ai import AsyncGoogleAITokenizer, GoogleAITokenizer
-from .tokenizers.openai import OpenAITokenizer
-from .tokenizers.xai import AsyncXaiTokenizer, XaiTokenizer
-from .model import Mode, ProviderName
+from .clients import ClientOptions, clients
+from .limits import RateLimit, limiters
+from .resilience import Resilience, health
+from .tokenizers.batcher import MicroBatch
+from .tokenizers.flight import SingleFlight
+from .model import Accuracy, Mode, ProviderName
+
+
+class _LazyClass:
+    # Defers importing a provider's SDK until that provider is first used.
+    def __init__(self, module: str, name: str, extra: str | None = None):
+        self.module = module
+        self.name = name
+        self.extra = extra
+        self._cls: type | None = None
+
+    def load(self) -> type:
+        if self._cls is None:
+            try:
+                module = importlib.import_module(self.module, __package__)
+            except ModuleNotFoundError as e:
+                if self.extra is None:
+                    raise
+                raise ImportError(
+                    f'{self.name} requires extra dependencies: '
+                    f'pip install "tokemon[{self.extra}]"'
+                ) from e
+            self._cls = getattr(module, self.name)
+        return self._cls
+
+    def __call__(self, **kwargs):
+        return self.load()(**kwargs)
+
+
+_OPENAI = ProviderName.OPENAI.value
+_ANTHROPIC = ProviderName.ANTHROPIC.value
+_GOOGLE = ProviderName.GOOGLE.value
+_XAI = ProviderName.XAI.value
+
+_TOKENIZERS: dict[str, _LazyClass] = {
+    _OPENAI: _LazyClass('.tokenizers.openai', 'OpenAITokenizer'),
+    f'async-{_OPENAI}': _LazyClass('.tokenizers.openai', 'AsyncOpenAITokenizer'),
+    _ANTHROPIC: _LazyClass(
+        '.tokenizers.anthropic_ai', 'AnthropicTokenizer', _ANTHROPIC
+    ),
+    f'async-{_ANTHROPIC}': _LazyClass(
+        '.tokenizers.anthropic_ai', 'AsyncAnthropicTokenizer', _ANTHROPIC
+    ),
+    _XAI: _LazyClass('.tokenizers.xai', 'XaiTokenizer', _XAI),
+    f'async-{_XAI}': _LazyClass('.tokenizers.xai', 'AsyncXaiTokenizer', _XAI),
+    _GOOGLE: _LazyClass('.tokenizers.google_ai', 'GoogleAITokenizer', _GOOGLE),
+    f'async-{_GOOGLE}': _LazyClass(
+        '.tokenizers.google_ai', 'AsyncGoogleAITokenizer', _GOOGLE
+    ),
+}
+
+_PROVIDERS: dict[str, _LazyClass] = {
+    _OPENAI: _LazyClass('.providers.openai', 'OpenAIProvider'),
+    f'async-{_OPENAI}': _LazyClass('.providers.openai', 'AsyncOpenAIProvider'),
+    _ANTHROPIC: _LazyClass(
+        '.providers.anthropic_ai', 'AnthropicProvider', _ANTHROPIC
+    ),
+    f'async-{_ANTHROPIC}': _LazyClass(
+        '.providers.anthropic_ai', 'AsyncAnthropicProvider', _ANTHROPIC
+    ),
+    _XAI: _LazyClass('.providers.xai', 'XaiProvider', _XAI),
+    f'async-{_XAI}': _LazyClass('.providers.xai', 'AsyncXaiProvider', _XAI),
+    _GOOGLE: _LazyClass('.providers.google_ai', 'GoogleProvider', _GOOGLE),
+    f'async-{_GOOGLE}': _LazyClass(
+        '.providers.google_ai', 'AsyncGoogleProvider', _GOOGLE
+    ),
+}
+
+_ESTIMATORS: dict[str, _LazyClass] = {
+    Mode.SYNC: _LazyClass('.tokenizers.estimate', 'EstimateTokenizer'),
+    Mode.ASYNC: _LazyClass('.tokenizers.estimate', 'AsyncEstimateTokenizer'),
+}
+
+_instances: dict[tuple, AsyncTokenizer | Tokenizer] = {}
+_instances_lock = threading.Lock()
+# Tokenizers are built outside _instances_lock, so a slow first SDK import
+# or client set-up only holds up callers asking for the same instance.
+_builds: SingleFlight[AsyncTokenizer | Tokenizer] = SingleFlight()
+
+
+def _dispatch_key(provider: str, mode: str) -> str:
+    if mode == Mode.ASYNC:
+        return f'async-{provider}'
+    return provider
+
+
+# Which tokenizers take each optional setting. OpenAI counts locally, so it
+# takes none of them.
+_REMOTE = frozenset({_ANTHROPIC, _GOOGLE, _XAI})
+_ASYNC_REMOTE = frozenset(f'async-{provider}' for provider in _REMOTE)
+_OPTION_SUPPORT: dict[str, frozenset[str]] = {
+    'rate_limit': _ASYNC_REMOTE,
+    'resilience': _REMOTE | _ASYNC_REMOTE,
+    'micro_batch': frozenset({f'async-{_GOOGLE}'}),
+    'additive_counts': _REMOTE | _ASYNC_REMOTE,
+}
+
+
+def _remote_kwargs(dispatch_key: str, **options) -> dict:
+    kwargs: dict = {}
+    for name, value in options.items():
+        if value is None:
+            continue
+        if dispatch_key not in _OPTION_SUPPORT[name]:
+            raise ValueError(f'{name} is not supported for {dispatch_key}')
+        kwargs[name] = value
+    return kwargs
+
+
+def _client_kwargs(client: object, client_options: ClientOptions | None) -> dict:
+    kwargs: dict = {}
+    if client is not None:
+        kwargs['client'] = client
+    if client_options is not None:
+        kwargs['client_options'] = client_options
+    return kwargs
+
+
+def _build(
+    model: str,
+    provider: str,
+    mode: str,
+    accuracy: str,
+    kwargs: dict,
+) -> AsyncTokenizer | Tokenizer:
+    def exact() -> AsyncTokenizer | Tokenizer:
+        return _TOKENIZERS[_dispatch_key(provider, mode)](model=model, **kwargs)
+
+    if accuracy != Accuracy.ESTIMATE:
+        return exact()
+    estimator = _ESTIMATORS[Mode.ASYNC if mode == Mode.ASYNC else Mode.SYNC]
+    return estimator(model=model, provider=provider, exact=exact)
 
 
 def tokemon(
     model: str,
     provider: str,
     mode: str = Mode.SYNC,
+    client: object = None,
+    client_options: ClientOptions | None = None,
+    accuracy: str = Accuracy.EXACT,
+    rate_limit: RateLimit | None = None,
+    resilience: Resilience | None = None,
+    micro_batch: MicroBatch | None = None,
+    additive_counts: bool | None = None,
 ) -> AsyncTokenizer | Tokenizer:
-    if mode == Mode.ASYNC:
-        provider = f"async-{provider}"
+    dispatch_key = _dispatch_key(provider, mode)
+    if dispatch_key not in _TOKENIZERS:
+        raise ValueError(f"Unsupported provider: {dispatch_key}")
+    remote = _remote_kwargs(
+        dispatch_key,
+        rate_limit=rate_limit,
+        resilience=resilience,
+        micro_batch=micro_batch,
+        additive_counts=additive_counts,
+    )
+
+    key = (
+        dispatch_key,
+        model, client, client_options, accuracy, rate_limit, resilience, micro_batch,
+        additive_counts,
+    )
+    with _instances_lock:
+        tokenizer = _instances.get(key)
+    if tokenizer is not None:
+        return tokenizer
+    kwargs = _client_kwargs(client, client_options) | remote
+    build = partial(_build_instance, key, model, provider, mode, accuracy, kwargs)
+    return _builds.do(key, build)
+
+
+def _build_instance(
+    key: tuple,
+    model: str,
+    provider: str,
+    mode: str,
+    accuracy: str,
+    kwargs: dict,
+) -> AsyncTokenizer | Tokenizer:
+    tokenizer = _build(model, provider, mode, accuracy, kwargs)
+    with _instances_lock:
+        # A caller that missed the cache just as another build finished may
+        # build again; the first stored instance wins.
+        return _instances.setdefault(key, tokenizer)
+
+
+def tokemon_evict(
+    model: str,
+    provider: str,
+    mode: str = Mode.SYNC,
+    client: object = None,
+    client_options: ClientOptions | None = None,
+    accuracy: str = Accuracy.EXACT,
+    rate_limit: RateLimit | None = None,
+    resilience: Resilience | None = None,
+    micro_batch: MicroBatch | None = None,
+    additive_counts: bool | None = None,
+) -> None:
+    key = (
+        _dispatch_key(provider, mode),
+        model, client, client_options, accuracy, rate_limit, resilience, micro_batch,
+        additive_counts,
+    )
+    with _instances_lock:
+        _instances.pop(key, None)
 
-    tokenizers: dict[str, type[AsyncTokenizer | Tokenizer]] = {
-        ProviderName.OPENAI.value: OpenAITokenizer,
-        ProviderName.ANTHROPIC.value: AnthropicTokenizer,
-        f"async-{ProviderName.ANTHROPIC.value}": AsyncAnthropicTokenizer,
-        ProviderName.XAI.value: XaiTokenizer,
-        f"async-{ProviderName.XAI.value}": AsyncXaiTokenizer,
-        ProviderName.GOOGLE.value: GoogleAITokenizer,
-        f"async-{ProviderName.GOOGLE.value}": AsyncGoogleAITokenizer,
-    }
 
-    if provider not in tokenizers:
-        raise ValueError(f"Unsupported provider: {provider}")
+def tokemon_close() -> None:
+    with _instances_lock:
+        _instances.clear()
+    limiters.clear()
+    health.clear()
+    clients.close()
 
-    return tokenizers[provider](model=model)
+
+async def tokemon_aclose() -> None:
+    with _instances_lock:
+        _instances.clear()
+    limiters.clear()
+    health.clear()
+    await clients.aclose()
 
 
 def tokemon_models(
     provider: str,
     mode: str = Mode.SYNC,
+    client: object = None,
+    client_options: ClientOptions | None = None,
 ) -> AsyncProvider | Provider:
-    if mode == Mode.ASYNC:
-        provider = f'async-{provider}'
-
-    models: dict[str, type] = {
-        ProviderName.OPENAI.value: OpenAIProvider,
-        ProviderName.ANTHROPIC.value: AnthropicProvider,
-        f'async-{ProviderName.ANTHROPIC.value}': AsyncAnthropicProvider,
-        ProviderName.XAI.value: XaiProvider,
-        f'async-{ProviderName.XAI.value}': AsyncXaiProvider,
-        ProviderName.GOOGLE.value: GoogleProvider,
-        f'async-{ProviderName.GOOGLE.value}': AsyncGoogleProvider,
-    }
-    if provider not in models:
+    provider = _dispatch_key(provider, mode)
+    if provider not in _PROVIDERS:
         raise ValueError(f'Unsupported provider: {provider}')
 
-    return models[provider]()
+    return _PROVIDERS[provider](**_client_kwargs(client, client_options))
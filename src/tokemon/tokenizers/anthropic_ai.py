@@ -1,25 +1,89 @@
+from collections.abc import Iterable
+from functools import partial
+
 from anthropic import Anthropic, AsyncAnthropic
 
 from .base import AsyncTokenizer, Tokenizer
-from ..providers.anthropic_ai import AnthropicProvider, AsyncAnthropicProvider
+from .flight import AsyncSingleFlight, SingleFlight
+from .messages import Message, split_system
+from ..clients import ClientOptions, clients
+from ..limits import RateLimit, provider_limiter
+from ..resilience import AsyncGuard, Guard, Resilience
+from ..providers.anthropic_ai import (
+    AnthropicProvider,
+    AsyncAnthropicProvider,
+    anthropic_client,
+    async_anthropic_client,
+)
 from ..model import ProviderName, TokenizerResponse
 
 
+def _count_request(
+    model: str,
+    messages: Iterable[Message],
+    system: str | None,
+    tools: list[dict] | None,
+) -> dict:
+    conversation, prompt = split_system(messages, system)
+    request = {'model': model, 'messages': conversation}
+    if prompt is not None:
+        request['system'] = prompt
+    if tools:
+        request['tools'] = tools
+    return request
+
+
 class AnthropicTokenizer(Tokenizer):
-    def __init__(self, model: str):
+    def __init__(
+        self,
+        model: str,
+        client: Anthropic | None = None,
+        client_options: ClientOptions | None = None,
+        resilience: Resilience | None = None,
+        additive_counts: bool = False,
+    ):
         super().__init__(model)
-        self.client = Anthropic()
-        self.provider = AnthropicProvider()
+        self.additive_counts = additive_counts
+        if client is None:
+            client = clients.get(anthropic_client, client_options)
+        self.client = client
+        self.provider = AnthropicProvider(client=client, client_options=client_options)
+        self.guard = Guard(
+            model, ProviderName.ANTHROPIC.value, client_options, resilience
+        )
+        self._flights: SingleFlight[TokenizerResponse] = SingleFlight()
 
     def count_tokens(self, text: str) -> TokenizerResponse:
-        if self.model not in self.provider.models():
-            raise ValueError(f'Unsupported model: {self.model}')
-        count = self.client.messages.count_tokens(
-            model=self.model,
-            messages=[
-                {'role': 'user', 'content': text},
-            ],
+        self._check_model()
+        return self._flights.do(text, partial(self._count_text, text))
+
+    def _count_text(self, text: str) -> TokenizerResponse:
+        return self.guard.call(
+            partial(
+                self._count,
+                model=self.model,
+                messages=[
+                    {'role': 'user', 'content': text},
+                ],
+            ),
+            partial(self.guard.estimate, text),
+        )
+
+    def count_messages(
+        self,
+        messages: Iterable[Message],
+        system: str | None = None,
+        tools: list[dict] | None = None,
+    ) -> TokenizerResponse:
+        self._check_model()
+        messages = list(messages)
+        return self.guard.call(
+            partial(self._count, **_count_request(self.model, messages, system, tools)),
+            partial(self.guard.estimate_messages, messages, system, tools),
         )
+
+    def _count(self, **request) -> TokenizerResponse:
+        count = self.client.messages.count_tokens(**request)
         return TokenizerResponse(
             input_tokens=count.input_tokens,
             model=self.model,
@@ -28,20 +92,64 @@ class AnthropicTokenizer(Tokenizer):
 
 
 class AsyncAnthropicTokenizer(AsyncTokenizer):
-    def __init__(self, model: str):
+    def __init__(
+        self,
+        model: str,
+        client: AsyncAnthropic | None = None,
+        client_options: ClientOptions | None = None,
+        rate_limit: RateLimit | None = None,
+        resilience: Resilience | None = None,
+        additive_counts: bool = False,
+    ):
         super().__init__(model)
-        self.client = AsyncAnthropic()
-        self.provider = AsyncAnthropicProvider()
+        self.additive_counts = additive_counts
+        if client is None:
+            client = clients.get(async_anthropic_client, client_options)
+        self.client = client
+        self.provider = AsyncAnthropicProvider(
+            client=client, client_options=client_options
+        )
+        self.limiter = provider_limiter(
+            ProviderName.ANTHROPIC.value, client_options, rate_limit
+        )
+        self.guard = AsyncGuard(
+            model, ProviderName.ANTHROPIC.value, client_options, resilience
+        )
+        self._flights: AsyncSingleFlight[TokenizerResponse] = AsyncSingleFlight()
 
     async def count_tokens(self, text: str) -> TokenizerResponse:
-        if self.model not in await self.provider.models():
-            raise ValueError(f'Unsupported model: {self.model}')
-        count = await self.client.messages.count_tokens(
-            model=self.model,
-            messages=[
-                {'role': 'user', 'content': text},
-            ],
+        await self._check_model()
+        return await self._flights.do(text, partial(self._count_text, text))
+
+    async def _count_text(self, text: str) -> TokenizerResponse:
+        return await self.guard.call(
+            partial(
+                self._count,
+                model=self.model,
+                messages=[
+                    {'role': 'user', 'content': text},
+                ],
+            ),
+            partial(self.guard.estimate, text),
+            self.limiter,
+        )
+
+    async def count_messages(
+        self,
+        messages: Iterable[Message],
+        system: str | None = None,
+        tools: list[dict] | None = None,
+    ) -> TokenizerResponse:
+        await self._check_model()
+        messages = list(messages)
+        return await self.guard.call(
+            partial(self._count, **_count_request(self.model, messages, system, tools)),
+            partial(self.guard.estimate_messages, messages, system, tools),
+            self.limiter,
         )
+
+    async def _count(self, **request) -> TokenizerResponse:
+        count = await self.client.messages.count_tokens(**request)
         return TokenizerResponse(
             input_tokens=count.input_tokens,
             model=self.model,
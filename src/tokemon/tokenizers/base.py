@@ -1,21 +1,355 @@
 import abc
+import asyncio
+import os
+from collections.abc import AsyncIterator, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from itertools import islice
 
-from ..model import TokenizerResponse
+from .files import DEFAULT_SEGMENT_SIZE, map_file, segment_ranges
+from .messages import Message, render
+from .prefix import OVERHEAD_PROBE, PrefixCache, split_prefix
+
+from .stream import (
+    DEFAULT_BUFFER_SIZE,
+    AsyncTextStream,
+    Segmenter,
+    TextStream,
+    accumulate,
+    aiter_records,
+    as_text,
+    iter_records,
+)
+from ..model import Accuracy, BatchResponse, TokenizerResponse
+from ..providers.base import AsyncProvider, Provider
+from ..providers.index import ModelIndex
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+def check_concurrency(max_concurrency: int) -> None:
+    if max_concurrency < 1:
+        raise ValueError(f'max_concurrency must be at least 1, got {max_concurrency}')
+
+
+def _probe_overhead(
+    tokenizer: 'Tokenizer | AsyncTokenizer', responses: list[TokenizerResponse]
+) -> int:
+    a, b, both = (response.input_tokens for response in responses)
+    overhead = max(a + b - both, 0)
+    # An overhead worked out from fallback estimates is used once, not kept.
+    if all(response.error_bound is None for response in responses):
+        tokenizer.request_overhead = overhead
+    return overhead
+
+
+def _add_prefix(
+    response: TokenizerResponse, base: int, bound: int | None
+) -> TokenizerResponse:
+    if bound is not None:
+        bound += response.error_bound or 0
+    else:
+        bound = response.error_bound
+    return replace(
+        response, input_tokens=response.input_tokens + base, error_bound=bound
+    )
 
 
 class Tokenizer(abc.ABC):
+    provider: Provider
+    accuracy: str = Accuracy.EXACT
+    # Whether counts add up across a safe split point, less a fixed
+    # per-request overhead (probed on first use when None); see
+    # count_with_prefix().
+    additive_counts: bool = False
+    request_overhead: int | None = None
+
     def __init__(self, model: str):
         self.model = model
+        self._checked_index: ModelIndex | None = None
+        self._prefixes = PrefixCache()
+
+    @property
+    def provider_name(self) -> str:
+        return self.provider.name
+
+    def _check_model(self) -> None:
+        # Only re-validate when the provider hands back a new model list.
+        index = self.provider.model_index()
+        if index is self._checked_index:
+            return
+        if self.model not in index:
+            raise ValueError(f'Unsupported model: {self.model}')
+        self._checked_index = index
 
     @abc.abstractmethod
     def count_tokens(self, text: str) -> TokenizerResponse:
         pass
 
+    def count_messages(
+        self,
+        messages: Iterable[Message],
+        system: str | None = None,
+        tools: list[dict] | None = None,
+    ) -> TokenizerResponse:
+        # Without a chat-aware endpoint the whole conversation is counted as
+        # one rendered text, in a single request.
+        return self.count_tokens(render(messages, system, tools))
+
+    def _message_tokens(self, message: Message) -> int:
+        # Per-message and fixed costs for ConversationCounter. Only additive,
+        # and so exact, where a subclass overrides them. Every count carries
+        # the per-request overhead, which belongs in the fixed cost once.
+        count = self.count_tokens(render([message])).input_tokens
+        return max(count - self._request_overhead(), 0)
+
+    def _overhead_tokens(self, system: str | None, tools: list[dict] | None) -> int:
+        if system is None and not tools:
+            return self._request_overhead()
+        return self.count_tokens(render([], system, tools)).input_tokens
+
+    def count_tokens_batch(
+        self,
+        texts: list[str],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> BatchResponse:
+        check_concurrency(max_concurrency)
+        if not texts:
+            return BatchResponse.from_responses([], self.model, self.provider_name)
+        workers = min(max_concurrency, len(texts))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            responses = executor.map(self.count_tokens, texts)
+            return BatchResponse.from_responses(
+                responses, self.model, self.provider_name
+            )
+
+    def count_with_prefix(self, prefix: str, suffix: str) -> TokenizerResponse:
+        # The prefix head is counted once and cached; each call only counts
+        # the tail of the prefix plus the suffix.
+        head, tail = split_prefix(prefix)
+        if not self.additive_counts or not head:
+            return self.count_tokens(prefix + suffix)
+        base, bound = self._prefixes.get(head), None
+        if base is None:
+            response = self.count_tokens(head)
+            base = response.input_tokens - self._request_overhead()
+            bound = response.error_bound
+            if bound is None:  # estimates are never cached
+                self._prefixes.put(head, base)
+        response = self.count_tokens(tail + suffix)
+        return _add_prefix(response, base, bound)
+
+    def _request_overhead(self) -> int:
+        if self.request_overhead is None:
+            responses = [self.count_tokens(text) for text in OVERHEAD_PROBE]
+            return _probe_overhead(self, responses)
+        return self.request_overhead
+
+    def count_file(
+        self,
+        path: str | os.PathLike,
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> TokenizerResponse:
+        # Segments are decoded straight from the mapping, max_concurrency at
+        # a time, so only those segments are ever held as strings.
+        check_concurrency(max_concurrency)
+        total = None
+        with map_file(path) as buffer, memoryview(buffer) as view:
+            ranges = segment_ranges(buffer, segment_size)
+            while batch := list(islice(ranges, max_concurrency)):
+                texts = [str(view[start:end], 'utf-8') for start, end in batch]
+                for response in self.count_tokens_batch(texts, max_concurrency):
+                    total = self._add_segment(total, response)
+        return total if total is not None else self.count_tokens('')
+
+    def count_tokens_stream(
+        self,
+        stream: TextStream,
+        per_record: bool = False,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+    ) -> Iterator[TokenizerResponse]:
+        # Yields the running total of the concatenated stream, or with
+        # per_record one count per item (per line for file objects).
+        if per_record:
+            for record in stream:
+                yield self._count_segments([as_text(record)], buffer_size)
+            return
+        total = None
+        chunks = iter_records(stream, buffer_size)
+        for total in self._running_totals(chunks, buffer_size):
+            yield total
+        if total is None:
+            yield self.count_tokens('')
+
+    def _running_totals(
+        self, chunks: Iterable[str], buffer_size: int
+    ) -> Iterator[TokenizerResponse]:
+        segmenter = Segmenter(buffer_size)
+        total = None
+        for chunk in chunks:
+            for segment in segmenter.feed(chunk):
+                total = self._add_segment(total, self.count_tokens(segment))
+                yield total
+        for segment in segmenter.flush():
+            yield self._add_segment(total, self.count_tokens(segment))
+
+    def _add_segment(
+        self, total: TokenizerResponse | None, response: TokenizerResponse
+    ) -> TokenizerResponse:
+        # Every segment is its own request, so each one after the first
+        # drops the per-request overhead and chunking leaves the sum as is.
+        if total is None:
+            return response
+        return accumulate(total, response, self._request_overhead())
+
+    def _count_segments(
+        self, chunks: Iterable[str], buffer_size: int
+    ) -> TokenizerResponse:
+        total = None
+        for total in self._running_totals(chunks, buffer_size):
+            pass
+        return total if total is not None else self.count_tokens('')
+
 
 class AsyncTokenizer(abc.ABC):
+    provider: AsyncProvider
+    accuracy: str = Accuracy.EXACT
+    # Whether one remote request can count many texts separately; see
+    # MicroBatcher.
+    supports_batch_counting: bool = False
+    additive_counts: bool = False
+    request_overhead: int | None = None
+
     def __init__(self, model: str):
         self.model = model
+        self._checked_index: ModelIndex | None = None
+        self._prefixes = PrefixCache()
+
+    @property
+    def provider_name(self) -> str:
+        return self.provider.name
+
+    async def _check_model(self) -> None:
+        index = await self.provider.model_index()
+        if index is self._checked_index:
+            return
+        if self.model not in index:
+            raise ValueError(f'Unsupported model: {self.model}')
+        self._checked_index = index
 
     @abc.abstractmethod
     async def count_tokens(self, text: str) -> TokenizerResponse:
         pass
+
+    async def count_messages(
+        self,
+        messages: Iterable[Message],
+        system: str | None = None,
+        tools: list[dict] | None = None,
+    ) -> TokenizerResponse:
+        return await self.count_tokens(render(messages, system, tools))
+
+    async def _message_tokens(self, message: Message) -> int:
+        response, overhead = await asyncio.gather(
+            self.count_tokens(render([message])), self._request_overhead()
+        )
+        return max(response.input_tokens - overhead, 0)
+
+    async def _overhead_tokens(
+        self, system: str | None, tools: list[dict] | None
+    ) -> int:
+        if system is None and not tools:
+            return await self._request_overhead()
+        return (await self.count_tokens(render([], system, tools))).input_tokens
+
+    async def count_tokens_batch(
+        self,
+        texts: list[str],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> BatchResponse:
+        check_concurrency(max_concurrency)
+        results: list[TokenizerResponse | None] = [None] * len(texts)
+        pending = iter(enumerate(texts))
+
+        async def worker() -> None:
+            for i, text in pending:
+                results[i] = await self.count_tokens(text)
+
+        workers = min(max_concurrency, len(texts))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        return BatchResponse.from_responses(results, self.model, self.provider_name)
+
+    async def count_with_prefix(self, prefix: str, suffix: str) -> TokenizerResponse:
+        head, tail = split_prefix(prefix)
+        if not self.additive_counts or not head:
+            return await self.count_tokens(prefix + suffix)
+        base, bound = self._prefixes.get(head), None
+        if base is None:
+            response, overhead = await asyncio.gather(
+                self.count_tokens(head), self._request_overhead()
+            )
+            base, bound = response.input_tokens - overhead, response.error_bound
+            if bound is None:
+                self._prefixes.put(head, base)
+        response = await self.count_tokens(tail + suffix)
+        return _add_prefix(response, base, bound)
+
+    async def _request_overhead(self) -> int:
+        if self.request_overhead is None:
+            responses = await asyncio.gather(*map(self.count_tokens, OVERHEAD_PROBE))
+            return _probe_overhead(self, responses)
+        return self.request_overhead
+
+    async def count_tokens_stream(
+        self,
+        stream: AsyncTextStream,
+        per_record: bool = False,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+    ) -> AsyncIterator[TokenizerResponse]:
+        if per_record:
+            async for record in _aiter(stream):
+                yield await self._count_segments([as_text(record)], buffer_size)
+            return
+        total = None
+        chunks = aiter_records(stream, buffer_size)
+        async for total in self._running_totals(chunks, buffer_size):
+            yield total
+        if total is None:
+            yield await self.count_tokens('')
+
+    async def _running_totals(
+        self, chunks: AsyncIterator[str], buffer_size: int
+    ) -> AsyncIterator[TokenizerResponse]:
+        segmenter = Segmenter(buffer_size)
+        total = None
+        async for chunk in chunks:
+            for segment in segmenter.feed(chunk):
+                total = await self._add_segment(total, await self.count_tokens(segment))
+                yield total
+        for segment in segmenter.flush():
+            yield await self._add_segment(total, await self.count_tokens(segment))
+
+    async def _add_segment(
+        self, total: TokenizerResponse | None, response: TokenizerResponse
+    ) -> TokenizerResponse:
+        if total is None:
+            return response
+        return accumulate(total, response, await self._request_overhead())
+
+    async def _count_segments(
+        self, chunks: Iterable[str], buffer_size: int
+    ) -> TokenizerResponse:
+        total = None
+        async for total in self._running_totals(_aiter(chunks), buffer_size):
+            pass
+        return total if total is not None else await self.count_tokens('')
+
+
+async def _aiter(stream: AsyncTextStream) -> AsyncIterator:
+    if hasattr(stream, '__aiter__'):
+        async for item in stream:
+            yield item
+    else:
+        for item in stream:
+            yield item
@@ -0,0 +1,69 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_LATENCY = 0.003
+
+
+@dataclass(frozen=True)
+class MicroBatch:
+    max_batch_size: int = DEFAULT_MAX_BATCH_SIZE
+    max_latency: float = DEFAULT_MAX_LATENCY
+
+
+class MicroBatcher:
+    # Holds texts for up to `max_latency` seconds, or until `max_batch_size`
+    # are waiting, then counts them with one `send` call that returns a count
+    # per text. Batches never mix event loops.
+    def __init__(
+        self,
+        send: Callable[[list[str]], Awaitable[list[int]]],
+        options: MicroBatch | None = None,
+    ):
+        self._send = send
+        self.options = options or MicroBatch()
+        self._pending: dict[asyncio.AbstractEventLoop, list] = {}
+        self._timers: dict[asyncio.AbstractEventLoop, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, text: str) -> int:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(loop, [])
+        batch.append((text, future))
+        if len(batch) >= self.options.max_batch_size:
+            self._flush(loop)
+        elif len(batch) == 1:
+            self._timers[loop] = loop.call_later(
+                self.options.max_latency, self._flush, loop
+            )
+        return await future
+
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        timer = self._timers.pop(loop, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(loop, None)
+        if batch:
+            task = loop.create_task(self._send_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send_batch(self, batch: list) -> None:
+        live = [(text, future) for text, future in batch if not future.done()]
+        if not live:
+            return
+        try:
+            counts = await self._send([text for text, _ in live])
+            if len(counts) != len(live):
+                raise ValueError(f'Expected {len(live)} counts, got {len(counts)}')
+        except Exception as e:
+            counts = [e] * len(live)
+        for (_, future), count in zip(live, counts):
+            if future.done():
+                continue
+            if isinstance(count, Exception):
+                future.set_exception(count)
+            else:
+                future.set_result(count)
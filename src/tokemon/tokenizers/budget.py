@@ -0,0 +1,56 @@
+from collections.abc import Sequence
+from itertools import accumulate
+
+import tiktoken
+
+
+def _check_chunking(size: int, overlap: int) -> None:
+    if size <= 0:
+        raise ValueError(f'Chunk size must be positive: {size}')
+    if not 0 <= overlap < size:
+        raise ValueError(f'Overlap must be in [0, {size}): {overlap}')
+
+
+def _char_start(data: bytes, k: int) -> int:
+    # Move a token boundary that falls inside a UTF-8 character to its start.
+    while 0 < k < len(data) and data[k] & 0xC0 == 0x80:
+        k -= 1
+    return k
+
+
+def truncate_tokens(
+    encoding: tiktoken.Encoding, tokens: Sequence[int], text: str, max_tokens: int
+) -> str:
+    if max_tokens < 0:
+        raise ValueError(f'max_tokens must not be negative: {max_tokens}')
+    if len(tokens) <= max_tokens:
+        return text
+    prefix = b''.join(encoding.decode_tokens_bytes(tokens[:max_tokens]))
+    return prefix.decode('utf-8', 'ignore')  # drops a trailing partial character
+
+
+def chunk_tokens(
+    encoding: tiktoken.Encoding, tokens: Sequence[int], size: int, overlap: int = 0
+) -> list[str]:
+    _check_chunking(size, overlap)
+    pieces = encoding.decode_tokens_bytes(tokens)
+    data = b''.join(pieces)
+    bounds = [0, *accumulate(map(len, pieces))]
+    chunks = []
+    for start in range(0, len(tokens), size - overlap):
+        end = min(start + size, len(tokens))
+        begin, stop = _char_start(data, bounds[start]), _char_start(data, bounds[end])
+        chunks.append(data[begin:stop].decode('utf-8'))
+        if end == len(tokens):
+            break
+    return chunks
+
+
+def truncate_text(encoding: tiktoken.Encoding, text: str, max_tokens: int) -> str:
+    return truncate_tokens(encoding, encoding.encode(text), text, max_tokens)
+
+
+def chunk_text(
+    encoding: tiktoken.Encoding, text: str, size: int, overlap: int = 0
+) -> list[str]:
+    return chunk_tokens(encoding, encoding.encode(text), size, overlap)
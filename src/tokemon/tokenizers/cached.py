@@ -0,0 +1,99 @@
+from concurrent.futures import Executor
+
+from .base import DEFAULT_MAX_CONCURRENCY, AsyncTokenizer, Tokenizer
+from ..cache import CacheKey, TokenCountCache, cache_key
+from ..model import BatchResponse, TokenizerResponse
+
+
+def _cacheable(response: TokenizerResponse) -> bool:
+    # Estimates (e.g. a fallback while a provider's breaker is open) carry an
+    # error bound and are never stored as if they were exact counts.
+    return response.input_tokens is not None and response.error_bound is None
+
+
+class _CachedCounts:
+    model: str
+    tokenizer: Tokenizer | AsyncTokenizer
+
+    @property
+    def provider(self):
+        return self.tokenizer.provider
+
+    @property
+    def provider_name(self) -> str:
+        return self.tokenizer.provider_name
+
+    @property
+    def accuracy(self) -> str:
+        return self.tokenizer.accuracy
+
+    def _key(self, text: str) -> CacheKey:
+        return cache_key(self.provider_name, self.model, text)
+
+    def _response(self, tokens: int) -> TokenizerResponse:
+        return TokenizerResponse(
+            input_tokens=tokens,
+            model=self.model,
+            provider=self.provider_name,
+        )
+
+
+class CachedTokenizer(_CachedCounts, Tokenizer):
+    def __init__(self, tokenizer: Tokenizer, cache: TokenCountCache | None = None):
+        super().__init__(tokenizer.model)
+        self.tokenizer = tokenizer
+        self.cache = cache if cache is not None else TokenCountCache()
+
+    def count_tokens(self, text: str) -> TokenizerResponse:
+        key = self._key(text)
+        tokens = self.cache.get(key)
+        if tokens is not None:
+            return self._response(tokens)
+        response = self.tokenizer.count_tokens(text)
+        if _cacheable(response):
+            self.cache.set(key, response.input_tokens)
+        return response
+
+    def count_tokens_batch(
+        self,
+        texts: list[str],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> BatchResponse:
+        keys = [self._key(text) for text in texts]
+        results = [self.cache.get(key) for key in keys]
+        misses = [i for i, tokens in enumerate(results) if tokens is None]
+        counted = self.tokenizer.count_tokens_batch(
+            [texts[i] for i in misses], max_concurrency=max_concurrency
+        )
+        responses = [None if tokens is None else self._response(tokens)
+                     for tokens in results]
+        for i, response in zip(misses, counted):
+            if _cacheable(response):
+                self.cache.set(keys[i], response.input_tokens)
+            responses[i] = response
+        return BatchResponse.from_responses(responses, self.model, self.provider_name)
+
+
+class AsyncCachedTokenizer(_CachedCounts, AsyncTokenizer):
+    # Persistent store reads and writes run on `executor` (the loop's default
+    # executor when None) so a SQLite lookup never blocks the event loop.
+    def __init__(
+        self,
+        tokenizer: AsyncTokenizer,
+        cache: TokenCountCache | None = None,
+        executor: Executor | None = None,
+    ):
+        super().__init__(tokenizer.model)
+        self.tokenizer = tokenizer
+        self.cache = cache if cache is not None else TokenCountCache()
+        self.executor = executor
+
+    async def count_tokens(self, text: str) -> TokenizerResponse:
+        key = self._key(text)
+        tokens = await self.cache.aget(key, self.executor)
+        if tokens is not None:
+            return self._response(tokens)
+        response = await self.tokenizer.count_tokens(text)
+        if _cacheable(response):
+            await self.cache.aset(key, response.input_tokens, self.executor)
+        return response
@@ -0,0 +1,153 @@
+import hashlib
+import json
+from collections.abc import Iterable
+
+from .base import AsyncTokenizer, Tokenizer
+from .messages import Message
+
+
+def _message_key(message: Message) -> bytes:
+    data = json.dumps(message, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class _Conversation:
+    # Per-message counts plus a running total. Exact for OpenAI, where chat
+    # counts are additive; with remote providers each message is counted on
+    # its own, so the total approximates count_messages().
+    def __init__(self, system: str | None, tools: list[dict] | None):
+        self.system = system
+        self.tools = tools
+        self.overhead = 0
+        self._messages: list[Message] = []
+        self._counts: list[int] = []
+        self._sum = 0
+        self._memo: dict[bytes, int] = {}
+
+    @property
+    def messages(self) -> list[Message]:
+        return list(self._messages)
+
+    @property
+    def total(self) -> int:
+        return self.overhead + self._sum
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def _cached(self, message: Message) -> tuple[bytes, int | None]:
+        key = _message_key(message)
+        return key, self._memo.get(key)
+
+    def _put(self, index: int, message: Message, count: int) -> None:
+        if index == len(self._messages):
+            self._messages.append(dict(message))
+            self._counts.append(count)
+        else:
+            self._sum -= self._counts[index]
+            self._messages[index] = dict(message)
+            self._counts[index] = count
+        self._sum += count
+
+    def __delitem__(self, index: int | slice) -> None:
+        removed = self._counts[index]
+        self._sum -= sum(removed) if isinstance(index, slice) else removed
+        del self._messages[index]
+        del self._counts[index]
+
+    def truncate(self, length: int) -> None:
+        del self[length:]
+
+
+class ConversationCounter(_Conversation):
+    def __init__(
+        self,
+        tokenizer: Tokenizer,
+        messages: Iterable[Message] = (),
+        system: str | None = None,
+        tools: list[dict] | None = None,
+    ):
+        super().__init__(system, tools)
+        self.tokenizer = tokenizer
+        self.overhead = tokenizer._overhead_tokens(system, tools)
+        self.extend(messages)
+
+    def _count(self, message: Message) -> int:
+        key, count = self._cached(message)
+        if count is None:
+            count = self._memo[key] = self.tokenizer._message_tokens(message)
+        return count
+
+    def append(self, message: Message) -> int:
+        self._put(len(self), message, self._count(message))
+        return self.total
+
+    def extend(self, messages: Iterable[Message]) -> int:
+        for message in messages:
+            self.append(message)
+        return self.total
+
+    def replace(self, index: int, message: Message) -> int:
+        self._put(range(len(self))[index], message, self._count(message))
+        return self.total
+
+    def __setitem__(self, index: int, message: Message) -> None:
+        self.replace(index, message)
+
+    def set_system(self, system: str | None, tools: list[dict] | None = None) -> int:
+        self.system = system
+        self.tools = tools
+        self.overhead = self.tokenizer._overhead_tokens(system, tools)
+        return self.total
+
+
+class AsyncConversationCounter(_Conversation):
+    # Build with `await AsyncConversationCounter.create(...)`.
+    def __init__(
+        self,
+        tokenizer: AsyncTokenizer,
+        system: str | None = None,
+        tools: list[dict] | None = None,
+    ):
+        super().__init__(system, tools)
+        self.tokenizer = tokenizer
+
+    @classmethod
+    async def create(
+        cls,
+        tokenizer: AsyncTokenizer,
+        messages: Iterable[Message] = (),
+        system: str | None = None,
+        tools: list[dict] | None = None,
+    ) -> 'AsyncConversationCounter':
+        counter = cls(tokenizer, system, tools)
+        await counter.set_system(system, tools)
+        await counter.extend(messages)
+        return counter
+
+    async def _count(self, message: Message) -> int:
+        key, count = self._cached(message)
+        if count is None:
+            count = self._memo[key] = await self.tokenizer._message_tokens(message)
+        return count
+
+    async def append(self, message: Message) -> int:
+        self._put(len(self), message, await self._count(message))
+        return self.total
+
+    async def extend(self, messages: Iterable[Message]) -> int:
+        for message in messages:
+            await self.append(message)
+        return self.total
+
+    async def replace(self, index: int, message: Message) -> int:
+        self._put(range(len(self))[index], message, await self._count(message))
+        return self.total
+
+    async def set_system(
+        self, system: str | None, tools: list[dict] | None = None
+    ) -> int:
+        self.system = system
+        self.tools = tools
+        self.overhead = await self.tokenizer._overhead_tokens(system, tools)
+        return self.total
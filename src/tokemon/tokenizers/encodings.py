@@ -0,0 +1,10 @@
+from functools import lru_cache
+
+import tiktoken
+
+
+@lru_cache(maxsize=None)
+def encoding_for_model(model: str) -> tiktoken.Encoding:
+    # Process-wide: every tokenizer for the same model shares one Encoding
+    # (and its BPE tables) and skips tiktoken's model lookup after the first.
+    return tiktoken.encoding_for_model(model)
@@ -0,0 +1,244 @@
+import math
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import cached_property
+
+import tiktoken
+
+from .base import (
+    DEFAULT_MAX_CONCURRENCY,
+    AsyncTokenizer,
+    Tokenizer,
+    check_concurrency,
+)
+from .budget import chunk_tokens, truncate_tokens
+from ..model import Accuracy, BatchResponse, ProviderName, TokenizerResponse
+
+
+@dataclass(frozen=True)
+class Calibration:
+    encoding: str
+    ratio: float = 1.0
+    error: float = 0.0
+
+
+# Rough, deliberately conservative starting points for English-heavy text,
+# measured against o200k_base. Use calibrate() on a sample of your own
+# traffic to tighten them.
+_CALIBRATIONS: dict[str, tuple[tuple[str, Calibration], ...]] = {
+    ProviderName.ANTHROPIC.value: (
+        ('claude', Calibration('o200k_base', ratio=1.25, error=0.15)),
+    ),
+    ProviderName.GOOGLE.value: (
+        ('gemini', Calibration('o200k_base', ratio=1.05, error=0.15)),
+        ('gemma', Calibration('o200k_base', ratio=1.05, error=0.15)),
+    ),
+    ProviderName.XAI.value: (
+        ('grok', Calibration('o200k_base', ratio=1.05, error=0.15)),
+    ),
+}
+# For models a provider has already validated, e.g. fallback estimates.
+FALLBACK_CALIBRATION = Calibration('o200k_base', ratio=1.15, error=0.25)
+
+
+def _known_calibration(provider: str, model: str) -> Calibration | None:
+    if provider == ProviderName.OPENAI.value:
+        try:
+            return Calibration(tiktoken.encoding_name_for_model(model))
+        except KeyError:
+            return None
+    for prefix, calibration in _CALIBRATIONS.get(provider, ()):
+        if model.startswith(prefix):
+            return calibration
+    return None
+
+
+def calibration_for(
+    provider: str, model: str, default: Calibration | None = None
+) -> Calibration:
+    # Estimate mode never asks the provider for its model list, so a name
+    # with no known calibration is rejected unless a default is given.
+    calibration = _known_calibration(provider, model) or default
+    if calibration is None:
+        raise ValueError(f'Unsupported model: {model}')
+    return calibration
+
+
+class _Estimator:
+    def __init__(
+        self,
+        model: str,
+        provider: str,
+        calibration: Calibration | None,
+        encoding: tiktoken.Encoding | None,
+    ):
+        self.model = model
+        self.provider_name = provider
+        self.calibration = calibration or calibration_for(provider, model)
+        self._encoding = encoding
+
+    @cached_property
+    def encoding(self) -> tiktoken.Encoding:
+        if self._encoding is not None:
+            return self._encoding
+        return tiktoken.get_encoding(self.calibration.encoding)
+
+    def base_count(self, text: str) -> int:
+        # encode_ordinary: an estimate should never reject special tokens.
+        return len(self.encoding.encode_ordinary(text))
+
+    def base_counts(self, texts: list[str], num_threads: int) -> list[int]:
+        batch = self.encoding.encode_ordinary_batch(texts, num_threads=num_threads)
+        return [len(tokens) for tokens in batch]
+
+    def response(self, base: int) -> TokenizerResponse:
+        estimate = base * self.calibration.ratio
+        return TokenizerResponse(
+            input_tokens=round(estimate),
+            model=self.model,
+            provider=self.provider_name,
+            error_bound=math.ceil(estimate * self.calibration.error),
+        )
+
+    def base_budget(self, max_tokens: int) -> int:
+        # Local tokens that stay within max_tokens even at the upper bound.
+        calibration = self.calibration
+        return math.floor(max_tokens / (calibration.ratio * (1 + calibration.error)))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        tokens = self.encoding.encode_ordinary(text)
+        return truncate_tokens(self.encoding, tokens, text, self.base_budget(max_tokens))
+
+    def chunk(self, text: str, size: int, overlap: int) -> list[str]:
+        base_size = max(self.base_budget(size), 1)
+        base_overlap = min(self.base_budget(overlap), base_size - 1)
+        tokens = self.encoding.encode_ordinary(text)
+        return chunk_tokens(self.encoding, tokens, base_size, base_overlap)
+
+    def fit(self, base: list[int], exact: list[int]) -> Calibration:
+        ratio = sum(exact) / max(sum(base), 1)
+        error = max(
+            (abs(e - b * ratio) / max(e, 1) for b, e in zip(base, exact)),
+            default=0.0,
+        )
+        self.calibration = Calibration(self.calibration.encoding, ratio, error)
+        return self.calibration
+
+
+class EstimateTokenizer(Tokenizer):
+    accuracy = Accuracy.ESTIMATE
+    request_overhead = 0
+
+    def __init__(
+        self,
+        model: str,
+        provider: str,
+        exact: Callable[[], Tokenizer] | None = None,
+        calibration: Calibration | None = None,
+        encoding: tiktoken.Encoding | None = None,
+    ):
+        super().__init__(model)
+        self.estimator = _Estimator(model, provider, calibration, encoding)
+        self._exact_factory = exact
+
+    @property
+    def provider_name(self) -> str:
+        # Estimators build no provider client; only the name is known.
+        return self.estimator.provider_name
+
+    @cached_property
+    def exact(self) -> Tokenizer:
+        if self._exact_factory is None:
+            raise ValueError(f'No exact tokenizer configured for {self.model}')
+        return self._exact_factory()
+
+    def count_tokens(self, text: str) -> TokenizerResponse:
+        return self.estimator.response(self.estimator.base_count(text))
+
+    def count_tokens_batch(
+        self,
+        texts: list[str],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> BatchResponse:
+        check_concurrency(max_concurrency)
+        counts = self.estimator.base_counts(texts, max_concurrency)
+        responses = (self.estimator.response(count) for count in counts)
+        return BatchResponse.from_responses(responses, self.model, self.provider_name)
+
+    def count_tokens_exact(self, text: str) -> TokenizerResponse:
+        return self.exact.count_tokens(text)
+
+    def fits(self, text: str, max_tokens: int) -> bool:
+        # Only pays for a remote count when the estimate is too close to call.
+        response = self.count_tokens(text)
+        if response.input_tokens + response.error_bound <= max_tokens:
+            return True
+        if response.input_tokens - response.error_bound > max_tokens:
+            return False
+        return self.count_tokens_exact(text).input_tokens <= max_tokens
+
+    def truncate_to_tokens(self, text: str, max_tokens: int) -> str:
+        return self.estimator.truncate(text, max_tokens)
+
+    def chunk_by_tokens(self, text: str, size: int, overlap: int = 0) -> list[str]:
+        return self.estimator.chunk(text, size, overlap)
+
+    def calibrate(self, texts: list[str]) -> Calibration:
+        exact = [r.input_tokens for r in self.exact.count_tokens_batch(texts)]
+        base = self.estimator.base_counts(texts, DEFAULT_MAX_CONCURRENCY)
+        return self.estimator.fit(base, exact)
+
+
+class AsyncEstimateTokenizer(AsyncTokenizer):
+    accuracy = Accuracy.ESTIMATE
+    request_overhead = 0
+
+    def __init__(
+        self,
+        model: str,
+        provider: str,
+        exact: Callable[[], AsyncTokenizer] | None = None,
+        calibration: Calibration | None = None,
+        encoding: tiktoken.Encoding | None = None,
+    ):
+        super().__init__(model)
+        self.estimator = _Estimator(model, provider, calibration, encoding)
+        self._exact_factory = exact
+
+    @property
+    def provider_name(self) -> str:
+        # Estimators build no provider client; only the name is known.
+        return self.estimator.provider_name
+
+    @cached_property
+    def exact(self) -> AsyncTokenizer:
+        if self._exact_factory is None:
+            raise ValueError(f'No exact tokenizer configured for {self.model}')
+        return self._exact_factory()
+
+    async def count_tokens(self, text: str) -> TokenizerResponse:
+        return self.estimator.response(self.estimator.base_count(text))
+
+    async def count_tokens_exact(self, text: str) -> TokenizerResponse:
+        return await self.exact.count_tokens(text)
+
+    async def fits(self, text: str, max_tokens: int) -> bool:
+        response = await self.count_tokens(text)
+        if response.input_tokens + response.error_bound <= max_tokens:
+            return True
+        if response.input_tokens - response.error_bound > max_tokens:
+            return False
+        return (await self.count_tokens_exact(text)).input_tokens <= max_tokens
+
+    async def truncate_to_tokens(self, text: str, max_tokens: int) -> str:
+        return self.estimator.truncate(text, max_tokens)
+
+    async def chunk_by_tokens(
+        self, text: str, size: int, overlap: int = 0
+    ) -> list[str]:
+        return self.estimator.chunk(text, size, overlap)
+
+    async def calibrate(self, texts: list[str]) -> Calibration:
+        responses = await self.exact.count_tokens_batch(texts)
+        base = self.estimator.base_counts(texts, DEFAULT_MAX_CONCURRENCY)
+        return self.estimator.fit(base, [r.input_tokens for r in responses])
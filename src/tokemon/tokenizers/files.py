@@ -0,0 +1,81 @@
+import mmap
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+DEFAULT_SEGMENT_SIZE = 1024 * 1024
+
+Buffer = bytes | mmap.mmap
+
+
+def _char_at(buffer: Buffer, p: int) -> str:
+    lead = buffer[p]
+    width = 1 if lead < 0x80 else 2 if lead < 0xE0 else 3 if lead < 0xF0 else 4
+    return bytes(buffer[p:p + width]).decode('utf-8', 'replace')
+
+
+def _char_before(buffer: Buffer, p: int) -> str:
+    start = p - 1
+    while start > 0 and p - start < 4 and buffer[start] & 0xC0 == 0x80:
+        start -= 1
+    return bytes(buffer[start:p]).decode('utf-8', 'replace')
+
+
+def _after_newline(buffer: Buffer, p: int) -> bool:
+    # A newline between two non-space characters always ends a piece, unless
+    # the next character is '/', which o200k folds into punctuation pieces.
+    if p < 2 or not _char_before(buffer, p - 1).strip():
+        return False
+    char = _char_at(buffer, p)
+    return bool(char.strip()) and char != '/'
+
+
+def _before_space(buffer: Buffer, p: int) -> bool:
+    return p > 0 and bool(_char_before(buffer, p).strip())
+
+
+def safe_cut(buffer: Buffer, lo: int, hi: int) -> int:
+    # Prefer record boundaries, then word boundaries (see stream.split_point),
+    # and only then a bare UTF-8 character boundary.
+    p = buffer.rfind(b'\n', lo, hi - 1)
+    while p > lo:
+        if _after_newline(buffer, p + 1):
+            return p + 1
+        p = buffer.rfind(b'\n', lo, p)
+    p = buffer.rfind(b' ', lo, hi)
+    while p > lo:
+        if _before_space(buffer, p):
+            return p
+        p = buffer.rfind(b' ', lo, p)
+    while hi > lo + 1 and buffer[hi] & 0xC0 == 0x80:
+        hi -= 1
+    return hi
+
+
+def segment_ranges(
+    buffer: Buffer, segment_size: int = DEFAULT_SEGMENT_SIZE
+) -> Iterator[tuple[int, int]]:
+    size = len(buffer)
+    start = 0
+    while size - start > segment_size:
+        end = safe_cut(buffer, start, start + segment_size)
+        yield start, end
+        start = end
+    if start < size:
+        yield start, size
+
+
+@contextmanager
+def map_file(path: str | os.PathLike) -> Iterator[Buffer]:
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''  # empty files can't be mapped
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def read_range(path: str | os.PathLike, start: int, end: int) -> str:
+    with map_file(path) as buffer:
+        with memoryview(buffer) as view:
+            return str(view[start:end], 'utf-8')
@@ -1,23 +1,105 @@
+import json
+from collections.abc import Iterable
+from functools import partial
+from typing import Any
+
 from google import genai
 
 from .base import AsyncTokenizer, Tokenizer
-from ..providers.google_ai import GoogleProvider, AsyncGoogleProvider
+from .batcher import MicroBatch, MicroBatcher
+from .flight import AsyncSingleFlight, SingleFlight
+from .messages import Message, content_parts, split_system
+from ..clients import ClientOptions, clients
+from ..limits import RateLimit, provider_limiter
+from ..resilience import AsyncGuard, Guard, Resilience
+from ..providers.google_ai import GoogleProvider, AsyncGoogleProvider, google_client
 from ..model import ProviderName, TokenizerResponse
 
 
+_ROLES = {'assistant': 'model'}
+
+
+def _part(part: Any) -> dict:
+    if isinstance(part, str):
+        return {'text': part}
+    if 'type' not in part:
+        return part  # already a Gemini Part
+    if part['type'] == 'text':
+        return {'text': part['text']}
+    raise ValueError(f'Unsupported content part: {part["type"]}')
+
+
+def _content(role: str, content: Any) -> dict:
+    return {
+        'role': _ROLES.get(role, role),
+        'parts': [_part(part) for part in content_parts(content)],
+    }
+
+
+def _count_request(
+    client: genai.Client,
+    model: str,
+    messages: Iterable[Message],
+    system: str | None,
+    tools: list[dict] | None,
+) -> dict:
+    conversation, prompt = split_system(messages, system)
+    contents = [_content(m['role'], m['content']) for m in conversation]
+    if getattr(client, 'vertexai', False) is True:
+        config = {'system_instruction': prompt, 'tools': tools or None}
+        return {'model': model, 'contents': contents, 'config': config}
+    # The Gemini Developer API can't count a system instruction or tools,
+    # so they are counted as leading user text instead.
+    preamble = [] if prompt is None else [_content('user', prompt)]
+    if tools:
+        preamble.append(_content('user', json.dumps(tools, separators=(',', ':'))))
+    return {'model': model, 'contents': preamble + contents}
+
+
 class GoogleAITokenizer(Tokenizer):
-    def __init__(self, model: str):
+    def __init__(
+        self,
+        model: str,
+        client: genai.Client | None = None,
+        client_options: ClientOptions | None = None,
+        resilience: Resilience | None = None,
+        additive_counts: bool = False,
+    ):
         super().__init__(model)
-        self.client = genai.Client()
-        self.provider = GoogleProvider()
+        self.additive_counts = additive_counts
+        if client is None:
+            client = clients.get(google_client, client_options)
+        self.client = client
+        self.provider = GoogleProvider(client=client, client_options=client_options)
+        self.guard = Guard(model, ProviderName.GOOGLE.value, client_options, resilience)
+        self._flights: SingleFlight[TokenizerResponse] = SingleFlight()
 
     def count_tokens(self, text: str) -> TokenizerResponse:
-        if self.model not in self.provider.models():
-            raise ValueError(f'Unsupported model: {self.model}')
-        response = self.client.models.count_tokens(
-            model=self.model,
-            contents=text,
+        self._check_model()
+        return self._flights.do(text, partial(self._count_text, text))
+
+    def _count_text(self, text: str) -> TokenizerResponse:
+        return self.guard.call(
+            partial(self._count, model=self.model, contents=text),
+            partial(self.guard.estimate, text),
         )
+
+    def count_messages(
+        self,
+        messages: Iterable[Message],
+        system: str | None = None,
+        tools: list[dict] | None = None,
+    ) -> TokenizerResponse:
+        self._check_model()
+        messages = list(messages)
+        request = _count_request(self.client, self.model, messages, system, tools)
+        return self.guard.call(
+            partial(self._count, **request),
+            partial(self.guard.estimate_messages, messages, system, tools),
+        )
+
+    def _count(self, **request) -> TokenizerResponse:
+        response = self.client.models.count_tokens(**request)
         return TokenizerResponse(
             input_tokens=response.total_tokens,
             model=self.model,
@@ -26,18 +108,94 @@ class GoogleAITokenizer(Tokenizer):
 
 
 class AsyncGoogleAITokenizer(AsyncTokenizer):
-    def __init__(self, model: str):
+    def __init__(
+        self,
+        model: str,
+        client: genai.Client | None = None,
+        client_options: ClientOptions | None = None,
+        rate_limit: RateLimit | None = None,
+        resilience: Resilience | None = None,
+        micro_batch: MicroBatch | None = None,
+        additive_counts: bool = False,
+    ):
         super().__init__(model)
-        self.client = genai.Client()
-        self.provider = AsyncGoogleProvider()
+        self.additive_counts = additive_counts
+        if client is None:
+            client = clients.get(google_client, client_options)
+        self.client = client
+        self.provider = AsyncGoogleProvider(
+            client=client, client_options=client_options
+        )
+        self.limiter = provider_limiter(
+            ProviderName.GOOGLE.value, client_options, rate_limit
+        )
+        self.guard = AsyncGuard(
+            model, ProviderName.GOOGLE.value, client_options, resilience
+        )
+        self._flights: AsyncSingleFlight[TokenizerResponse] = AsyncSingleFlight()
+        self._batcher: MicroBatcher | None = None
+        if micro_batch is not None:
+            if not self.supports_batch_counting:
+                raise ValueError(
+                    'micro_batch requires a Vertex AI client; the Gemini '
+                    'Developer API only returns one total per request'
+                )
+            self._batcher = MicroBatcher(self._count_batch, micro_batch)
+
+    @property
+    def supports_batch_counting(self) -> bool:
+        # Vertex AI's compute_tokens reports tokens per content; count_tokens
+        # only ever returns the combined total.
+        return getattr(self.client, 'vertexai', False) is True
 
     async def count_tokens(self, text: str) -> TokenizerResponse:
-        if self.model not in await self.provider.models():
-            raise ValueError(f'Unsupported model: {self.model}')
-        response = await self.client.aio.models.count_tokens(
+        await self._check_model()
+        return await self._flights.do(text, partial(self._count_text, text))
+
+    async def _count_text(self, text: str) -> TokenizerResponse:
+        fallback = partial(self.guard.estimate, text)
+        if self._batcher is None:
+            request = partial(self._count, model=self.model, contents=text)
+            return await self.guard.call(request, fallback, self.limiter)
+        # Each batch is rate limited and timed as one request in _count_batch.
+        return await self.guard.guarded(partial(self._count_batched, text), fallback)
+
+    async def _count_batched(self, text: str) -> TokenizerResponse:
+        return TokenizerResponse(
+            input_tokens=await self._batcher.submit(text),
+            model=self.model,
+            provider=ProviderName.GOOGLE.value,
+        )
+
+    async def _count_batch(self, texts: list[str]) -> list[int]:
+        # One Content per text, so each gets its own TokensInfo back.
+        request = partial(
+            self.client.aio.models.compute_tokens,
             model=self.model,
-            contents=text,
+            contents=[_content('user', text) for text in texts],
+        )
+        response = await self.limiter.call(
+            partial(self.guard.attempt, request, self.limiter)
         )
+        return [len(info.token_ids or ()) for info in response.tokens_info or ()]
+
+    async def count_messages(
+        self,
+        messages: Iterable[Message],
+        system: str | None = None,
+        tools: list[dict] | None = None,
+    ) -> TokenizerResponse:
+        await self._check_model()
+        messages = list(messages)
+        request = _count_request(self.client, self.model, messages, system, tools)
+        return await self.guard.call(
+            partial(self._count, **request),
+            partial(self.guard.estimate_messages, messages, system, tools),
+            self.limiter,
+        )
+
+    async def _count(self, **request) -> TokenizerResponse:
+        response = await self.client.aio.models.count_tokens(**request)
         return TokenizerResponse(
             input_tokens=response.total_tokens,
             model=self.model,
@@ -0,0 +1,81 @@
+import base64
+import binascii
+import math
+import struct
+from typing import Any
+
+# OpenAI vision input cost per image: (base, per 512px tile). Low detail
+# pays only the base; gpt-4o-mini bills images at a higher token rate.
+_IMAGE_COSTS = (('gpt-4o-mini', (2833, 5667)),)
+_DEFAULT_IMAGE_COST = (85, 170)
+
+MAX_SIDE = 2048
+SHORT_SIDE = 768
+TILE = 512
+# The most tiles a scaled image can cover (2048x768), charged when the size
+# can't be read from the part, e.g. for a remote URL.
+MAX_TILES = 8
+
+# Only the start of a data URL is decoded to find the image size.
+_HEADER_CHARS = 65536
+_JPEG_SOF = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def image_part(part: Any) -> dict | None:
+    # The image of a Chat Completions 'image_url' or Responses 'input_image'
+    # part, as {'url': ..., 'detail': ...}; None for any other part.
+    if not isinstance(part, dict):
+        return None
+    if part.get('type') == 'image_url':
+        image = part['image_url']
+        return {'url': image} if isinstance(image, str) else image
+    if part.get('type') == 'input_image':
+        return {'url': part.get('image_url', ''), 'detail': part.get('detail')}
+    return None
+
+
+def image_tokens(model: str, image: dict) -> int:
+    base, per_tile = next(
+        (cost for prefix, cost in _IMAGE_COSTS if model.startswith(prefix)),
+        _DEFAULT_IMAGE_COST,
+    )
+    if image.get('detail') == 'low':
+        return base
+    size = image_size(image.get('url') or '')
+    return base + per_tile * (tiles(*size) if size and all(size) else MAX_TILES)
+
+
+def tiles(width: int, height: int) -> int:
+    # Fit within 2048x2048, then shrink so the short side is at most 768.
+    scale = min(1.0, MAX_SIDE / max(width, height))
+    scale *= min(1.0, SHORT_SIDE / (min(width, height) * scale))
+    return math.ceil(width * scale / TILE) * math.ceil(height * scale / TILE)
+
+
+def image_size(url: str) -> tuple[int, int] | None:
+    # Width and height from the header of a base64 PNG, GIF or JPEG data URL.
+    if not url.startswith('data:') or ';base64,' not in url:
+        return None
+    encoded = url.split(',', 1)[1][:_HEADER_CHARS]
+    try:
+        data = base64.b64decode(encoded[: len(encoded) // 4 * 4])
+    except binascii.Error:
+        return None
+    if data.startswith(b'\x89PNG\r\n\x1a\n') and len(data) >= 24:
+        return struct.unpack('>II', data[16:24])
+    if data[:4] == b'GIF8' and len(data) >= 10:
+        return struct.unpack('<HH', data[6:10])
+    if data[:2] == b'\xff\xd8':
+        return _jpeg_size(data)
+    return None
+
+
+def _jpeg_size(data: bytes) -> tuple[int, int] | None:
+    i = 2
+    while i + 9 <= len(data) and data[i] == 0xFF:
+        marker = data[i + 1]
+        if marker in _JPEG_SOF:
+            height, width = struct.unpack('>HH', data[i + 5:i + 9])
+            return width, height
+        i += 2 + struct.unpack('>H', data[i + 2:i + 4])[0]
+    return None
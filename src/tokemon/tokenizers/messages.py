@@ -0,0 +1,76 @@
+import json
+from collections.abc import Iterable
+from typing import Any
+
+Message = dict[str, Any]
+
+
+def content_parts(content: str | Iterable[Any]) -> list[Any]:
+    if isinstance(content, str):
+        return [{'type': 'text', 'text': content}]
+    return list(content)
+
+
+# Image, audio and file parts in the OpenAI, Anthropic and Gemini formats.
+# Gemini parts have no 'type' and are named by their only key.
+MEDIA_PARTS = frozenset({
+    'image_url', 'input_image', 'input_audio', 'input_file', 'file',
+    'image', 'document', 'inline_data', 'file_data',
+})
+
+
+def is_media(part: Any) -> bool:
+    if not isinstance(part, dict):
+        return False
+    return part.get('type') in MEDIA_PARTS or not MEDIA_PARTS.isdisjoint(part)
+
+
+def part_text(part: Any) -> str:
+    if isinstance(part, str):
+        return part
+    if part.get('type', 'text') == 'text' and 'text' in part:
+        return part['text']
+    raise ValueError(f'Unsupported content part: {part.get("type")}')
+
+
+def message_text(message: Message, skip_media: bool = False) -> str:
+    parts = content_parts(message['content'])
+    if skip_media:
+        parts = [part for part in parts if not is_media(part)]
+    return ''.join(part_text(part) for part in parts)
+
+
+def system_text(system: str | Iterable[Any] | None) -> str | None:
+    if system is None:
+        return None
+    return ''.join(part_text(part) for part in content_parts(system))
+
+
+def split_system(
+    messages: Iterable[Message], system: str | Iterable[Any] | None = None
+) -> tuple[list[Message], str | None]:
+    # Chat-style 'system' messages become the provider's system prompt.
+    prompts = [] if system is None else [system_text(system)]
+    conversation = []
+    for message in messages:
+        if message['role'] == 'system':
+            prompts.append(message_text(message))
+        else:
+            conversation.append(message)
+    return conversation, '\n\n'.join(prompts) if prompts else None
+
+
+def render(
+    messages: Iterable[Message],
+    system: str | Iterable[Any] | None = None,
+    tools: Iterable[dict] | None = None,
+) -> str:
+    # Plain-text form for tokenizers without a chat-aware count endpoint.
+    # Media parts have no text form and are left out, so they count as zero.
+    conversation, prompt = split_system(messages, system)
+    lines = [] if prompt is None else [f'system: {prompt}']
+    for message in conversation:
+        lines.append(f'{message["role"]}: {message_text(message, skip_media=True)}')
+    if tools:
+        lines.append(f'tools: {json.dumps(list(tools), separators=(",", ":"))}')
+    return '\n'.join(lines)
@@ -1,22 +1,282 @@
+import asyncio
+import json
+from collections.abc import Iterable
+from concurrent.futures import Executor
+from functools import cached_property, partial
+
 import tiktoken
 
-from .base import Tokenizer
-from ..providers.openai import OpenAIProvider
-from ..model import ProviderName, TokenizerResponse
+from .base import (
+    DEFAULT_MAX_CONCURRENCY,
+    AsyncTokenizer,
+    Tokenizer,
+    check_concurrency,
+)
+from .budget import chunk_text, truncate_text
+from .encodings import encoding_for_model
+from .images import image_part, image_tokens
+from .messages import Message, content_parts, part_text
+from .tokens import char_offsets, token_array
+from ..providers.openai import AsyncOpenAIProvider, OpenAIProvider
+from ..model import BatchResponse, ProviderName, TokenizerResponse
+
+# Below this many characters encoding is cheaper than the thread hop.
+INLINE_MAX_CHARS = 2048
+
+# Chat formatting overhead, as documented in the OpenAI cookbook.
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_NAME = 1
+REPLY_PRIMING = 3
+
+# (function, properties, property, enum, enum item, end) tool overheads.
+_TOOL_OVERHEAD = {'o200k_base': (7, 3, 3, -3, 3, 12)}
+_DEFAULT_TOOL_OVERHEAD = (10, 3, 3, -3, 3, 12)
+
+
+def _encode(
+    encoding: tiktoken.Encoding,
+    model: str,
+    text: str,
+    return_tokens: bool = False,
+    return_offsets: bool = False,
+) -> TokenizerResponse:
+    tokens = encoding.encode(text)
+    return TokenizerResponse(
+        input_tokens=len(tokens),
+        model=model,
+        provider=ProviderName.OPENAI.value,
+        tokens=token_array(tokens) if return_tokens else None,
+        offsets=(
+            char_offsets(encoding.decode_tokens_bytes(tokens))
+            if return_offsets
+            else None
+        ),
+    )
+
+
+def _content_tokens(encoding: tiktoken.Encoding, content, model: str) -> int:
+    text, images = [], 0
+    for part in content_parts(content):
+        image = image_part(part)
+        if image is None:
+            text.append(part_text(part))
+        else:
+            images += image_tokens(model, image)
+    return images + len(encoding.encode(''.join(text)))
+
+
+def chat_message_tokens(
+    encoding: tiktoken.Encoding, message: Message, model: str = ''
+) -> int:
+    count = TOKENS_PER_MESSAGE
+    for key, value in message.items():
+        if value is None:
+            continue
+        if key == 'content':
+            count += _content_tokens(encoding, value, model)
+            continue
+        if not isinstance(value, str):
+            value = json.dumps(value, separators=(',', ':'))
+        count += len(encoding.encode(value))
+        if key == 'name':
+            count += TOKENS_PER_NAME
+    return count
+
+
+def _property_tokens(
+    encoding: tiktoken.Encoding, name: str, spec: dict, overhead: tuple
+) -> int:
+    _, _, prop_key, enum_init, enum_item, _ = overhead
+    count = prop_key
+    if 'enum' in spec:
+        count += enum_init
+        for item in spec['enum']:
+            count += enum_item + len(encoding.encode(str(item)))
+    description = spec.get('description', '').removesuffix('.')
+    line = f'{name}:{spec.get("type", "")}:{description}'
+    return count + len(encoding.encode(line))
+
+
+def _tool_tokens(encoding: tiktoken.Encoding, tools: Iterable[dict]) -> int:
+    overhead = _TOOL_OVERHEAD.get(encoding.name, _DEFAULT_TOOL_OVERHEAD)
+    func_init, prop_init, *_, func_end = overhead
+    count = func_end
+    for tool in tools:
+        function = tool.get('function', tool)
+        description = function.get('description', '').removesuffix('.')
+        count += func_init + len(encoding.encode(f'{function["name"]}:{description}'))
+        properties = function.get('parameters', {}).get('properties', {})
+        if properties:
+            count += prop_init
+        for name, spec in properties.items():
+            count += _property_tokens(encoding, name, spec, overhead)
+    return count
+
+
+def chat_overhead_tokens(
+    encoding: tiktoken.Encoding,
+    system: str | None = None,
+    tools: list[dict] | None = None,
+) -> int:
+    count = REPLY_PRIMING
+    if system is not None:
+        count += chat_message_tokens(encoding, {'role': 'system', 'content': system})
+    if tools:
+        count += _tool_tokens(encoding, tools)
+    return count
+
+
+def count_chat_tokens(
+    encoding: tiktoken.Encoding,
+    messages: Iterable[Message],
+    system: str | None = None,
+    tools: list[dict] | None = None,
+    model: str = '',
+) -> int:
+    count = chat_overhead_tokens(encoding, system, tools)
+    return count + sum(chat_message_tokens(encoding, m, model) for m in messages)
 
 
 class OpenAITokenizer(Tokenizer):
+    # tiktoken counts are exact across a safe split and add nothing per call.
+    additive_counts = True
+    request_overhead = 0
+
     def __init__(self, model: str):
         super().__init__(model)
         self.provider = OpenAIProvider()
 
-    def count_tokens(self, text: str) -> TokenizerResponse:
-        if self.model not in self.provider.models():
-            raise ValueError(f'Unsupported model: {self.model}')
-        encoding = tiktoken.encoding_for_model(self.model)
-        response = encoding.encode(text)
+    @cached_property
+    def encoding(self) -> tiktoken.Encoding:
+        self._check_model()
+        return encoding_for_model(self.model)
+
+    def count_tokens(
+        self,
+        text: str,
+        return_tokens: bool = False,
+        return_offsets: bool = False,
+    ) -> TokenizerResponse:
+        return _encode(self.encoding, self.model, text, return_tokens, return_offsets)
+
+    def truncate_to_tokens(self, text: str, max_tokens: int) -> str:
+        return truncate_text(self.encoding, text, max_tokens)
+
+    def chunk_by_tokens(self, text: str, size: int, overlap: int = 0) -> list[str]:
+        return chunk_text(self.encoding, text, size, overlap)
+
+    def count_messages(
+        self,
+        messages: Iterable[Message],
+        system: str | None = None,
+        tools: list[dict] | None = None,
+    ) -> TokenizerResponse:
         return TokenizerResponse(
-            input_tokens=len(response),
+            input_tokens=count_chat_tokens(
+                self.encoding, messages, system, tools, self.model
+            ),
             model=self.model,
             provider=ProviderName.OPENAI.value,
         )
+
+    def _message_tokens(self, message: Message) -> int:
+        return chat_message_tokens(self.encoding, message, self.model)
+
+    def _overhead_tokens(self, system: str | None, tools: list[dict] | None) -> int:
+        return chat_overhead_tokens(self.encoding, system, tools)
+
+    def count_tokens_batch(
+        self,
+        texts: list[str],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> BatchResponse:
+        # Same special-token handling as count_tokens; tiktoken fans the
+        # batch out over its own thread pool and releases the GIL in BPE.
+        check_concurrency(max_concurrency)
+        response = self.encoding.encode_batch(texts, num_threads=max_concurrency)
+        return BatchResponse.from_counts(
+            self.model, ProviderName.OPENAI.value, map(len, response)
+        )
+
+
+class AsyncOpenAITokenizer(AsyncTokenizer):
+    # tiktoken counts are exact across a safe split and add nothing per call.
+    additive_counts = True
+    request_overhead = 0
+
+    # Encodes on `executor` (the loop's default executor when None) so large
+    # documents don't stall the event loop.
+    def __init__(self, model: str, executor: Executor | None = None):
+        super().__init__(model)
+        self.provider = AsyncOpenAIProvider()
+        self.executor = executor
+        self._encoding: tiktoken.Encoding | None = None
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    async def encoding(self) -> tiktoken.Encoding:
+        if self._encoding is None:
+            await self._check_model()
+            # The first load may read or download the BPE file.
+            self._encoding = await self._run(encoding_for_model, self.model)
+        return self._encoding
+
+    async def count_tokens(
+        self,
+        text: str,
+        return_tokens: bool = False,
+        return_offsets: bool = False,
+    ) -> TokenizerResponse:
+        args = (await self.encoding(), self.model, text, return_tokens, return_offsets)
+        if len(text) <= INLINE_MAX_CHARS:
+            return _encode(*args)
+        return await self._run(_encode, *args)
+
+    async def truncate_to_tokens(self, text: str, max_tokens: int) -> str:
+        return await self._run(truncate_text, await self.encoding(), text, max_tokens)
+
+    async def chunk_by_tokens(
+        self, text: str, size: int, overlap: int = 0
+    ) -> list[str]:
+        encoding = await self.encoding()
+        return await self._run(chunk_text, encoding, text, size, overlap)
+
+    async def count_messages(
+        self,
+        messages: Iterable[Message],
+        system: str | None = None,
+        tools: list[dict] | None = None,
+    ) -> TokenizerResponse:
+        encoding = await self.encoding()
+        count = await self._run(
+            count_chat_tokens, encoding, messages, system, tools, self.model
+        )
+        return TokenizerResponse(
+            input_tokens=count,
+            model=self.model,
+            provider=ProviderName.OPENAI.value,
+        )
+
+    async def _message_tokens(self, message: Message) -> int:
+        return chat_message_tokens(await self.encoding(), message, self.model)
+
+    async def _overhead_tokens(
+        self, system: str | None, tools: list[dict] | None
+    ) -> int:
+        return chat_overhead_tokens(await self.encoding(), system, tools)
+
+    async def count_tokens_batch(
+        self,
+        texts: list[str],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> BatchResponse:
+        check_concurrency(max_concurrency)
+        encoding = await self.encoding()
+        response = await self._run(
+            encoding.encode_batch, texts, num_threads=max_concurrency
+        )
+        return BatchResponse.from_counts(
+            self.model, ProviderName.OPENAI.value, map(len, response)
+        )
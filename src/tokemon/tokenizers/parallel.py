@@ -0,0 +1,167 @@
+import os
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import cached_property
+from itertools import islice
+
+import tiktoken
+
+from .base import DEFAULT_MAX_CONCURRENCY, Tokenizer, check_concurrency
+from .encodings import encoding_for_model
+from .files import DEFAULT_SEGMENT_SIZE, map_file, read_range, segment_ranges
+from .messages import Message
+from .openai import chat_message_tokens, chat_overhead_tokens, count_chat_tokens
+from ..providers.openai import OpenAIProvider
+from ..model import BatchResponse, ProviderName, TokenizerResponse
+
+DEFAULT_CHUNK_SIZE = 256
+
+_worker_encoding: tiktoken.Encoding | None = None
+
+
+def _init_worker(model: str, encoding: tiktoken.Encoding | None) -> None:
+    # Runs once per worker process, so the BPE ranks load once per core.
+    global _worker_encoding
+    _worker_encoding = encoding if encoding is not None else encoding_for_model(model)
+
+
+def _count_chunk(texts: list[str]) -> list[int]:
+    encode = _worker_encoding.encode
+    return [len(encode(text)) for text in texts]
+
+
+def _count_range(path: str, start: int, end: int) -> int:
+    # Each worker maps the file itself; only offsets cross the process boundary.
+    return len(_worker_encoding.encode(read_range(path, start, end)))
+
+
+def _chunks(texts: Iterable[str], size: int) -> Iterator[list[str]]:
+    iterator = iter(texts)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class ParallelTokenizer(Tokenizer):
+    # Shards bulk counting across worker processes. At most `max_pending`
+    # chunks are in flight, so arbitrarily long iterables stream through in
+    # bounded memory, and results come back in input order.
+    additive_counts = True
+    request_overhead = 0
+
+    def __init__(
+        self,
+        model: str,
+        max_workers: int | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_pending: int | None = None,
+        encoding: tiktoken.Encoding | None = None,
+        mp_context=None,
+    ):
+        super().__init__(model)
+        self.provider = OpenAIProvider()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending or 2 * self.max_workers
+        self.mp_context = mp_context
+        self._encoding = encoding
+        self._executor: ProcessPoolExecutor | None = None
+
+    @cached_property
+    def encoding(self) -> tiktoken.Encoding:
+        self._check_model()
+        if self._encoding is not None:
+            return self._encoding
+        return encoding_for_model(self.model)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._check_model()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=self.mp_context,
+                initializer=_init_worker,
+                initargs=(self.model, self._encoding),
+            )
+        return self._executor
+
+    def count_tokens(self, text: str) -> TokenizerResponse:
+        # A single text isn't worth the round trip to a worker.
+        return self._response(len(self.encoding.encode(text)))
+
+    def count_messages(
+        self,
+        messages: Iterable[Message],
+        system: str | None = None,
+        tools: list[dict] | None = None,
+    ) -> TokenizerResponse:
+        return self._response(
+            count_chat_tokens(self.encoding, messages, system, tools, self.model)
+        )
+
+    def _message_tokens(self, message: Message) -> int:
+        return chat_message_tokens(self.encoding, message, self.model)
+
+    def _overhead_tokens(self, system: str | None, tools: list[dict] | None) -> int:
+        return chat_overhead_tokens(self.encoding, system, tools)
+
+    def count_tokens_batch(
+        self,
+        texts: list[str],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> BatchResponse:
+        # The pool is sized at construction; max_concurrency is accepted for
+        # compatibility with Tokenizer.
+        check_concurrency(max_concurrency)
+        return BatchResponse.from_counts(
+            self.model, ProviderName.OPENAI.value, self.imap(texts)
+        )
+
+    def imap(self, texts: Iterable[str]) -> Iterator[int]:
+        chunks = ((chunk,) for chunk in _chunks(texts, self.chunk_size))
+        for counts in self._map_ordered(_count_chunk, chunks):
+            yield from counts
+
+    def count_file(
+        self,
+        path: str | os.PathLike,
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> TokenizerResponse:
+        path = os.fspath(path)
+        with map_file(path) as buffer:
+            ranges = segment_ranges(buffer, segment_size)
+            args = ((path, start, end) for start, end in ranges)
+            return self._response(sum(self._map_ordered(_count_range, args)))
+
+    def _map_ordered(self, func: Callable, args: Iterable[tuple]) -> Iterator:
+        executor = self._get_executor()
+        pending: deque[Future] = deque()
+        try:
+            for item in args:
+                if len(pending) >= self.max_pending:
+                    yield pending.popleft().result()
+                pending.append(executor.submit(func, *item))
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _response(self, count: int) -> TokenizerResponse:
+        return TokenizerResponse(
+            input_tokens=count,
+            model=self.model,
+            provider=ProviderName.OPENAI.value,
+        )
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self) -> 'ParallelTokenizer':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
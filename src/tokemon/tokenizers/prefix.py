@@ -0,0 +1,47 @@
+import threading
+from collections import OrderedDict
+
+from .stream import split_point
+
+DEFAULT_MAX_PREFIXES = 64
+
+# Counted once per tokenizer to find the tokens a provider adds to every
+# request: count('Hello') + count(' world') - count('Hello world').
+OVERHEAD_PROBE = ('Hello', ' world', 'Hello world')
+
+
+def split_prefix(prefix: str) -> tuple[str, str]:
+    # The head ends on a safe split point, so its count never depends on
+    # what follows; only the short tail is recounted with each suffix.
+    p = split_point(prefix)
+    return prefix[:p], prefix[p:]
+
+
+class PrefixCache:
+    # Least-recently-used counts of prefix heads, net of request overhead.
+    def __init__(self, max_entries: int = DEFAULT_MAX_PREFIXES):
+        self.max_entries = max_entries
+        self._counts: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def get(self, head: str) -> int | None:
+        with self._lock:
+            count = self._counts.get(head)
+            if count is not None:
+                self._counts.move_to_end(head)
+            return count
+
+    def put(self, head: str, count: int) -> int:
+        with self._lock:
+            self._counts[head] = count
+            self._counts.move_to_end(head)
+            if len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+        return count
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts.clear()
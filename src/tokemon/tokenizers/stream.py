@@ -0,0 +1,110 @@
+import codecs
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
+from dataclasses import replace
+from typing import IO, Union
+
+from ..model import TokenizerResponse
+
+DEFAULT_BUFFER_SIZE = 256 * 1024
+
+TextStream = Union[IO[str], IO[bytes], Iterable[str], Iterable[bytes]]
+AsyncTextStream = Union[AsyncIterable[str], AsyncIterable[bytes], TextStream]
+
+
+def split_point(text: str) -> int:
+    # A space that follows a non-space character always starts a new
+    # pre-tokenizer piece (the space attaches to the next word), so BPE
+    # never merges across it and both halves count the same as the whole.
+    p = text.rfind(' ')
+    while p > 0:
+        if not text[p - 1].isspace():
+            return p
+        p = text.rfind(' ', 0, p)
+    return 0
+
+
+def as_text(record: str | bytes) -> str:
+    return record if isinstance(record, str) else record.decode('utf-8')
+
+
+class _Decoder:
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+
+    def __call__(self, chunk: str | bytes, final: bool = False) -> str:
+        if isinstance(chunk, str):
+            return chunk
+        return self._decoder.decode(chunk, final)
+
+
+class Segmenter:
+    # Buffers incoming text and releases it in segments that end on a safe
+    # split point. A run of more than `4 * buffer_size` characters with no
+    # split point is cut anyway, which may shift its count by a token.
+    def __init__(self, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self._parts: list[str] = []
+        self._size = 0
+
+    def feed(self, text: str) -> Iterator[str]:
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size < self.buffer_size:
+            return
+        buffer = ''.join(self._parts)
+        while len(buffer) >= self.buffer_size:
+            p = split_point(buffer)
+            if p == 0:
+                if len(buffer) < 4 * self.buffer_size:
+                    break
+                p = self.buffer_size
+            yield buffer[:p]
+            buffer = buffer[p:]
+        self._parts = [buffer]
+        self._size = len(buffer)
+
+    def flush(self) -> Iterator[str]:
+        buffer = ''.join(self._parts)
+        self._parts = []
+        self._size = 0
+        if buffer:
+            yield buffer
+
+
+def iter_records(stream: TextStream, buffer_size: int) -> Iterator[str]:
+    # File objects are read in fixed-size blocks rather than by line, so a
+    # file without newlines still streams in bounded memory.
+    decode = _Decoder()
+    read = getattr(stream, 'read', None)
+    chunks = iter(lambda: read(buffer_size), stream.read(0)) if read else stream
+    for chunk in chunks:
+        yield decode(chunk)
+    yield decode(b'', final=True)
+
+
+async def aiter_records(stream: AsyncTextStream, buffer_size: int) -> AsyncIterator[str]:
+    if not hasattr(stream, '__aiter__'):
+        for record in iter_records(stream, buffer_size):
+            yield record
+        return
+    decode = _Decoder()
+    async for chunk in stream:
+        yield decode(chunk)
+    yield decode(b'', final=True)
+
+
+def accumulate(
+    total: TokenizerResponse | None, response: TokenizerResponse, overhead: int = 0
+) -> TokenizerResponse:
+    # `overhead` is the fixed cost every request adds; the sum keeps it once.
+    if total is None:
+        return response
+
+    def add(a: int | None, b: int | None) -> int | None:
+        return None if a is None or b is None else a + b
+
+    return replace(
+        response,
+        input_tokens=add(total.input_tokens, add(response.input_tokens, -overhead)),
+        error_bound=add(total.error_bound, response.error_bound),
+    )
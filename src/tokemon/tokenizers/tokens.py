@@ -0,0 +1,23 @@
+from array import array
+from collections.abc import Iterable
+
+_CONTINUATION = bytes(range(0x80, 0xC0))
+
+
+def token_array(ids: Iterable[int]) -> array:
+    # 4 bytes per ID rather than a boxed int; np.frombuffer(ids, np.uint32)
+    # views it without a copy.
+    return array('I', ids)
+
+
+def char_offsets(pieces: Iterable[bytes]) -> array:
+    # Index of the character each token starts in. A token that begins inside
+    # a multi-byte character points at that character, as in tiktoken's
+    # decode_with_offsets.
+    offsets = array('I')
+    position = 0
+    for piece in pieces:
+        inside = bool(piece) and 0x80 <= piece[0] < 0xC0
+        offsets.append(max(0, position - inside))
+        position += len(piece.translate(None, _CONTINUATION))
+    return offsets
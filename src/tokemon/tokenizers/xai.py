@@ -1,45 +1,124 @@
+from functools import partial
+
 from xai_sdk import AsyncClient, Client
 
 from .base import AsyncTokenizer, Tokenizer
-from ..providers.xai import XaiProvider, AsyncXaiProvider
+from .flight import AsyncSingleFlight, SingleFlight
+from .tokens import char_offsets, token_array
+from ..clients import ClientOptions, clients
+from ..limits import RateLimit, provider_limiter
+from ..resilience import AsyncGuard, Guard, Resilience
+from ..providers.xai import XaiProvider, AsyncXaiProvider, async_xai_client, xai_client
 from ..model import ProviderName, TokenizerResponse
 
 
+def _response(
+    model: str,
+    tokens: list,
+    return_tokens: bool,
+    return_offsets: bool,
+) -> TokenizerResponse:
+    return TokenizerResponse(
+        input_tokens=len(tokens),
+        model=model,
+        provider=ProviderName.XAI.value,
+        tokens=token_array(t.token_id for t in tokens) if return_tokens else None,
+        offsets=(
+            char_offsets(t.token_bytes for t in tokens) if return_offsets else None
+        ),
+    )
+
+
 class XaiTokenizer(Tokenizer):
-    def __init__(self, model: str):
+    def __init__(
+        self,
+        model: str,
+        client: Client | None = None,
+        client_options: ClientOptions | None = None,
+        resilience: Resilience | None = None,
+        additive_counts: bool = False,
+    ):
         super().__init__(model)
-        self.client = Client()
-        self.provider = XaiProvider()
+        self.additive_counts = additive_counts
+        if client is None:
+            client = clients.get(xai_client, client_options)
+        self.client = client
+        self.provider = XaiProvider(client=client, client_options=client_options)
+        self.guard = Guard(model, ProviderName.XAI.value, client_options, resilience)
+        self._flights: SingleFlight[TokenizerResponse] = SingleFlight()
+
+    def count_tokens(
+        self,
+        text: str,
+        return_tokens: bool = False,
+        return_offsets: bool = False,
+    ) -> TokenizerResponse:
+        self._check_model()
+        request = partial(
+            self.guard.call,
+            partial(self._count, text, return_tokens, return_offsets),
+            partial(self.guard.estimate, text),
+        )
+        # Token and offset arrays are mutable, so those calls aren't shared.
+        if return_tokens or return_offsets:
+            return request()
+        return self._flights.do(text, request)
 
-    def count_tokens(self, text: str) -> TokenizerResponse:
-        if self.model not in self.provider.models():
-            raise ValueError(f'Unsupported model: {self.model}')
+    def _count(
+        self, text: str, return_tokens: bool, return_offsets: bool
+    ) -> TokenizerResponse:
         response = self.client.tokenize.tokenize_text(
             model=self.model,
             text=text,
         )
-        return TokenizerResponse(
-            input_tokens=len(response),
-            model=self.model,
-            provider=ProviderName.XAI.value,
-        )
+        return _response(self.model, response, return_tokens, return_offsets)
 
 
 class AsyncXaiTokenizer(AsyncTokenizer):
-    def __init__(self, model: str):
+    def __init__(
+        self,
+        model: str,
+        client: AsyncClient | None = None,
+        client_options: ClientOptions | None = None,
+        rate_limit: RateLimit | None = None,
+        resilience: Resilience | None = None,
+        additive_counts: bool = False,
+    ):
         super().__init__(model)
-        self.client = AsyncClient()
-        self.provider = AsyncXaiProvider()
+        self.additive_counts = additive_counts
+        if client is None:
+            client = clients.get(async_xai_client, client_options)
+        self.client = client
+        self.provider = AsyncXaiProvider(client=client, client_options=client_options)
+        self.limiter = provider_limiter(
+            ProviderName.XAI.value, client_options, rate_limit
+        )
+        self.guard = AsyncGuard(
+            model, ProviderName.XAI.value, client_options, resilience
+        )
+        self._flights: AsyncSingleFlight[TokenizerResponse] = AsyncSingleFlight()
 
-    async def count_tokens(self, text: str) -> TokenizerResponse:
-        if self.model not in await self.provider.models():
-            raise ValueError(f'Unsupported model: {self.model}')
-        response = await self.client.tokenize.tokenize_text(
-            model=self.model,
-            text=text,
+    async def count_tokens(
+        self,
+        text: str,
+        return_tokens: bool = False,
+        return_offsets: bool = False,
+    ) -> TokenizerResponse:
+        await self._check_model()
+        request = partial(
+            self.guard.call,
+            partial(self._count, text, return_tokens, return_offsets),
+            partial(self.guard.estimate, text),
+            self.limiter,
         )
-        return TokenizerResponse(
-            input_tokens=len(response),
-            model=self.model,
-            provider=ProviderName.XAI.value,
+        if return_tokens or return_offsets:
+            return await request()
+        return await self._flights.do(text, request)
+
+    async def _count(
+        self, text: str, return_tokens: bool, return_offsets: bool
+    ) -> TokenizerResponse:
+        response = await self.client.tokenize.tokenize_text(
+            model=self.model, text=text
         )
+        return _response(self.model, response, return_tokens, return_offsets)
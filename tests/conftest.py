@@ -0,0 +1,25 @@
+import pytest
+
+from tokemon import scaffold
+from tokemon.clients import clients
+from tokemon.limits import limiters
+from tokemon.resilience import health
+from tokemon.providers.openai import _model_index as openai_model_index
+from tokemon.providers.registry import registry
+
+
+@pytest.fixture(autouse=True)
+def clear_model_caches(monkeypatch):
+    monkeypatch.setattr(registry, "snapshot", None)
+    registry.clear()
+    clients.clear()
+    limiters.clear()
+    health.clear()
+    openai_model_index.cache_clear()
+    yield
+    scaffold._instances.clear()
+    registry.clear()
+    clients.clear()
+    limiters.clear()
+    health.clear()
+    openai_model_index.cache_clear()
@@ -1,11 +1,16 @@
+import asyncio
+
 import pytest
 from unittest.mock import MagicMock, AsyncMock
 
+from tokemon.limits import RateLimit
 from tokemon.tokenizers.anthropic_ai import (
     AnthropicTokenizer,
     AsyncAnthropicTokenizer,
 )
+from tokemon.providers.index import ModelIndex
 from tokemon.model import ProviderName, TokenizerResponse
+from tokemon.resilience import Resilience
 
 
 FAKE_MODELS = ["claude-sonnet-4-5", "claude-haiku-4-5", "claude-opus-4-5"]
@@ -19,11 +24,11 @@ def valid_model():
 @pytest.fixture
 def mock_sync_provider(monkeypatch):
     mock_prov = MagicMock()
-    mock_prov.models.return_value = FAKE_MODELS
+    mock_prov.model_index.return_value = ModelIndex(FAKE_MODELS)
 
     monkeypatch.setattr(
         "tokemon.tokenizers.anthropic_ai.AnthropicProvider",
-        lambda: mock_prov,
+        lambda **kwargs: mock_prov,
     )
 
     return mock_prov
@@ -32,11 +37,11 @@ def mock_sync_provider(monkeypatch):
 @pytest.fixture
 def mock_async_provider(monkeypatch):
     mock_prov = MagicMock()
-    mock_prov.models = AsyncMock(return_value=FAKE_MODELS)
+    mock_prov.model_index = AsyncMock(return_value=ModelIndex(FAKE_MODELS))
 
     monkeypatch.setattr(
         "tokemon.tokenizers.anthropic_ai.AsyncAnthropicProvider",
-        lambda: mock_prov,
+        lambda **kwargs: mock_prov,
     )
 
     return mock_prov
@@ -50,8 +55,8 @@ def mock_sync_anthropic(monkeypatch):
     )
 
     monkeypatch.setattr(
-        "tokemon.tokenizers.anthropic_ai.Anthropic",
-        lambda: mock_client,
+        "tokemon.providers.anthropic_ai.Anthropic",
+        lambda **kwargs: mock_client,
     )
 
     return mock_client
@@ -65,8 +70,8 @@ def mock_async_anthropic(monkeypatch):
     )
 
     monkeypatch.setattr(
-        "tokemon.tokenizers.anthropic_ai.AsyncAnthropic",
-        lambda: mock_client,
+        "tokemon.providers.anthropic_ai.AsyncAnthropic",
+        lambda **kwargs: mock_client,
     )
 
     return mock_client
@@ -178,3 +183,234 @@ async def test_async_count_tokens_empty_string(
     response = await tokenizer.count_tokens("")
 
     assert response.input_tokens == 0
+
+
+def test_sync_count_tokens_batch(
+    valid_model, mock_sync_provider, mock_sync_anthropic
+):
+    mock_sync_anthropic.messages.count_tokens.side_effect = (
+        lambda model, messages: MagicMock(input_tokens=len(messages[0]["content"]))
+    )
+
+    tokenizer = AnthropicTokenizer(valid_model)
+    responses = tokenizer.count_tokens_batch(["a", "bbb", "cc"], max_concurrency=2)
+
+    assert [r.input_tokens for r in responses] == [1, 3, 2]
+    assert mock_sync_anthropic.messages.count_tokens.call_count == 3
+
+
+def test_sync_count_tokens_batch_empty(
+    valid_model, mock_sync_provider, mock_sync_anthropic
+):
+    tokenizer = AnthropicTokenizer(valid_model)
+
+    assert len(tokenizer.count_tokens_batch([])) == 0
+    mock_sync_anthropic.messages.count_tokens.assert_not_called()
+
+
+@pytest.mark.parametrize("max_concurrency", [0, -1])
+def test_sync_count_tokens_batch_rejects_bad_concurrency(
+    valid_model, mock_sync_provider, mock_sync_anthropic, max_concurrency
+):
+    tokenizer = AnthropicTokenizer(valid_model)
+
+    with pytest.raises(ValueError, match="max_concurrency"):
+        tokenizer.count_tokens_batch(["a"], max_concurrency=max_concurrency)
+    mock_sync_anthropic.messages.count_tokens.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_async_count_tokens_batch_rejects_bad_concurrency(
+    valid_model, mock_async_provider, mock_async_anthropic
+):
+    tokenizer = AsyncAnthropicTokenizer(valid_model)
+
+    with pytest.raises(ValueError, match="max_concurrency"):
+        await tokenizer.count_tokens_batch(["a"], max_concurrency=0)
+
+
+@pytest.mark.asyncio
+async def test_async_count_tokens_batch_is_bounded(
+    valid_model, mock_async_provider, mock_async_anthropic
+):
+    in_flight = 0
+    peak = 0
+
+    async def count_tokens(model, messages):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        return MagicMock(input_tokens=len(messages[0]["content"]))
+
+    mock_async_anthropic.messages.count_tokens = AsyncMock(side_effect=count_tokens)
+
+    tokenizer = AsyncAnthropicTokenizer(valid_model)
+    texts = ["x" * i for i in range(10)]
+    responses = await tokenizer.count_tokens_batch(texts, max_concurrency=3)
+
+    assert [r.input_tokens for r in responses] == list(range(10))
+    assert peak == 3
+
+
+def test_sync_count_tokens_with_alias(mock_sync_provider, mock_sync_anthropic):
+    mock_sync_provider.model_index.return_value = ModelIndex(
+        FAKE_MODELS, aliases={"claude-latest": FAKE_MODELS[0]}
+    )
+
+    tokenizer = AnthropicTokenizer("claude-latest")
+
+    assert tokenizer.count_tokens("hello").input_tokens == 5
+
+
+def test_sync_model_revalidated_when_model_list_changes(
+    valid_model, mock_sync_provider, mock_sync_anthropic
+):
+    tokenizer = AnthropicTokenizer(valid_model)
+    tokenizer.count_tokens("a")
+
+    mock_sync_provider.model_index.return_value = ModelIndex(["claude-next"])
+
+    with pytest.raises(ValueError, match="Unsupported model"):
+        tokenizer.count_tokens("b")
+
+
+CONVERSATION = [
+    {"role": "system", "content": "Be brief."},
+    {"role": "user", "content": "hello"},
+    {"role": "assistant", "content": "hi"},
+]
+
+
+def test_sync_count_messages_sends_one_request(
+    valid_model, mock_sync_provider, mock_sync_anthropic
+):
+    tools = [{"name": "lookup", "input_schema": {"type": "object"}}]
+    tokenizer = AnthropicTokenizer(valid_model)
+
+    response = tokenizer.count_messages(CONVERSATION, system="Be kind.", tools=tools)
+
+    assert response.input_tokens == 5
+    mock_sync_anthropic.messages.count_tokens.assert_called_once_with(
+        model=valid_model,
+        messages=CONVERSATION[1:],
+        system="Be kind.\n\nBe brief.",
+        tools=tools,
+    )
+
+
+@pytest.mark.asyncio
+async def test_async_count_messages(
+    valid_model, mock_async_provider, mock_async_anthropic
+):
+    tokenizer = AsyncAnthropicTokenizer(valid_model)
+
+    response = await tokenizer.count_messages(CONVERSATION[1:])
+
+    assert response.input_tokens == 7
+    mock_async_anthropic.messages.count_tokens.assert_awaited_once_with(
+        model=valid_model, messages=CONVERSATION[1:]
+    )
+
+
+@pytest.mark.asyncio
+async def test_async_count_tokens_retries_rate_limited_requests(
+    valid_model, mock_async_provider, mock_async_anthropic, monkeypatch
+):
+    class RateLimited(Exception):
+        status_code = 429
+        response = MagicMock(headers={"retry-after": "0"})
+
+    mock_async_anthropic.messages.count_tokens = AsyncMock(
+        side_effect=[RateLimited(), MagicMock(input_tokens=4)]
+    )
+
+    tokenizer = AsyncAnthropicTokenizer(valid_model)
+    response = await tokenizer.count_tokens("test")
+
+    assert response.input_tokens == 4
+    assert mock_async_anthropic.messages.count_tokens.await_count == 2
+
+
+def test_sync_count_tokens_falls_back_to_estimate_when_breaker_opens(
+    valid_model, mock_sync_provider, mock_sync_anthropic, monkeypatch
+):
+    class Overloaded(Exception):
+        status_code = 529
+
+    encoding = MagicMock()
+    encoding.encode_ordinary.side_effect = lambda text: text.split()
+    monkeypatch.setattr("tiktoken.get_encoding", lambda name: encoding)
+    mock_sync_anthropic.messages.count_tokens.side_effect = Overloaded()
+
+    tokenizer = AnthropicTokenizer(
+        valid_model, resilience=Resilience(failure_threshold=1)
+    )
+    with pytest.raises(Overloaded):
+        tokenizer.count_tokens("one two three four")
+    response = tokenizer.count_tokens("one two three four")
+
+    assert response.input_tokens == 5
+    assert response.error_bound == 1
+    assert mock_sync_anthropic.messages.count_tokens.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_async_identical_concurrent_counts_share_one_request(
+    valid_model, mock_async_provider, mock_async_anthropic
+):
+    async def count_tokens(model, messages):
+        await asyncio.sleep(0)
+        return MagicMock(input_tokens=9)
+
+    mock_async_anthropic.messages.count_tokens = AsyncMock(side_effect=count_tokens)
+
+    tokenizer = AsyncAnthropicTokenizer(valid_model)
+    responses = await asyncio.gather(
+        *(tokenizer.count_tokens("shared system prompt") for _ in range(10))
+    )
+
+    assert {r.input_tokens for r in responses} == {9}
+    assert mock_async_anthropic.messages.count_tokens.await_count == 1
+
+
+def test_sync_count_with_prefix_is_exact_unless_additive_is_opted_in(
+    valid_model, mock_sync_provider, mock_sync_anthropic
+):
+    count_tokens = mock_sync_anthropic.messages.count_tokens
+    count_tokens.side_effect = lambda model, messages: MagicMock(
+        input_tokens=len(messages[0]["content"].split()) + 7
+    )
+    prefix = "You are a careful assistant. "
+
+    exact = AnthropicTokenizer(valid_model)
+    assert exact.count_with_prefix(prefix, "Hi there").input_tokens == 14
+    assert count_tokens.call_count == 1
+
+    additive = AnthropicTokenizer(valid_model, additive_counts=True)
+    response = additive.count_with_prefix(prefix, "Hi there")
+    additive.count_with_prefix(prefix, "Bye")
+
+    assert response.input_tokens == 14
+    sent = [call.kwargs["messages"][0]["content"] for call in count_tokens.mock_calls]
+    assert sent[-1] == " Bye"
+
+
+@pytest.mark.asyncio
+async def test_async_rate_limit_queueing_does_not_trip_the_breaker(
+    valid_model, mock_async_provider, mock_async_anthropic
+):
+    tokenizer = AsyncAnthropicTokenizer(
+        valid_model,
+        rate_limit=RateLimit(requests_per_second=20),
+        resilience=Resilience(timeout=0.1, failure_threshold=3),
+    )
+
+    responses = await asyncio.gather(
+        *(tokenizer.count_tokens(f"text {i}") for i in range(12))
+    )
+
+    assert [r.input_tokens for r in responses] == [7] * 12
+    assert mock_async_anthropic.messages.count_tokens.await_count == 12
+    assert not tokenizer.guard.health.breaker.is_open
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from tokemon.tokenizers.batcher import MicroBatch, MicroBatcher
+
+
+def recording_sender(batches, fail=False):
+    async def send(texts):
+        batches.append(list(texts))
+        await asyncio.sleep(0)
+        if fail:
+            raise ConnectionError("down")
+        return [len(text) for text in texts]
+
+    return send
+
+
+@pytest.mark.asyncio
+async def test_concurrent_submits_share_one_request():
+    batches = []
+    batcher = MicroBatcher(recording_sender(batches), MicroBatch(max_latency=0.01))
+
+    counts = await asyncio.gather(*(batcher.submit("x" * i) for i in range(5)))
+
+    assert counts == [0, 1, 2, 3, 4]
+    assert batches == [["", "x", "xx", "xxx", "xxxx"]]
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_sent_without_waiting():
+    batches = []
+    options = MicroBatch(max_batch_size=2, max_latency=10)
+    batcher = MicroBatcher(recording_sender(batches), options)
+
+    counts = await asyncio.wait_for(
+        asyncio.gather(*(batcher.submit(t) for t in ["a", "bb", "ccc", "dddd"])), 1
+    )
+
+    assert counts == [1, 2, 3, 4]
+    assert batches == [["a", "bb"], ["ccc", "dddd"]]
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller():
+    batcher = MicroBatcher(recording_sender([], fail=True))
+
+    results = await asyncio.gather(
+        batcher.submit("a"), batcher.submit("b"), return_exceptions=True
+    )
+
+    assert all(isinstance(r, ConnectionError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_mismatched_counts_raise():
+    async def send(texts):
+        return [1]
+
+    batcher = MicroBatcher(send)
+
+    with pytest.raises(ValueError, match="Expected 2 counts"):
+        await asyncio.gather(batcher.submit("a"), batcher.submit("b"))
+
+
+@pytest.mark.asyncio
+async def test_cancelled_callers_are_left_out():
+    batches = []
+    batcher = MicroBatcher(recording_sender(batches), MicroBatch(max_latency=0.01))
+
+    cancelled = asyncio.ensure_future(batcher.submit("gone"))
+    kept = asyncio.ensure_future(batcher.submit("kept"))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    assert await kept == 4
+    assert batches == [["kept"]]
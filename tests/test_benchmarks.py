@@ -0,0 +1,77 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from benchmarks.__main__ import compare, main
+from benchmarks.common import Result, corpus, synthetic_encoding
+from benchmarks.stub_server import StubBehaviour, StubServer, count_words
+
+
+def _report(**timings):
+    return {"results": [
+        Result("suite", name, {}, {"median_s": value}).as_dict()
+        for name, value in timings.items()
+    ]}
+
+
+def test_compare_flags_slowdowns_beyond_threshold():
+    baseline = _report(fast=1.0, slow=1.0, gone=1.0)
+    current = _report(fast=1.1, slow=1.5, new=9.0)
+
+    regressions = compare(baseline, current, threshold=0.25)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith("suite/slow[]")
+
+
+def test_synthetic_encoding_merges_corpus_words():
+    encoding = synthetic_encoding()
+
+    assert len(encoding.encode(" token")) == 1
+    assert encoding.decode(encoding.encode(corpus("russian", 500))) == corpus(
+        "russian", 500
+    )
+
+
+def _post(url, payload):
+    request = urllib.request.Request(
+        url, json.dumps(payload).encode(), {"content-type": "application/json"}
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)
+
+
+def test_stub_server_counts_and_injects_errors():
+    payload = {"messages": [{"role": "user", "content": "one two three"}]}
+    with StubServer() as server:
+        body = _post(f"{server.url}/v1/messages/count_tokens", payload)
+    assert body == {"input_tokens": 3}
+    assert count_words({"contents": [{"parts": [{"text": "a b"}]}]}) == 2
+
+    with StubServer(StubBehaviour(error_rate=1.0, retry_after=0.5)) as server:
+        with pytest.raises(urllib.error.HTTPError) as e:
+            _post(f"{server.url}/v1/messages/count_tokens", payload)
+        assert server.backend.errors == 1
+    assert e.value.code == 503
+    assert e.value.headers["retry-after"] == "0.5"
+
+
+def test_main_writes_json_and_fails_on_regression(tmp_path):
+    output = tmp_path / "bench.json"
+
+    assert main(["--only", "import", "--repeat", "1", "--output", str(output)]) == 0
+    report = json.loads(output.read_text())
+    assert report["meta"]["encoding"] == "synthetic"
+    assert {r["params"]["module"] for r in report["results"]} == {
+        "tokemon", "tokemon.tokenizers.openai"
+    }
+
+    for result in report["results"]:
+        result["metrics"]["median_s"] /= 100
+    output.write_text(json.dumps(report))
+    assert main([
+        "--only", "import", "--repeat", "1", "--output", str(tmp_path / "new.json"),
+        "--compare", str(output),
+    ]) == 1
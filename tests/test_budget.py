@@ -0,0 +1,116 @@
+import pytest
+import tiktoken
+from unittest.mock import MagicMock
+
+from tokemon.providers.index import ModelIndex
+from tokemon.tokenizers.budget import chunk_text, truncate_text
+from tokemon.tokenizers.encodings import encoding_for_model
+from tokemon.tokenizers.estimate import Calibration, EstimateTokenizer
+from tokemon.tokenizers.openai import AsyncOpenAITokenizer, OpenAITokenizer
+
+# Byte-level with a few merges, so "é" is sometimes split across two tokens.
+ENCODING = tiktoken.Encoding(
+    "test",
+    pat_str=r"""\S+|\s+""",
+    mergeable_ranks={
+        **{bytes([i]): i for i in range(256)},
+        b"ab": 256,
+        b"\xa9a": 257,
+    },
+    special_tokens={},
+)
+TEXT = "ab é abé éa " * 20
+
+
+def test_truncate_keeps_a_whole_character_prefix():
+    for limit in range(len(ENCODING.encode(TEXT)) + 2):
+        truncated = truncate_text(ENCODING, TEXT, limit)
+
+        assert TEXT.startswith(truncated)
+        assert len(ENCODING.encode(truncated)) <= limit
+
+
+def test_truncate_returns_short_text_unchanged():
+    assert truncate_text(ENCODING, "ab", 5) == "ab"
+
+
+def test_chunks_cover_text_without_overlap():
+    chunks = chunk_text(ENCODING, TEXT, size=7)
+
+    assert "".join(chunks) == TEXT
+    assert all(len(ENCODING.encode(chunk)) <= 8 for chunk in chunks)
+
+
+def test_chunks_with_overlap():
+    chunks = chunk_text(ENCODING, "klmnopqr", size=4, overlap=2)
+
+    assert chunks == ["klmn", "mnop", "opqr"]
+
+
+def test_chunk_empty_text():
+    assert chunk_text(ENCODING, "", size=4) == []
+
+
+@pytest.mark.parametrize("size, overlap", [(0, 0), (4, 4), (4, -1)])
+def test_chunk_rejects_bad_window(size, overlap):
+    with pytest.raises(ValueError):
+        chunk_text(ENCODING, TEXT, size=size, overlap=overlap)
+
+
+@pytest.fixture
+def openai_encoding(monkeypatch):
+    encoding = MagicMock(wraps=ENCODING)
+    monkeypatch.setattr("tiktoken.encoding_for_model", lambda model: encoding)
+    encoding_for_model.cache_clear()
+    yield encoding
+    encoding_for_model.cache_clear()
+
+
+@pytest.fixture
+def openai_provider(monkeypatch):
+    index = ModelIndex(["gpt-4o"])
+
+    async def model_index():
+        return index
+
+    monkeypatch.setattr(
+        "tokemon.tokenizers.openai.OpenAIProvider",
+        lambda: MagicMock(model_index=lambda: index),
+    )
+    monkeypatch.setattr(
+        "tokemon.tokenizers.openai.AsyncOpenAIProvider",
+        lambda: MagicMock(model_index=model_index),
+    )
+
+
+def test_openai_truncate_encodes_once(openai_encoding, openai_provider):
+    tokenizer = OpenAITokenizer("gpt-4o")
+
+    assert tokenizer.truncate_to_tokens("klmnop", 3) == "klm"
+    assert tokenizer.chunk_by_tokens("klmnop", 2) == ["kl", "mn", "op"]
+    assert openai_encoding.encode.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_async_openai_truncate(openai_encoding, openai_provider):
+    tokenizer = AsyncOpenAITokenizer("gpt-4o")
+
+    assert await tokenizer.truncate_to_tokens("klmnop", 3) == "klm"
+    assert await tokenizer.chunk_by_tokens("klmnop", 3, overlap=1) == [
+        "klm", "mno", "op"
+    ]
+
+
+def test_estimator_budget_is_conservative():
+    tokenizer = EstimateTokenizer(
+        "claude-sonnet-4-5",
+        "anthropic",
+        calibration=Calibration("test", ratio=2.0, error=0.25),
+        encoding=ENCODING,
+    )
+
+    # 10 / (2.0 * 1.25) = 4 local tokens; chunks of 2 overlapping by 1.
+    assert tokenizer.truncate_to_tokens("klmnopqrst", 10) == "klmn"
+    assert tokenizer.chunk_by_tokens("klmnopqrst", 5, overlap=3) == [
+        "kl", "lm", "mn", "no", "op", "pq", "qr", "rs", "st"
+    ]
@@ -0,0 +1,198 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+
+from tokemon.cache import (
+    MemoryCache,
+    SqliteCache,
+    TokenCountCache,
+    cache_key,
+)
+from tokemon.model import Accuracy, TokenizerResponse
+from tokemon.tokenizers.cached import AsyncCachedTokenizer, CachedTokenizer
+from tokemon.tokenizers.estimate import EstimateTokenizer
+
+
+def make_tokenizer(counts):
+    inner = MagicMock()
+    inner.model = "claude-sonnet-4-5"
+    inner.provider_name = "anthropic"
+    inner.accuracy = Accuracy.EXACT
+    inner.count_tokens.side_effect = lambda text: TokenizerResponse(
+        input_tokens=counts[text], model=inner.model, provider="anthropic"
+    )
+    inner.count_tokens_batch.side_effect = lambda texts, max_concurrency: [
+        inner.count_tokens(text) for text in texts
+    ]
+    return inner
+
+
+def test_cache_key_separates_provider_and_model():
+    assert cache_key("a", "m", "x") == cache_key("a", "m", "x")
+    assert cache_key("a", "m", "x") != cache_key("b", "m", "x")
+    assert cache_key("a", "m", "x") != cache_key("a", "n", "x")
+    assert cache_key("a", "m", "x") != cache_key("a", "m", "y")
+
+
+def test_memory_cache_evicts_least_recently_used_by_size():
+    key_a, key_b, key_c = (cache_key("p", "m", t) for t in "abc")
+    entry_size = MemoryCache._entry_size(key_a, 1)
+    cache = MemoryCache(max_bytes=entry_size * 2)
+
+    cache.set(key_a, 1)
+    cache.set(key_b, 2)
+    cache.get(key_a)
+    cache.set(key_c, 3)
+
+    assert cache.get(key_a) == 1
+    assert cache.get(key_b) is None
+    assert cache.get(key_c) == 3
+    assert cache.evictions == 1
+    assert cache.size <= cache.max_bytes
+
+
+def test_sqlite_cache_persists(tmp_path):
+    path = str(tmp_path / "counts.db")
+    key = cache_key("p", "m", "hello")
+    store = SqliteCache(path)
+    store.set(key, 42)
+    store.close()
+
+    reopened = SqliteCache(path)
+
+    assert reopened.get(key) == 42
+    assert reopened.get(cache_key("p", "m", "other")) is None
+    reopened.close()
+
+
+def test_cached_tokenizer_hits_and_misses():
+    inner = make_tokenizer({"hello": 5, "world": 6})
+    tokenizer = CachedTokenizer(inner)
+
+    first = tokenizer.count_tokens("hello")
+    second = tokenizer.count_tokens("hello")
+    tokenizer.count_tokens("world")
+
+    assert first.input_tokens == second.input_tokens == 5
+    assert second.provider == "anthropic"
+    assert inner.count_tokens.call_count == 2
+    stats = tokenizer.cache.stats
+    assert (stats.hits, stats.misses) == (1, 2)
+    assert stats.hit_rate == pytest.approx(1 / 3)
+
+
+def test_cached_tokenizer_batch_only_counts_misses():
+    inner = make_tokenizer({"a": 1, "b": 2, "c": 3})
+    tokenizer = CachedTokenizer(inner)
+    tokenizer.count_tokens("b")
+    inner.count_tokens.reset_mock()
+
+    responses = tokenizer.count_tokens_batch(["a", "b", "c", "b"])
+
+    assert [r.input_tokens for r in responses] == [1, 2, 3, 2]
+    assert inner.count_tokens_batch.call_args.args[0] == ["a", "c"]
+
+
+def test_cached_tokenizer_never_stores_estimates():
+    inner = make_tokenizer({"hello": 99})
+    estimate = TokenizerResponse(
+        input_tokens=10, model=inner.model, provider="anthropic", error_bound=2
+    )
+    exact = inner.count_tokens.side_effect
+    inner.count_tokens.side_effect = lambda text: estimate
+    tokenizer = CachedTokenizer(inner)
+
+    assert tokenizer.count_tokens("hello") == estimate
+    batch = tokenizer.count_tokens_batch(["hello"])
+    assert (batch[0].input_tokens, batch[0].error_bound) == (10, 2)
+
+    inner.count_tokens.side_effect = exact
+    response = tokenizer.count_tokens("hello")
+    assert (response.input_tokens, response.error_bound) == (99, None)
+
+
+def test_cached_estimator_passes_estimates_through():
+    encoding = MagicMock()
+    encoding.encode_ordinary.side_effect = lambda text: text.split()
+    estimator = EstimateTokenizer("claude-sonnet-4-5", "anthropic", encoding=encoding)
+    cached = CachedTokenizer(estimator)
+
+    first = cached.count_tokens("a b c d")
+    second = cached.count_tokens("a b c d")
+
+    assert first == second
+    assert (first.input_tokens, first.provider) == (5, "anthropic")
+    assert first.error_bound is not None
+    assert (cached.provider_name, cached.accuracy) == ("anthropic", Accuracy.ESTIMATE)
+    assert cached.cache.stats.hits == 0
+    assert len(cached.cache.memory) == 0
+
+
+def test_cached_tokenizer_falls_back_to_store(tmp_path):
+    store = SqliteCache(str(tmp_path / "counts.db"))
+    warm = CachedTokenizer(make_tokenizer({"hello": 5}), TokenCountCache(store=store))
+    warm.count_tokens("hello")
+
+    inner = make_tokenizer({})
+    cold = CachedTokenizer(inner, TokenCountCache(store=store))
+
+    assert cold.count_tokens("hello").input_tokens == 5
+    inner.count_tokens.assert_not_called()
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_async_cached_tokenizer():
+    inner = MagicMock()
+    inner.model = "gemini-2.5-pro"
+    inner.provider_name = "google"
+    inner.accuracy = Accuracy.EXACT
+    inner.count_tokens = AsyncMock(
+        return_value=TokenizerResponse(
+            input_tokens=7, model="gemini-2.5-pro", provider="google"
+        )
+    )
+    tokenizer = AsyncCachedTokenizer(inner)
+
+    responses = await tokenizer.count_tokens_batch(["x", "x", "x"], max_concurrency=1)
+
+    assert [r.input_tokens for r in responses] == [7, 7, 7]
+    inner.count_tokens.assert_awaited_once_with("x")
+    assert tokenizer.cache.stats.hits == 2
+
+
+@pytest.mark.asyncio
+async def test_async_cached_tokenizer_reads_and_writes_the_store_off_the_loop(
+    tmp_path,
+):
+    store = SqliteCache(str(tmp_path / "counts.db"))
+    executor = ThreadPoolExecutor(max_workers=1)
+    submitted = []
+    submit = executor.submit
+
+    def recording_submit(func, *args):
+        submitted.append(func)
+        return submit(func, *args)
+
+    executor.submit = recording_submit
+    inner = MagicMock()
+    inner.model = "gemini-2.5-pro"
+    inner.provider_name = "google"
+    inner.accuracy = Accuracy.EXACT
+    inner.count_tokens = AsyncMock(
+        return_value=TokenizerResponse(
+            input_tokens=7, model="gemini-2.5-pro", provider="google"
+        )
+    )
+    warm = AsyncCachedTokenizer(inner, TokenCountCache(store=store), executor)
+    await warm.count_tokens("x")
+
+    cold = AsyncCachedTokenizer(inner, TokenCountCache(store=store), executor)
+    response = await cold.count_tokens("x")
+
+    assert response.input_tokens == 7
+    inner.count_tokens.assert_awaited_once_with("x")
+    assert len(submitted) == 3  # warm miss, warm write, cold store hit
+    executor.shutdown()
+    store.close()
@@ -0,0 +1,92 @@
+import anthropic
+from unittest.mock import MagicMock
+
+from tokemon.clients import ClientOptions, ClientPool, credentials_key
+from tokemon.providers.anthropic_ai import anthropic_client, async_anthropic_client
+from tokemon.providers.google_ai import google_client
+from tokemon.providers.xai import xai_client
+from tokemon.tokenizers.anthropic_ai import AnthropicTokenizer
+
+
+def test_pool_reuses_client_per_factory_and_options():
+    pool = ClientPool()
+    factory = MagicMock(side_effect=lambda options: object())
+
+    first = pool.get(factory)
+    second = pool.get(factory, ClientOptions())
+    other = pool.get(factory, ClientOptions(api_key="k"))
+
+    assert first is second
+    assert other is not first
+    assert factory.call_count == 2
+
+
+def test_credentials_key_does_not_leak_api_key():
+    assert credentials_key("anthropic", ClientOptions()) == "anthropic"
+    key = credentials_key("anthropic", ClientOptions(api_key="secret"))
+    assert key.startswith("anthropic:")
+    assert "secret" not in key
+    assert key != credentials_key("anthropic", ClientOptions(api_key="other"))
+
+
+def test_anthropic_client_applies_pool_limits(monkeypatch):
+    sdk = MagicMock()
+    http_client = MagicMock()
+    monkeypatch.setattr("tokemon.providers.anthropic_ai.Anthropic", sdk)
+    monkeypatch.setattr(anthropic, "DefaultHttpxClient", http_client)
+
+    anthropic_client(ClientOptions(api_key="k", max_connections=500))
+
+    limits = http_client.call_args.kwargs["limits"]
+    assert limits.max_connections == 500
+    assert limits.max_keepalive_connections == (
+        anthropic.DEFAULT_CONNECTION_LIMITS.max_keepalive_connections
+    )
+    assert sdk.call_args.kwargs["api_key"] == "k"
+    assert sdk.call_args.kwargs["http_client"] is http_client.return_value
+
+
+def test_async_anthropic_client_leaves_retries_to_the_limiter(monkeypatch):
+    sdk = MagicMock()
+    monkeypatch.setattr("tokemon.providers.anthropic_ai.AsyncAnthropic", sdk)
+
+    async_anthropic_client(ClientOptions())
+
+    sdk.assert_called_once_with(max_retries=0)
+
+
+def test_default_options_build_plain_clients(monkeypatch):
+    sdk = MagicMock()
+    monkeypatch.setattr("tokemon.providers.google_ai.genai.Client", sdk)
+    monkeypatch.setattr("tokemon.providers.xai.Client", sdk)
+
+    google_client(ClientOptions())
+    xai_client(ClientOptions())
+
+    assert [c.kwargs for c in sdk.call_args_list] == [{}, {}]
+
+
+def test_google_client_options(monkeypatch):
+    sdk = MagicMock()
+    monkeypatch.setattr("tokemon.providers.google_ai.genai.Client", sdk)
+
+    google_client(ClientOptions(timeout=2.5, max_keepalive_connections=10))
+
+    http_options = sdk.call_args.kwargs["http_options"]
+    assert http_options.timeout == 2500
+    limits = http_options.client_args["limits"]
+    assert limits.max_keepalive_connections == 10
+    assert limits.max_connections == 100
+    assert limits.keepalive_expiry == 5.0
+    assert http_options.async_client_args == http_options.client_args
+
+
+def test_tokenizer_and_provider_share_one_client(monkeypatch):
+    sdk = MagicMock()
+    monkeypatch.setattr("tokemon.providers.anthropic_ai.Anthropic", sdk)
+
+    first = AnthropicTokenizer("claude-sonnet-4-5")
+    second = AnthropicTokenizer("claude-haiku-4-5")
+
+    sdk.assert_called_once_with()
+    assert first.client is first.provider.client is second.client
@@ -0,0 +1,168 @@
+import pytest
+from unittest.mock import MagicMock
+
+from tokemon.model import TokenizerResponse
+from tokemon.providers.index import ModelIndex
+from tokemon.tokenizers.base import AsyncTokenizer, Tokenizer
+from tokemon.tokenizers.conversation import (
+    AsyncConversationCounter,
+    ConversationCounter,
+)
+from tokemon.tokenizers.encodings import encoding_for_model
+from tokemon.tokenizers.openai import OpenAITokenizer
+
+
+class WordTokenizer(Tokenizer):
+    request_overhead = 0
+
+    def __init__(self):
+        super().__init__("fake")
+        self.texts = []
+
+    def count_tokens(self, text):
+        self.texts.append(text)
+        return TokenizerResponse(
+            input_tokens=len(text.split()), model="fake", provider="test"
+        )
+
+
+class AsyncWordTokenizer(AsyncTokenizer):
+    request_overhead = 0
+
+    async def count_tokens(self, text):
+        return TokenizerResponse(
+            input_tokens=len(text.split()), model="fake", provider="test"
+        )
+
+
+class FramedWordTokenizer(WordTokenizer):
+    # Like a remote endpoint that adds a fixed cost to every request.
+    request_overhead = None
+
+    def count_tokens(self, text):
+        response = super().count_tokens(text)
+        return TokenizerResponse(
+            input_tokens=response.input_tokens + 3, model="fake", provider="test"
+        )
+
+
+class AsyncFramedWordTokenizer(AsyncWordTokenizer):
+    request_overhead = None
+
+    async def count_tokens(self, text):
+        response = await super().count_tokens(text)
+        return TokenizerResponse(
+            input_tokens=response.input_tokens + 3, model="fake", provider="test"
+        )
+
+
+def user(text):
+    return {"role": "user", "content": text}
+
+
+def test_append_counts_only_the_new_message():
+    tokenizer = WordTokenizer()
+    counter = ConversationCounter(tokenizer, [user("a b"), user("c")])
+    tokenizer.texts.clear()
+
+    total = counter.append(user("d e f"))
+
+    assert total == (1 + 2) + (1 + 1) + (1 + 3)
+    assert tokenizer.texts == ["user: d e f"]
+
+
+def test_repeated_messages_are_memoized():
+    tokenizer = WordTokenizer()
+    counter = ConversationCounter(tokenizer)
+
+    counter.extend([user("hi"), user("hi"), user("hi")])
+
+    assert len(counter) == 3
+    assert tokenizer.texts == ["user: hi"]
+
+
+def test_edit_and_truncate_only_touch_affected_messages():
+    tokenizer = WordTokenizer()
+    counter = ConversationCounter(tokenizer, [user("a"), user("b c"), user("d")])
+    tokenizer.texts.clear()
+
+    counter[1] = user("x")
+    assert counter.total == 2 + 2 + 2
+    counter.truncate(1)
+    assert counter.total == 2
+    del counter[0]
+
+    assert counter.total == 0
+    assert counter.messages == []
+    assert tokenizer.texts == ["user: x"]
+
+
+def test_set_system_recounts_overhead_only():
+    tokenizer = WordTokenizer()
+    counter = ConversationCounter(tokenizer, [user("a")])
+    tokenizer.texts.clear()
+
+    assert counter.set_system("be brief") == 3 + 2
+    assert tokenizer.texts == ["system: be brief"]
+
+
+def test_request_overhead_is_counted_once():
+    tokenizer = FramedWordTokenizer()
+    messages = [user("a b"), user("c")]
+
+    counter = ConversationCounter(tokenizer, messages)
+
+    assert tokenizer.request_overhead == 3
+    assert counter.total == 3 + (1 + 2) + (1 + 1)
+    assert counter.set_system("be brief") == 3 + 3 + (1 + 2) + (1 + 1)
+
+
+def test_stored_messages_are_copies():
+    message = user("a")
+    counter = ConversationCounter(WordTokenizer(), [message])
+
+    message["content"] = "changed"
+
+    assert counter.messages == [user("a")]
+
+
+def test_openai_counter_matches_count_messages(monkeypatch):
+    encoding = MagicMock()
+    encoding.encode.side_effect = list
+    encoding.name = "o200k_base"
+    monkeypatch.setattr("tiktoken.encoding_for_model", lambda model: encoding)
+    monkeypatch.setattr(
+        "tokemon.tokenizers.openai.OpenAIProvider",
+        lambda: MagicMock(model_index=lambda: ModelIndex(["gpt-4o"])),
+    )
+    encoding_for_model.cache_clear()
+    tokenizer = OpenAITokenizer("gpt-4o")
+    messages = [user("hello"), {"role": "assistant", "content": "hi", "name": "x"}]
+
+    counter = ConversationCounter(tokenizer, messages, system="sys")
+
+    assert counter.total == tokenizer.count_messages(
+        messages, system="sys"
+    ).input_tokens
+    encoding_for_model.cache_clear()
+
+
+@pytest.mark.asyncio
+async def test_async_counter():
+    counter = await AsyncConversationCounter.create(
+        AsyncWordTokenizer("fake"), [user("a b")], system="s"
+    )
+
+    assert await counter.append(user("c")) == 2 + 3 + 2
+    assert await counter.replace(-1, user("c d e")) == 2 + 3 + 4
+    counter.truncate(0)
+    assert counter.total == 2
+
+
+@pytest.mark.asyncio
+async def test_async_request_overhead_is_counted_once():
+    counter = await AsyncConversationCounter.create(
+        AsyncFramedWordTokenizer("fake"), [user("a b"), user("c")]
+    )
+
+    assert counter.total == 3 + (1 + 2) + (1 + 1)
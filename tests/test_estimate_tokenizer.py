@@ -0,0 +1,160 @@
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+
+from tokemon.model import ProviderName, TokenizerResponse
+from tokemon.tokenizers.estimate import (
+    AsyncEstimateTokenizer,
+    Calibration,
+    EstimateTokenizer,
+    FALLBACK_CALIBRATION,
+    calibration_for,
+)
+
+
+@pytest.fixture
+def word_encoding(monkeypatch):
+    # One token per whitespace-separated word.
+    encoding = MagicMock()
+    encoding.encode_ordinary.side_effect = lambda text: text.split()
+    encoding.encode_ordinary_batch.side_effect = lambda texts, num_threads: [
+        text.split() for text in texts
+    ]
+    monkeypatch.setattr("tiktoken.get_encoding", lambda name: encoding)
+    return encoding
+
+
+def exact_tokenizer(counts):
+    exact = MagicMock()
+    exact.count_tokens.side_effect = lambda text: TokenizerResponse(
+        input_tokens=counts[text], model="claude-sonnet-4-5", provider="anthropic"
+    )
+    exact.count_tokens_batch.side_effect = lambda texts: [
+        exact.count_tokens(text) for text in texts
+    ]
+    return exact
+
+
+def test_calibration_for_known_and_unknown_models():
+    assert calibration_for("anthropic", "claude-sonnet-4-5").ratio == 1.25
+    assert calibration_for("google", "gemini-2.5-pro").encoding == "o200k_base"
+    assert calibration_for("xai", "mystery", FALLBACK_CALIBRATION).error == 0.25
+    assert calibration_for("openai", "gpt-4") == Calibration("cl100k_base")
+    with pytest.raises(ValueError, match="Unsupported model: mystery"):
+        calibration_for("xai", "mystery")
+    with pytest.raises(ValueError, match="Unsupported model: bogus"):
+        calibration_for("openai", "bogus")
+
+
+def test_unknown_models_need_an_explicit_calibration(word_encoding):
+    with pytest.raises(ValueError, match="Unsupported model"):
+        EstimateTokenizer("not-a-model-at-all", "anthropic")
+
+    calibration = Calibration("o200k_base", ratio=1.1)
+    tokenizer = EstimateTokenizer(
+        "not-a-model-at-all", "anthropic", calibration=calibration
+    )
+
+    assert tokenizer.estimator.calibration is calibration
+
+
+def test_count_tokens_applies_ratio_and_error_bound(word_encoding):
+    tokenizer = EstimateTokenizer(
+        "claude-sonnet-4-5",
+        ProviderName.ANTHROPIC.value,
+        calibration=Calibration("o200k_base", ratio=1.5, error=0.1),
+    )
+
+    response = tokenizer.count_tokens("one two three four")
+
+    assert response.input_tokens == 6
+    assert response.error_bound == 1
+    assert response.provider == "anthropic"
+    assert response.model == "claude-sonnet-4-5"
+
+
+def test_user_supplied_encoding_is_used(monkeypatch):
+    encoding = MagicMock()
+    encoding.encode_ordinary.return_value = [1, 2]
+    monkeypatch.setattr("tiktoken.get_encoding", MagicMock(side_effect=AssertionError))
+    tokenizer = EstimateTokenizer(
+        "grok-3", "xai", calibration=Calibration("grok", 1.0, 0.0), encoding=encoding
+    )
+
+    response = tokenizer.count_tokens("hi")
+
+    assert (response.input_tokens, response.error_bound) == (2, 0)
+
+
+def test_count_tokens_batch(word_encoding):
+    tokenizer = EstimateTokenizer(
+        "gemini-2.5-pro", "google", calibration=Calibration("o200k_base")
+    )
+
+    responses = tokenizer.count_tokens_batch(["a b", "c"])
+
+    assert [r.input_tokens for r in responses] == [2, 1]
+
+
+def test_fits_only_asks_exact_tokenizer_when_too_close(word_encoding):
+    exact = exact_tokenizer({"a b c d e f g h i j": 11})
+    tokenizer = EstimateTokenizer(
+        "claude-sonnet-4-5",
+        "anthropic",
+        exact=lambda: exact,
+        calibration=Calibration("o200k_base", ratio=1.0, error=0.2),
+    )
+    text = "a b c d e f g h i j"
+
+    assert tokenizer.fits(text, 12) is True
+    assert tokenizer.fits(text, 7) is False
+    exact.count_tokens.assert_not_called()
+
+    assert tokenizer.fits(text, 10) is False
+    exact.count_tokens.assert_called_once_with(text)
+
+
+def test_exact_tokenizer_is_built_lazily(word_encoding):
+    factory = MagicMock()
+    tokenizer = EstimateTokenizer("claude-sonnet-4-5", "anthropic", exact=factory)
+
+    tokenizer.count_tokens("hello")
+
+    factory.assert_not_called()
+
+
+def test_count_tokens_exact_without_fallback_raises(word_encoding):
+    tokenizer = EstimateTokenizer("claude-sonnet-4-5", "anthropic")
+
+    with pytest.raises(ValueError, match="No exact tokenizer"):
+        tokenizer.count_tokens_exact("hello")
+
+
+def test_calibrate_fits_ratio_and_error(word_encoding):
+    exact = exact_tokenizer({"a b": 3, "c d e f": 5})
+    tokenizer = EstimateTokenizer("claude-sonnet-4-5", "anthropic", exact=lambda: exact)
+
+    calibration = tokenizer.calibrate(["a b", "c d e f"])
+
+    assert calibration.ratio == pytest.approx(8 / 6)
+    assert calibration.error == pytest.approx(abs(3 - 2 * 8 / 6) / 3)
+    assert tokenizer.count_tokens("a b c").input_tokens == 4
+
+
+@pytest.mark.asyncio
+async def test_async_estimate_and_fits(word_encoding):
+    exact = MagicMock()
+    exact.count_tokens = AsyncMock(
+        return_value=TokenizerResponse(input_tokens=9, model="m", provider="xai")
+    )
+    tokenizer = AsyncEstimateTokenizer(
+        "grok-3",
+        "xai",
+        exact=lambda: exact,
+        calibration=Calibration("o200k_base", ratio=1.0, error=0.2),
+    )
+
+    response = await tokenizer.count_tokens("a b c d e f g h i j")
+
+    assert (response.input_tokens, response.error_bound) == (10, 2)
+    assert await tokenizer.fits("a b c d e f g h i j", 10) is True
+    exact.count_tokens.assert_awaited_once()
@@ -0,0 +1,140 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+import tiktoken
+from unittest.mock import MagicMock
+
+from tokemon.model import TokenizerResponse
+from tokemon.providers.index import ModelIndex
+from tokemon.tokenizers.anthropic_ai import AnthropicTokenizer
+from tokemon.tokenizers.base import Tokenizer
+from tokemon.tokenizers.files import safe_cut, segment_ranges
+from tokemon.tokenizers.parallel import ParallelTokenizer
+
+O200K_PATTERN = "|".join([
+    r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]*[\p{Ll}\p{Lm}\p{Lo}\p{M}]+"""
+    r"""(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+    r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]+[\p{Ll}\p{Lm}\p{Lo}\p{M}]*"""
+    r"""(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+    r"""\p{N}{1,3}""",
+    r""" ?[^\s\p{L}\p{N}]+[\r\n/]*""",
+    r"""\s*[\r\n]+""",
+    r"""\s+(?!\S)""",
+    r"""\s+""",
+])
+
+
+def make_encoding():
+    ranks = {bytes([i]): i for i in range(256)}
+    for merge in [b"ab", b" a", b" ab", b"\n\n", b"}\n", b"\n/", b"\xc3\xa9"]:
+        ranks[merge] = len(ranks)
+    return tiktoken.Encoding(
+        "test", pat_str=O200K_PATTERN, mergeable_ranks=ranks, special_tokens={}
+    )
+
+
+ENCODING = make_encoding()
+
+
+class FakeTokenizer(Tokenizer):
+    provider = SimpleNamespace(name="test")
+
+    def __init__(self):
+        super().__init__("fake")
+        self.batches = []
+
+    def count_tokens(self, text):
+        return TokenizerResponse(
+            input_tokens=len(ENCODING.encode(text)), model="fake", provider="test"
+        )
+
+    def count_tokens_batch(self, texts, max_concurrency=8):
+        self.batches.append(texts)
+        return super().count_tokens_batch(texts, max_concurrency)
+
+
+def random_document(n, seed=0):
+    rng = random.Random(seed)
+    words = ["ab", "a", "é", '{"a": 1}', "\n", "\n/", "  ", "\t", "'s", "日本"]
+    return "".join(rng.choice(words) + rng.choice(["", " ", "\n"]) for _ in range(n))
+
+
+@pytest.fixture
+def document(tmp_path):
+    text = random_document(5_000)
+    path = tmp_path / "corpus.txt"
+    path.write_bytes(text.encode("utf-8"))
+    return path, text
+
+
+def test_segment_ranges_cover_buffer_on_character_boundaries():
+    data = random_document(3_000, seed=1).encode("utf-8")
+
+    ranges = list(segment_ranges(data, segment_size=64))
+
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    assert all(end - start <= 64 for start, end in ranges)
+    assert b"".join(data[s:e] for s, e in ranges).decode("utf-8")
+
+
+def test_safe_cut_prefers_newlines_and_skips_slash():
+    assert safe_cut(b"ab\ncd ef gh", 0, 10) == 3
+    assert safe_cut(b"ab\n/d ef gh", 0, 10) == 8
+    assert safe_cut("ééééé".encode("utf-8"), 0, 5) == 4
+
+
+def test_count_file_matches_whole_text(document):
+    path, text = document
+    tokenizer = FakeTokenizer()
+
+    response = tokenizer.count_file(path, segment_size=128, max_concurrency=4)
+
+    assert response.input_tokens == len(ENCODING.encode(text))
+    assert len(tokenizer.batches) > 1
+    assert all(len(batch) <= 4 for batch in tokenizer.batches)
+
+
+def test_remote_count_file_keeps_request_overhead_once(document, monkeypatch):
+    path, text = document
+    monkeypatch.setattr(
+        "tokemon.tokenizers.anthropic_ai.AnthropicProvider",
+        lambda **kwargs: MagicMock(
+            model_index=lambda: ModelIndex(["claude-sonnet-4-5"])
+        ),
+    )
+    client = MagicMock()
+    # Like the API, every request adds a fixed 7 tokens.
+    client.messages.count_tokens.side_effect = lambda model, messages: MagicMock(
+        input_tokens=len(ENCODING.encode(messages[0]["content"])) + 7
+    )
+    tokenizer = AnthropicTokenizer("claude-sonnet-4-5", client=client)
+
+    response = tokenizer.count_file(path, segment_size=128, max_concurrency=4)
+
+    assert client.messages.count_tokens.call_count > 4
+    assert response.input_tokens == len(ENCODING.encode(text)) + 7
+
+
+def test_count_empty_file(tmp_path):
+    path = tmp_path / "empty.txt"
+    path.write_bytes(b"")
+
+    assert FakeTokenizer().count_file(path).input_tokens == 0
+
+
+def test_batch_responses_carry_the_tokenizer_provider():
+    tokenizer = FakeTokenizer()
+
+    assert tokenizer.count_tokens_batch([]).provider == "test"
+    assert tokenizer.count_tokens_batch(["ab"]).provider == "test"
+
+
+def test_parallel_count_file(document):
+    path, text = document
+
+    with ParallelTokenizer("gpt-4o", max_workers=2, encoding=ENCODING) as tokenizer:
+        response = tokenizer.count_file(path, segment_size=256)
+
+    assert response.input_tokens == len(ENCODING.encode(text))
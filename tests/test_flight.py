@@ -0,0 +1,113 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tokemon.tokenizers.flight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_request():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def request():
+        calls.append(1)
+        started.set()
+        release.wait(1)
+        return 42
+
+    with ThreadPoolExecutor(4) as executor:
+        leader = executor.submit(flight.do, "text", request)
+        started.wait(1)
+        followers = [executor.submit(flight.do, "text", request) for _ in range(3)]
+        in_flight = flight._calls["text"]
+        while len(in_flight._condition._waiters) < 3:  # followers wait on the leader
+            time.sleep(0.001)
+        release.set()
+        results = [leader.result()] + [f.result() for f in followers]
+
+    assert results == [42] * 4
+    assert len(calls) == 1
+    assert len(flight) == 0
+
+
+def test_sequential_calls_are_not_cached():
+    flight = SingleFlight()
+    calls = []
+
+    def request():
+        calls.append(1)
+        return len(calls)
+
+    assert flight.do("text", request) == 1
+    assert flight.do("text", request) == 2
+
+
+def test_errors_reach_every_caller_and_clear_the_key():
+    flight = SingleFlight()
+
+    def request():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("text", request)
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_async_identical_calls_share_one_request():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def request():
+        calls.append(1)
+        await asyncio.sleep(0)
+        return 7
+
+    results = await asyncio.gather(
+        *(flight.do("text", request) for _ in range(5)),
+        flight.do("other", request),
+    )
+
+    assert results == [7] * 6
+    assert len(calls) == 2
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_async_cancelling_one_caller_keeps_the_request():
+    flight = AsyncSingleFlight()
+    release = asyncio.Event()
+
+    async def request():
+        await release.wait()
+        return 3
+
+    first = asyncio.ensure_future(flight.do("text", request))
+    second = asyncio.ensure_future(flight.do("text", request))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    assert await second == 3
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+@pytest.mark.asyncio
+async def test_async_errors_reach_every_caller():
+    flight = AsyncSingleFlight()
+
+    async def request():
+        await asyncio.sleep(0)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        flight.do("text", request), flight.do("text", request), return_exceptions=True
+    )
+
+    assert all(isinstance(r, ValueError) for r in results)
@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 from unittest.mock import MagicMock, AsyncMock
 
@@ -5,6 +7,8 @@ from tokemon.tokenizers.google_ai import (
     GoogleAITokenizer,
     AsyncGoogleAITokenizer,
 )
+from tokemon.tokenizers.batcher import MicroBatch
+from tokemon.providers.index import ModelIndex
 from tokemon.model import ProviderName, TokenizerResponse
 
 
@@ -19,11 +23,11 @@ def valid_model():
 @pytest.fixture
 def mock_sync_provider(monkeypatch):
     mock_prov = MagicMock()
-    mock_prov.models.return_value = FAKE_MODELS
+    mock_prov.model_index.return_value = ModelIndex(FAKE_MODELS)
 
     monkeypatch.setattr(
         "tokemon.tokenizers.google_ai.GoogleProvider",
-        lambda: mock_prov,
+        lambda **kwargs: mock_prov,
     )
 
     return mock_prov
@@ -32,11 +36,11 @@ def mock_sync_provider(monkeypatch):
 @pytest.fixture
 def mock_async_provider(monkeypatch):
     mock_prov = MagicMock()
-    mock_prov.models = AsyncMock(return_value=FAKE_MODELS)
+    mock_prov.model_index = AsyncMock(return_value=ModelIndex(FAKE_MODELS))
 
     monkeypatch.setattr(
         "tokemon.tokenizers.google_ai.AsyncGoogleProvider",
-        lambda: mock_prov,
+        lambda **kwargs: mock_prov,
     )
 
     return mock_prov
@@ -58,8 +62,8 @@ def mock_google_client(monkeypatch):
     )
 
     monkeypatch.setattr(
-        "tokemon.tokenizers.google_ai.genai.Client",
-        lambda: mock_client,
+        "tokemon.providers.google_ai.genai.Client",
+        lambda **kwargs: mock_client,
     )
 
     return mock_client
@@ -171,3 +175,104 @@ async def test_async_count_tokens_empty_string(
     response = await tokenizer.count_tokens("")
 
     assert response.input_tokens == 0
+
+
+@pytest.mark.asyncio
+async def test_async_count_tokens_batch(
+    valid_model, mock_async_provider, mock_google_client
+):
+    tokenizer = AsyncGoogleAITokenizer(valid_model)
+    responses = await tokenizer.count_tokens_batch(["a", "b"])
+
+    assert [r.input_tokens for r in responses] == [7, 7]
+    assert mock_google_client.aio.models.count_tokens.await_count == 2
+
+
+CONVERSATION = [
+    {"role": "user", "content": "hello"},
+    {"role": "assistant", "content": [{"type": "text", "text": "hi"}]},
+    {"role": "user", "content": [{"inline_data": {"mime_type": "image/png"}}]},
+]
+
+EXPECTED_CONTENTS = [
+    {"role": "user", "parts": [{"text": "hello"}]},
+    {"role": "model", "parts": [{"text": "hi"}]},
+    {"role": "user", "parts": [{"inline_data": {"mime_type": "image/png"}}]},
+]
+
+
+def test_sync_count_messages_folds_system_into_contents(
+    valid_model, mock_sync_provider, mock_google_client
+):
+    mock_google_client.vertexai = False
+    tokenizer = GoogleAITokenizer(valid_model)
+
+    response = tokenizer.count_messages(CONVERSATION, system="Be brief.")
+
+    assert response.input_tokens == 5
+    mock_google_client.models.count_tokens.assert_called_once_with(
+        model=valid_model,
+        contents=[{"role": "user", "parts": [{"text": "Be brief."}]}]
+        + EXPECTED_CONTENTS,
+    )
+
+
+@pytest.mark.asyncio
+async def test_async_count_messages_on_vertex_uses_config(
+    valid_model, mock_async_provider, mock_google_client
+):
+    mock_google_client.vertexai = True
+    tools = [{"function_declarations": [{"name": "lookup"}]}]
+    tokenizer = AsyncGoogleAITokenizer(valid_model)
+
+    response = await tokenizer.count_messages(
+        CONVERSATION, system="Be brief.", tools=tools
+    )
+
+    assert response.input_tokens == 7
+    mock_google_client.aio.models.count_tokens.assert_awaited_once_with(
+        model=valid_model,
+        contents=EXPECTED_CONTENTS,
+        config={"system_instruction": "Be brief.", "tools": tools},
+    )
+
+
+def tokens_info(*counts):
+    return MagicMock(tokens_info=[MagicMock(token_ids=list(range(c))) for c in counts])
+
+
+@pytest.mark.asyncio
+async def test_async_micro_batch_packs_counts_into_compute_tokens(
+    valid_model, mock_async_provider, mock_google_client
+):
+    mock_google_client.vertexai = True
+    mock_google_client.aio.models.compute_tokens = AsyncMock(
+        return_value=tokens_info(2, 3, 4)
+    )
+
+    tokenizer = AsyncGoogleAITokenizer(
+        valid_model, micro_batch=MicroBatch(max_latency=0.01)
+    )
+    responses = await asyncio.gather(
+        *(tokenizer.count_tokens(text) for text in ["ab", "abc", "abcd"])
+    )
+
+    assert [r.input_tokens for r in responses] == [2, 3, 4]
+    mock_google_client.aio.models.compute_tokens.assert_awaited_once_with(
+        model=valid_model,
+        contents=[
+            {"role": "user", "parts": [{"text": "ab"}]},
+            {"role": "user", "parts": [{"text": "abc"}]},
+            {"role": "user", "parts": [{"text": "abcd"}]},
+        ],
+    )
+    mock_google_client.aio.models.count_tokens.assert_not_awaited()
+
+
+def test_async_micro_batch_requires_vertex_ai(
+    valid_model, mock_async_provider, mock_google_client
+):
+    mock_google_client.vertexai = False
+
+    with pytest.raises(ValueError, match="Vertex AI"):
+        AsyncGoogleAITokenizer(valid_model, micro_batch=MicroBatch())
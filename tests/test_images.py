@@ -0,0 +1,39 @@
+import base64
+import struct
+
+from tokemon.tokenizers.images import image_part, image_size, image_tokens, tiles
+
+
+def data_url(mime, data):
+    return f"data:{mime};base64," + base64.b64encode(data).decode()
+
+
+def test_image_size_reads_png_gif_and_jpeg_headers():
+    png = b"\x89PNG\r\n\x1a\n\0\0\0\rIHDR" + struct.pack(">II", 640, 480)
+    gif = b"GIF89a" + struct.pack("<HH", 32, 16)
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"\0" * 14
+    sof = b"\xff\xc0" + struct.pack(">HBHH", 17, 8, 300, 400) + b"\0" * 10
+    jpeg = b"\xff\xd8" + app0 + sof
+
+    assert image_size(data_url("image/png", png)) == (640, 480)
+    assert image_size(data_url("image/gif", gif)) == (32, 16)
+    assert image_size(data_url("image/jpeg", jpeg)) == (400, 300)
+    assert image_size("https://example.com/cat.png") is None
+    assert image_size("data:image/png;base64,!!!!") is None
+
+
+def test_tiles_follow_openai_scaling():
+    assert tiles(512, 512) == 1
+    assert tiles(1024, 1024) == 4
+    assert tiles(2048, 4096) == 6
+    assert tiles(100, 10_000) == 4
+
+
+def test_image_parts_and_model_costs():
+    assert image_part({"type": "text", "text": "x"}) is None
+    assert image_part({"type": "image_url", "image_url": "u"}) == {"url": "u"}
+    assert image_part({"type": "input_image", "image_url": "u", "detail": "low"}) == {
+        "url": "u", "detail": "low"
+    }
+    assert image_tokens("gpt-4o", {"url": "u", "detail": "low"}) == 85
+    assert image_tokens("gpt-4o-mini", {"url": "u", "detail": "low"}) == 2833
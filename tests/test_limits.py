@@ -0,0 +1,246 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from unittest.mock import MagicMock
+
+from tokemon.clients import ClientOptions
+from tokemon.limits import (
+    AsyncRateLimiter,
+    RateLimit,
+    backoff_from_headers,
+    is_rate_limited,
+    limiters,
+    provider_limiter,
+)
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self, headers=None):
+        super().__init__("rate limited")
+        self.response = MagicMock(headers=headers or {})
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_reserve_spaces_requests_after_burst():
+    clock = FakeClock()
+    limiter = AsyncRateLimiter(RateLimit(requests_per_second=10, burst=2), clock)
+
+    delays = [limiter.reserve() for _ in range(4)]
+
+    assert delays == pytest.approx([0.0, 0.0, 0.1, 0.2])
+
+
+def test_reserve_refills_over_time():
+    clock = FakeClock()
+    limiter = AsyncRateLimiter(RateLimit(requests_per_second=10), clock)
+    limiter.reserve()
+
+    clock.now = 1.0
+
+    assert limiter.reserve() == 0.0
+
+
+def test_try_reserve_only_takes_a_free_slot():
+    clock = FakeClock()
+    limiter = AsyncRateLimiter(RateLimit(requests_per_second=10), clock)
+
+    assert limiter.try_reserve()
+    assert not limiter.try_reserve()
+    clock.now = 0.1
+    assert limiter.try_reserve()
+    limiter.penalize(1.0)
+    clock.now = 1.0
+    assert not limiter.try_reserve()
+
+
+def test_penalize_blocks_everyone_and_halves_rate():
+    clock = FakeClock()
+    limiter = AsyncRateLimiter(RateLimit(requests_per_second=10, burst=5), clock)
+
+    limiter.penalize(2.0)
+
+    assert limiter.rate == 5
+    assert limiter.reserve() == pytest.approx(2.0)
+    assert limiter.reserve() == pytest.approx(2.0)
+
+
+def test_penalize_halves_once_per_window_with_a_floor():
+    clock = FakeClock()
+    limiter = AsyncRateLimiter(RateLimit(requests_per_second=10), clock)
+
+    for _ in range(50):
+        limiter.penalize(1.0)
+    assert limiter.rate == 5
+
+    for _ in range(50):
+        clock.now += 1.0
+        limiter.penalize(0)
+    assert limiter.rate == pytest.approx(10 / 64)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_rate_limits_do_not_stall_later_calls():
+    limiter = AsyncRateLimiter(
+        RateLimit(requests_per_second=1000, burst=50, max_retries=1)
+    )
+    first = True
+
+    async def request():
+        nonlocal first
+        if first:
+            await asyncio.sleep(0)
+            raise RateLimited({"retry-after-ms": "10"})
+        return "ok"
+
+    async def burst():
+        try:
+            await limiter.call(request)
+        except RateLimited:
+            pass
+
+    calls = [asyncio.create_task(burst()) for _ in range(50)]
+    await asyncio.sleep(0.005)
+    first = False
+    await asyncio.gather(*calls)
+
+    assert limiter.reserve() < 0.1
+    assert await asyncio.wait_for(limiter.call(request), 1) == "ok"
+
+
+def test_reward_recovers_configured_rate():
+    limiter = AsyncRateLimiter(RateLimit(requests_per_second=20))
+    limiter.penalize(0)
+
+    for _ in range(15):
+        limiter.reward()
+
+    assert limiter.rate == 20
+
+
+def test_unlimited_only_waits_out_penalties():
+    clock = FakeClock()
+    limiter = AsyncRateLimiter(clock=clock)
+
+    assert [limiter.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    limiter.penalize(1.5)
+    assert limiter.reserve() == 1.5
+
+
+def test_backoff_from_headers():
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    assert backoff_from_headers({"retry-after-ms": "250"}) == 0.25
+    assert backoff_from_headers({"retry-after": "3"}) == 3.0
+    assert backoff_from_headers({
+        "anthropic-ratelimit-requests-remaining": "0",
+        "anthropic-ratelimit-requests-reset": "2025-01-01T00:00:04Z",
+    }, now) == 4.0
+    assert backoff_from_headers({"anthropic-ratelimit-requests-remaining": "9"}) is None
+    assert backoff_from_headers({
+        "anthropic-ratelimit-requests-remaining": "0",
+        "anthropic-ratelimit-requests-reset": "soon",
+    }) is None
+
+
+def test_is_rate_limited():
+    class Grpc(Exception):
+        def code(self):
+            return SimpleNamespace(name="RESOURCE_EXHAUSTED")
+
+    assert is_rate_limited(RateLimited())
+    assert is_rate_limited(Grpc())
+    assert not is_rate_limited(ValueError())
+
+
+@pytest.mark.asyncio
+async def test_call_retries_after_rate_limit_headers(monkeypatch):
+    sleeps = []
+
+    async def sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr("tokemon.limits.asyncio.sleep", sleep)
+    limiter = AsyncRateLimiter()
+    responses = iter([RateLimited({"retry-after": "0.5"}), "ok"])
+
+    async def request():
+        response = next(responses)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    assert await limiter.call(request) == "ok"
+    assert sleeps[-1] == pytest.approx(0.5, abs=0.05)
+
+
+@pytest.mark.asyncio
+async def test_call_gives_up_after_max_retries(monkeypatch):
+    async def sleep(delay):
+        pass
+
+    monkeypatch.setattr("tokemon.limits.asyncio.sleep", sleep)
+    limiter = AsyncRateLimiter(RateLimit(max_retries=2))
+    calls = 0
+
+    async def request():
+        nonlocal calls
+        calls += 1
+        raise RateLimited()
+
+    with pytest.raises(RateLimited):
+        await limiter.call(request)
+    assert calls == 3
+
+
+@pytest.mark.asyncio
+async def test_call_does_not_retry_other_errors():
+    limiter = AsyncRateLimiter()
+
+    async def request():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await limiter.call(request)
+
+
+@pytest.mark.asyncio
+async def test_call_caps_concurrency():
+    limiter = AsyncRateLimiter(RateLimit(max_concurrency=2))
+    in_flight = 0
+    peak = 0
+
+    async def request():
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+
+    await asyncio.gather(*(limiter.call(request) for _ in range(6)))
+
+    assert peak == 2
+
+
+def test_limiters_shared_per_provider_and_key():
+    limit = RateLimit(requests_per_second=5)
+
+    first = provider_limiter("anthropic", None, limit)
+    second = provider_limiter("anthropic", ClientOptions(), limit)
+    other_key = provider_limiter("anthropic", ClientOptions(api_key="k"), limit)
+    other_provider = provider_limiter("google", None, limit)
+
+    assert first is second
+    assert other_key is not first
+    assert other_provider is not first
+    assert provider_limiter("anthropic", None, None) is limiters.get("anthropic")
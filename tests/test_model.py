@@ -0,0 +1,87 @@
+import dataclasses
+import sys
+from array import array
+
+import pytest
+
+from tokemon.model import BatchResponse, TokenizerResponse
+
+
+def test_tokenizer_response_is_slotted_and_frozen():
+    response = TokenizerResponse(input_tokens=3, model="m", provider="p")
+
+    assert not hasattr(response, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        response.input_tokens = 4
+
+
+def test_batch_response_views():
+    batch = BatchResponse.from_counts("gpt-4o", "openai", [3, 1, None, 5])
+
+    assert len(batch) == 4
+    assert batch[0] == TokenizerResponse(
+        input_tokens=3, model="gpt-4o", provider="openai"
+    )
+    assert batch[2].input_tokens is None
+    assert [r.input_tokens for r in batch[1:]] == [1, None, 5]
+    assert batch.counts.typecode == "q"
+
+
+def test_batch_response_aggregates_skip_missing_counts():
+    batch = BatchResponse.from_counts("m", "p", [10, None, 20, 30, 40])
+
+    assert batch.sum() == 100
+    assert batch.percentile(0) == 10
+    assert batch.percentile(50) == 25
+    assert batch.percentile(100) == 40
+
+
+def test_batch_response_percentile_errors():
+    with pytest.raises(ValueError):
+        BatchResponse.from_counts("m", "p", [1]).percentile(101)
+    with pytest.raises(ValueError):
+        BatchResponse.from_counts("m", "p", []).percentile(50)
+
+
+def test_from_responses_keeps_error_bounds():
+    responses = [
+        TokenizerResponse(
+            input_tokens=tokens, model="m", provider="anthropic", error_bound=bound
+        )
+        for tokens, bound in [(10, 2), (20, 3)]
+    ]
+
+    batch = BatchResponse.from_responses(responses, "m", "anthropic")
+
+    assert batch.provider == "anthropic"
+    assert list(batch) == responses
+
+
+def test_from_responses_keeps_exact_and_zero_bounds_apart():
+    def response(bound):
+        return TokenizerResponse(
+            input_tokens=5, model="m", provider="anthropic", error_bound=bound
+        )
+
+    mixed = BatchResponse.from_responses([response(None), response(0)], "m", "p")
+    zeros = BatchResponse.from_responses([response(0), response(0)], "m", "p")
+    exact = BatchResponse.from_responses([response(None)], "m", "p")
+
+    assert [r.error_bound for r in mixed] == [None, 0]
+    assert [r.error_bound for r in zeros] == [0, 0]
+    assert exact.error_bounds is None
+    assert BatchResponse.from_responses([], "m", "p").provider == "p"
+
+
+def test_batch_response_is_compact():
+    counts = range(10_000)
+    batch = BatchResponse.from_counts("m", "p", counts)
+    objects = [
+        TokenizerResponse(input_tokens=c, model="m", provider="p") for c in counts
+    ]
+
+    per_item = sys.getsizeof(batch.counts) / len(batch)
+    per_object = sum(sys.getsizeof(o) + sys.getsizeof(o.input_tokens) for o in objects)
+
+    assert per_item * 5 < per_object / len(objects)
+    assert isinstance(batch.counts, array)
@@ -1,7 +1,18 @@
-import pytest
-from unittest.mock import MagicMock, patch
+import base64
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-from tokemon.tokenizers.openai import OpenAITokenizer
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from tokemon.tokenizers.encodings import encoding_for_model
+from tokemon.tokenizers.openai import (
+    INLINE_MAX_CHARS,
+    AsyncOpenAITokenizer,
+    OpenAITokenizer,
+)
+from tokemon.providers.index import ModelIndex
 from tokemon.model import ProviderName, TokenizerResponse
 
 
@@ -11,24 +22,38 @@ FAKE_MODELS = ["gpt-4", "gpt-3.5-turbo", "gpt-4o"]
 @pytest.fixture
 def mock_provider(monkeypatch):
     mock_prov = MagicMock()
-    mock_prov.models.return_value = FAKE_MODELS
+    mock_prov.model_index.return_value = ModelIndex(FAKE_MODELS)
 
     monkeypatch.setattr(
         "tokemon.tokenizers.openai.OpenAIProvider",
-        lambda: mock_prov,
+        lambda **kwargs: mock_prov,
     )
 
     return mock_prov
 
 
 @pytest.fixture
-def mock_encoding(monkeypatch):
-    fake_encoding = MagicMock()
+def mock_async_provider(monkeypatch):
+    mock_prov = MagicMock()
+    mock_prov.model_index = AsyncMock(return_value=ModelIndex(FAKE_MODELS))
+
     monkeypatch.setattr(
-        "tiktoken.encoding_for_model",
-        lambda model: fake_encoding,
+        "tokemon.tokenizers.openai.AsyncOpenAIProvider",
+        lambda **kwargs: mock_prov,
     )
-    return fake_encoding
+
+    return mock_prov
+
+
+@pytest.fixture
+def mock_encoding(monkeypatch):
+    fake_encoding = MagicMock()
+    lookup = MagicMock(return_value=fake_encoding)
+    monkeypatch.setattr("tiktoken.encoding_for_model", lookup)
+    fake_encoding.lookup = lookup
+    encoding_for_model.cache_clear()
+    yield fake_encoding
+    encoding_for_model.cache_clear()
 
 
 @pytest.fixture
@@ -97,3 +122,222 @@ def test_encode_called_exactly_once(valid_model, mock_provider, mock_encoding):
     tokenizer.count_tokens("test")
 
     mock_encoding.encode.assert_called_once()
+
+
+def test_count_tokens_batch(valid_model, mock_provider, mock_encoding):
+    mock_encoding.encode_batch.return_value = [[1, 2, 3], [], [4]]
+
+    tokenizer = OpenAITokenizer(valid_model)
+    responses = tokenizer.count_tokens_batch(["a b c", "", "d"], max_concurrency=4)
+
+    assert [r.input_tokens for r in responses] == [3, 0, 1]
+    assert all(r.model == valid_model for r in responses)
+    mock_encoding.encode_batch.assert_called_once_with(
+        ["a b c", "", "d"], num_threads=4
+    )
+
+
+def test_count_tokens_batch_with_invalid_model(mock_provider, mock_encoding):
+    tokenizer = OpenAITokenizer("not-a-real-model")
+
+    with pytest.raises(ValueError, match="Unsupported model"):
+        tokenizer.count_tokens_batch(["hello"])
+
+
+def test_encoding_resolved_once(valid_model, mock_provider, mock_encoding):
+    mock_encoding.encode.return_value = [1]
+
+    first = OpenAITokenizer(valid_model)
+    second = OpenAITokenizer(valid_model)
+    for _ in range(3):
+        first.count_tokens("a")
+        second.count_tokens("b")
+
+    assert first.encoding is second.encoding is mock_encoding
+    mock_encoding.lookup.assert_called_once_with(valid_model)
+    assert mock_provider.model_index.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_async_count_tokens(valid_model, mock_async_provider, mock_encoding):
+    mock_encoding.encode.return_value = [1, 2, 3]
+
+    tokenizer = AsyncOpenAITokenizer(valid_model)
+    response = await tokenizer.count_tokens("hello world")
+
+    assert response.input_tokens == 3
+    assert response.model == valid_model
+    assert response.provider == ProviderName.OPENAI.value
+
+
+@pytest.mark.asyncio
+async def test_async_count_tokens_with_invalid_model(
+    mock_async_provider, mock_encoding
+):
+    tokenizer = AsyncOpenAITokenizer("not-a-real-model")
+
+    with pytest.raises(ValueError, match="Unsupported model"):
+        await tokenizer.count_tokens("hello")
+
+
+@pytest.mark.asyncio
+async def test_async_large_text_is_encoded_off_the_loop(
+    valid_model, mock_async_provider, mock_encoding
+):
+    loop_thread = threading.get_ident()
+    threads = []
+
+    def encode(text):
+        threads.append(threading.get_ident())
+        return [0] * len(text)
+
+    mock_encoding.encode.side_effect = encode
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        tokenizer = AsyncOpenAITokenizer(valid_model, executor=executor)
+        small = await tokenizer.count_tokens("a")
+        large = await tokenizer.count_tokens("a" * (INLINE_MAX_CHARS + 1))
+
+    assert (small.input_tokens, large.input_tokens) == (1, INLINE_MAX_CHARS + 1)
+    assert threads[0] == loop_thread
+    assert threads[1] != loop_thread
+
+
+@pytest.mark.asyncio
+async def test_async_count_tokens_batch(
+    valid_model, mock_async_provider, mock_encoding
+):
+    mock_encoding.encode_batch.return_value = [[1, 2], [3]]
+
+    tokenizer = AsyncOpenAITokenizer(valid_model)
+    responses = await tokenizer.count_tokens_batch(["a b", "c"], max_concurrency=2)
+
+    assert [r.input_tokens for r in responses] == [2, 1]
+    mock_encoding.encode_batch.assert_called_once_with(["a b", "c"], num_threads=2)
+
+
+@pytest.fixture
+def char_encoding(mock_encoding):
+    # One token per character keeps the overhead arithmetic readable.
+    mock_encoding.encode.side_effect = list
+    mock_encoding.name = "o200k_base"
+    return mock_encoding
+
+
+def test_count_messages_applies_chat_overhead(
+    valid_model, mock_provider, char_encoding
+):
+    tokenizer = OpenAITokenizer(valid_model)
+
+    response = tokenizer.count_messages(
+        [{"role": "user", "content": "hi", "name": "bo"}], system="sys"
+    )
+
+    # priming + (message + "system" + "sys") + (message + "user" + "hi" + "bo" + name)
+    assert response.input_tokens == 3 + (3 + 6 + 3) + (3 + 4 + 2 + 2 + 1)
+
+
+def test_count_messages_with_tools(valid_model, mock_provider, char_encoding):
+    tool = {
+        "type": "function",
+        "function": {
+            "name": "f",
+            "description": "Get.",
+            "parameters": {
+                "properties": {
+                    "x": {"type": "string", "description": "X.", "enum": ["a", "b"]},
+                },
+            },
+        },
+    }
+    tokenizer = OpenAITokenizer(valid_model)
+
+    without = tokenizer.count_messages([{"role": "user", "content": "hi"}])
+    with_tools = tokenizer.count_messages(
+        [{"role": "user", "content": "hi"}], tools=[tool]
+    )
+
+    # end + function + "f:Get" + properties + key + enum + 2 items + "x:string:X"
+    expected = 12 + 7 + 5 + 3 + 3 - 3 + 2 * (3 + 1) + 10
+    assert with_tools.input_tokens - without.input_tokens == expected
+
+
+def png_url(width, height):
+    header = b"\x89PNG\r\n\x1a\n" + b"\0\0\0\rIHDR" + struct.pack(">II", width, height)
+    return "data:image/png;base64," + base64.b64encode(header).decode()
+
+
+def test_count_messages_charges_images_by_detail_and_tiles(
+    valid_model, mock_provider, char_encoding
+):
+    tokenizer = OpenAITokenizer(valid_model)
+
+    def image_cost(image):
+        content = [
+            {"type": "text", "text": "hi"},
+            {"type": "image_url", "image_url": image},
+        ]
+        with_image = tokenizer.count_messages([{"role": "user", "content": content}])
+        text_only = tokenizer.count_messages([{"role": "user", "content": "hi"}])
+        return with_image.input_tokens - text_only.input_tokens
+
+    assert image_cost({"url": png_url(4096, 4096), "detail": "low"}) == 85
+    # 1024x1024 is scaled to 768x768: four tiles.
+    assert image_cost({"url": png_url(1024, 1024)}) == 85 + 4 * 170
+    # 2048x4096 is scaled to 768x1536: six tiles.
+    assert image_cost({"url": png_url(2048, 4096), "detail": "high"}) == 1105
+    # Unknown size: charged the most tiles an image can cover.
+    assert image_cost("https://example.com/cat.png") == 85 + 8 * 170
+
+
+def test_count_messages_rejects_unknown_parts(
+    valid_model, mock_provider, char_encoding
+):
+    tokenizer = OpenAITokenizer(valid_model)
+    message = {"role": "user", "content": [{"type": "input_audio", "input_audio": {}}]}
+
+    with pytest.raises(ValueError, match="Unsupported content part"):
+        tokenizer.count_messages([message])
+
+
+@pytest.mark.asyncio
+async def test_async_count_messages(valid_model, mock_async_provider, char_encoding):
+    tokenizer = AsyncOpenAITokenizer(valid_model)
+
+    response = await tokenizer.count_messages([{"role": "user", "content": "hi"}])
+
+    assert response.input_tokens == 3 + (3 + 4 + 2)
+
+
+def test_count_tokens_can_return_tokens(valid_model, mock_provider, mock_encoding):
+    mock_encoding.encode.return_value = [5, 70000]
+
+    tokenizer = OpenAITokenizer(valid_model)
+    plain = tokenizer.count_tokens("hi")
+    response = tokenizer.count_tokens("hi", return_tokens=True)
+
+    assert plain.tokens is None and plain.offsets is None
+    assert response.tokens.typecode == "I"
+    assert list(response.tokens) == [5, 70000]
+    assert response.offsets is None
+
+
+def test_count_tokens_can_return_offsets(valid_model, mock_provider, mock_encoding):
+    mock_encoding.encode.return_value = [1, 2, 3]
+    mock_encoding.decode_tokens_bytes.return_value = [b"h", b"\xc3", b"\xa9"]
+
+    tokenizer = OpenAITokenizer(valid_model)
+    response = tokenizer.count_tokens("hé", return_offsets=True)
+
+    assert list(response.offsets) == [0, 1, 1]
+
+
+@pytest.mark.asyncio
+async def test_async_count_tokens_can_return_tokens(
+    valid_model, mock_async_provider, mock_encoding
+):
+    mock_encoding.encode.return_value = [7, 8]
+
+    tokenizer = AsyncOpenAITokenizer(valid_model)
+    response = await tokenizer.count_tokens("a" * (INLINE_MAX_CHARS + 1), True)
+
+    assert list(response.tokens) == [7, 8]
@@ -0,0 +1,59 @@
+import pytest
+import tiktoken
+
+from tokemon.model import ProviderName
+from tokemon.tokenizers.parallel import ParallelTokenizer
+
+
+@pytest.fixture
+def byte_encoding():
+    # One token per byte; picklable, so it ships to real worker processes.
+    return tiktoken.Encoding(
+        "bytes",
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={},
+    )
+
+
+@pytest.fixture
+def tokenizer(byte_encoding):
+    with ParallelTokenizer(
+        "gpt-4o", max_workers=2, chunk_size=3, max_pending=2, encoding=byte_encoding
+    ) as tokenizer:
+        yield tokenizer
+
+
+def test_count_tokens_runs_in_process(tokenizer):
+    response = tokenizer.count_tokens("hello")
+
+    assert response.input_tokens == 5
+    assert response.provider == ProviderName.OPENAI.value
+    assert tokenizer._executor is None
+
+
+def test_count_tokens_batch_preserves_order(tokenizer):
+    texts = ["x" * i for i in range(20)]
+
+    responses = tokenizer.count_tokens_batch(texts)
+
+    assert [r.input_tokens for r in responses] == list(range(20))
+    assert all(r.model == "gpt-4o" for r in responses)
+
+
+def test_imap_streams_a_generator(tokenizer):
+    counts = tokenizer.imap("y" * (i % 7) for i in range(1_000))
+
+    assert sum(counts) == sum(i % 7 for i in range(1_000))
+
+
+def test_empty_batch(tokenizer):
+    assert len(tokenizer.count_tokens_batch([])) == 0
+
+
+def test_invalid_model_raises_before_starting_workers(byte_encoding):
+    tokenizer = ParallelTokenizer("not-a-real-model", encoding=byte_encoding)
+
+    with pytest.raises(ValueError, match="Unsupported model"):
+        tokenizer.count_tokens_batch(["hello"])
+    assert tokenizer._executor is None
@@ -0,0 +1,168 @@
+import asyncio
+import random
+from dataclasses import replace
+
+import pytest
+import tiktoken
+from unittest.mock import AsyncMock, MagicMock
+
+from tokemon.model import TokenizerResponse
+from tokemon.tokenizers.base import AsyncTokenizer, Tokenizer
+from tokemon.tokenizers.openai import AsyncOpenAITokenizer, OpenAITokenizer
+from tokemon.tokenizers.prefix import PrefixCache, split_prefix
+
+CL100K_PATTERN = (
+    r"""(?i:'s|'t|'re|'ve|'m|'ll|'d)|[^\r\n\p{L}\p{N}]?\p{L}+|\p{N}{1,3}|"""
+    r""" ?[^\s\p{L}\p{N}]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+"""
+)
+ENCODING = tiktoken.Encoding(
+    "test",
+    pat_str=CL100K_PATTERN,
+    mergeable_ranks={
+        **{bytes([i]): i for i in range(256)},
+        b"ab": 256,
+        b" a": 257,
+        b" ab": 258,
+        b"  ": 259,
+    },
+    special_tokens={},
+)
+
+
+class WordTokenizer(Tokenizer):
+    # A remote-style tokenizer: one token per word plus 7 framing tokens.
+    additive_counts = True
+
+    def __init__(self):
+        super().__init__("words")
+        self.texts = []
+
+    def count_tokens(self, text):
+        self.texts.append(text)
+        return TokenizerResponse(len(text.split()) + 7, "words", "fake")
+
+
+class AsyncWordTokenizer(AsyncTokenizer):
+    additive_counts = True
+
+    def __init__(self):
+        super().__init__("words")
+        self.texts = []
+
+    async def count_tokens(self, text):
+        self.texts.append(text)
+        await asyncio.sleep(0)
+        return TokenizerResponse(len(text.split()) + 7, "words", "fake")
+
+
+def test_split_prefix_cuts_before_the_last_word():
+    assert split_prefix("You are a bot.") == ("You are a", " bot.")
+    assert split_prefix("one two  three") == ("one two", "  three")
+    assert split_prefix("nospace") == ("", "nospace")
+
+
+def test_prefix_cache_evicts_least_recently_used():
+    cache = PrefixCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert len(cache) == 2
+
+
+def test_openai_prefix_counts_match_full_counts():
+    tokenizer = OpenAITokenizer("gpt-4o")
+    tokenizer.__dict__["encoding"] = ENCODING
+    rng = random.Random(0)
+    alphabet = "ab \n.'s1"
+
+    for _ in range(500):
+        prefix = "".join(rng.choice(alphabet) for _ in range(rng.randrange(40)))
+        suffix = "".join(rng.choice(alphabet) for _ in range(rng.randrange(10)))
+        expected = len(ENCODING.encode(prefix + suffix))
+
+        assert tokenizer.count_with_prefix(prefix, suffix).input_tokens == expected
+
+
+def test_openai_encodes_only_the_tail_once_the_prefix_is_cached():
+    encoding = MagicMock(wraps=ENCODING)
+    tokenizer = OpenAITokenizer("gpt-4o")
+    tokenizer.__dict__["encoding"] = encoding
+    preamble = "You are a careful assistant. " * 50
+
+    tokenizer.count_with_prefix(preamble, "hi")
+    encoding.encode.reset_mock()
+    response = tokenizer.count_with_prefix(preamble, "ab ab")
+
+    assert response.input_tokens == len(ENCODING.encode(preamble + "ab ab"))
+    encoding.encode.assert_called_once_with(" ab ab")
+
+
+def test_remote_prefix_subtracts_probed_request_overhead():
+    tokenizer = WordTokenizer()
+    preamble = "alpha beta gamma delta "
+
+    first = tokenizer.count_with_prefix(preamble, "hello there")
+    tokenizer.texts.clear()
+    second = tokenizer.count_with_prefix(preamble, "bye")
+
+    assert first.input_tokens == 6 + 7
+    assert second.input_tokens == 5 + 7
+    assert tokenizer.request_overhead == 7
+    assert tokenizer.texts == [" bye"]
+
+
+def test_estimated_heads_and_overheads_are_not_cached():
+    tokenizer = WordTokenizer()
+    exact = tokenizer.count_tokens
+
+    def estimate(text):
+        return replace(exact(text), error_bound=3)
+
+    tokenizer.count_tokens = estimate
+    response = tokenizer.count_with_prefix("alpha beta gamma ", "x")
+
+    assert (response.input_tokens, response.error_bound) == (4 + 7, 6)
+    assert tokenizer.request_overhead is None
+    assert len(tokenizer._prefixes) == 0
+
+    tokenizer.count_tokens = exact
+    response = tokenizer.count_with_prefix("alpha beta gamma ", "x")
+
+    assert (response.input_tokens, response.error_bound) == (4 + 7, None)
+    assert tokenizer.request_overhead == 7
+    assert len(tokenizer._prefixes) == 1
+
+
+def test_non_additive_tokenizers_count_the_whole_text():
+    tokenizer = WordTokenizer()
+    tokenizer.additive_counts = False
+
+    tokenizer.count_with_prefix("alpha beta ", "gamma")
+
+    assert tokenizer.texts == ["alpha beta gamma"]
+
+
+@pytest.mark.asyncio
+async def test_async_remote_prefix_counts():
+    tokenizer = AsyncWordTokenizer()
+
+    await tokenizer.count_with_prefix("alpha beta gamma ", "x")
+    tokenizer.texts.clear()
+    response = await tokenizer.count_with_prefix("alpha beta gamma ", "x y")
+
+    assert response.input_tokens == 5 + 7
+    assert tokenizer.texts == [" x y"]
+
+
+@pytest.mark.asyncio
+async def test_async_openai_prefix_counts():
+    tokenizer = AsyncOpenAITokenizer("gpt-4o")
+    tokenizer.encoding = AsyncMock(return_value=ENCODING)
+
+    response = await tokenizer.count_with_prefix("a ab  abab. ", "ab's")
+
+    assert response.input_tokens == len(ENCODING.encode("a ab  abab. ab's"))
@@ -1,8 +1,13 @@
 import pytest
 from unittest.mock import MagicMock, AsyncMock
 
-from tokemon.providers.openai import OpenAIProvider
-from tokemon.providers.anthropic_ai import AnthropicProvider, AsyncAnthropicProvider
+from tokemon.providers.index import ModelIndex
+from tokemon.providers.openai import AsyncOpenAIProvider, OpenAIProvider
+from tokemon.providers.anthropic_ai import (
+    AnthropicProvider,
+    AsyncAnthropicProvider,
+    _model_index as anthropic_model_index,
+)
 from tokemon.providers.google_ai import (
     GoogleProvider,
     AsyncGoogleProvider,
@@ -23,6 +28,45 @@ def test_strip_models_prefix_empty_string():
     assert _strip_models_prefix("") == ""
 
 
+def test_model_index_resolves_ids_aliases_and_prefixes():
+    index = ModelIndex(
+        ["gpt-4o", "gpt-4"],
+        aliases={"latest": "gpt-4o"},
+        prefixes=["gpt-4-", "gpt-4o-"],
+    )
+
+    assert index.resolve("gpt-4") == "gpt-4"
+    assert index.resolve("latest") == "gpt-4o"
+    assert index.resolve("gpt-4o-2024-08-06") == "gpt-4o-"
+    assert index.resolve("claude") is None
+    assert "gpt-4-0613" in index
+    assert list(index) == ["gpt-4o", "gpt-4"]
+    assert len(index) == 2
+
+
+def test_anthropic_model_index_aliases_newest_snapshot():
+    index = anthropic_model_index(
+        ["claude-sonnet-4-5-20250929", "claude-sonnet-4-5-20250101", "claude-x"]
+    )
+
+    assert index.resolve("claude-sonnet-4-5") == "claude-sonnet-4-5-20250929"
+    assert index.resolve("claude-sonnet-4-5-latest") == "claude-sonnet-4-5-20250929"
+    assert index.resolve("claude-sonnet-4-5-20250101") == "claude-sonnet-4-5-20250101"
+    assert "claude-x-latest" not in index
+
+
+def test_openai_provider_resolves_model_prefixes(monkeypatch):
+    monkeypatch.setattr("tiktoken.model.MODEL_TO_ENCODING", {"gpt-4o": "o200k_base"})
+    monkeypatch.setattr(
+        "tiktoken.model.MODEL_PREFIX_TO_ENCODING", {"gpt-4o-": "o200k_base"}
+    )
+
+    index = OpenAIProvider().model_index()
+
+    assert "gpt-4o-2024-08-06" in index
+    assert "gpt-4" not in index
+
+
 def test_openai_provider_models(monkeypatch):
     fake_model_map = {"gpt-4": "cl100k_base", "gpt-3.5-turbo": "cl100k_base"}
     monkeypatch.setattr(
@@ -36,6 +80,15 @@ def test_openai_provider_models(monkeypatch):
     assert set(result) == {"gpt-4", "gpt-3.5-turbo"}
 
 
+@pytest.mark.asyncio
+async def test_openai_async_provider_models(monkeypatch):
+    monkeypatch.setattr("tiktoken.model.MODEL_TO_ENCODING", {"gpt-4": "cl100k_base"})
+
+    result = await AsyncOpenAIProvider().models()
+
+    assert result == ["gpt-4"]
+
+
 def test_anthropic_sync_provider_models(monkeypatch):
     mock_client = MagicMock()
     mock_model_1 = MagicMock()
@@ -48,7 +101,7 @@ def test_anthropic_sync_provider_models(monkeypatch):
 
     monkeypatch.setattr(
         "tokemon.providers.anthropic_ai.Anthropic",
-        lambda: mock_client,
+        lambda **kwargs: mock_client,
     )
 
     provider = AnthropicProvider()
@@ -70,7 +123,7 @@ async def test_anthropic_async_provider_models(monkeypatch):
 
     monkeypatch.setattr(
         "tokemon.providers.anthropic_ai.AsyncAnthropic",
-        lambda: mock_client,
+        lambda **kwargs: mock_client,
     )
 
     provider = AsyncAnthropicProvider()
@@ -89,13 +142,14 @@ def test_google_sync_provider_models(monkeypatch):
 
     monkeypatch.setattr(
         "tokemon.providers.google_ai.genai.Client",
-        lambda: mock_client,
+        lambda **kwargs: mock_client,
     )
 
     provider = GoogleProvider()
     result = provider.models()
 
     assert result == ["gemini-2.5-pro", "gemini-2.0-flash"]
+    assert "models/gemini-2.5-pro" in provider.model_index()
 
 
 @pytest.mark.asyncio
@@ -113,7 +167,7 @@ async def test_google_async_provider_models(monkeypatch):
 
     monkeypatch.setattr(
         "tokemon.providers.google_ai.genai.Client",
-        lambda: mock_client,
+        lambda **kwargs: mock_client,
     )
 
     provider = AsyncGoogleProvider()
@@ -126,21 +180,24 @@ def test_xai_sync_provider_models(monkeypatch):
     mock_client = MagicMock()
     mock_model_1 = MagicMock()
     mock_model_1.name = "grok-3"
+    mock_model_1.aliases = ["grok-3-latest"]
     mock_model_2 = MagicMock()
     mock_model_2.name = "grok-3-mini"
+    mock_model_2.aliases = []
     mock_client.models.list_language_models.return_value = [
         mock_model_1, mock_model_2
     ]
 
     monkeypatch.setattr(
         "tokemon.providers.xai.Client",
-        lambda: mock_client,
+        lambda **kwargs: mock_client,
     )
 
     provider = XaiProvider()
     result = provider.models()
 
     assert result == ["grok-3", "grok-3-mini"]
+    assert provider.model_index().resolve("grok-3-latest") == "grok-3"
 
 
 @pytest.mark.asyncio
@@ -157,7 +214,7 @@ async def test_xai_async_provider_models(monkeypatch):
 
     monkeypatch.setattr(
         "tokemon.providers.xai.AsyncClient",
-        lambda: mock_client,
+        lambda **kwargs: mock_client,
     )
 
     provider = AsyncXaiProvider()
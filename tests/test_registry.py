@@ -0,0 +1,227 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+
+from tokemon.providers.anthropic_ai import AnthropicProvider, AsyncAnthropicProvider
+from tokemon.providers.index import ModelIndex
+from tokemon.providers.registry import ModelRegistry
+from tokemon.providers.snapshot import (
+    CACHE_DIR_ENV,
+    DEFAULT_MAX_AGE,
+    MAX_AGE_ENV,
+    ModelSnapshot,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def model_registry(clock):
+    return ModelRegistry(ttl=10, stale_ttl=100, clock=clock)
+
+
+def test_fresh_entry_is_not_refetched(model_registry):
+    fetch = MagicMock(return_value=ModelIndex(["a"]))
+
+    first = model_registry.get("p", fetch)
+    second = model_registry.get("p", fetch)
+
+    assert first is second
+    fetch.assert_called_once()
+
+
+def test_stale_entry_is_served_while_refreshing(model_registry, clock):
+    old = ModelIndex(["a"])
+    new = ModelIndex(["b"])
+    refreshed = threading.Event()
+
+    def fetch_new():
+        refreshed.set()
+        return new
+
+    model_registry.get("p", lambda: old)
+    clock.now += 20
+
+    assert model_registry.get("p", fetch_new) is old
+    assert refreshed.wait(timeout=5)
+    deadline = time.monotonic() + 5
+    while model_registry.get("p", fetch_new) is old and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert model_registry.get("p", fetch_new) is new
+
+
+def test_failed_background_refresh_keeps_stale_entry(model_registry, clock):
+    old = ModelIndex(["a"])
+    model_registry.get("p", lambda: old)
+    clock.now += 20
+    failed = threading.Event()
+
+    def fetch():
+        failed.set()
+        raise RuntimeError("boom")
+
+    assert model_registry.get("p", fetch) is old
+    assert failed.wait(timeout=5)
+    assert model_registry.get("p", lambda: old) is old
+
+
+def test_expired_entry_is_refetched_inline(model_registry, clock):
+    model_registry.get("p", lambda: ModelIndex(["a"]))
+    clock.now += 200
+    new = ModelIndex(["b"])
+
+    assert model_registry.get("p", lambda: new) is new
+
+
+@pytest.mark.asyncio
+async def test_async_concurrent_misses_share_one_fetch(model_registry):
+    index = ModelIndex(["a"])
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0)
+        return index
+
+    results = await asyncio.gather(*(model_registry.aget("p", fetch) for _ in range(5)))
+
+    assert all(r is index for r in results)
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_async_stale_entry_refreshes_in_background(model_registry, clock):
+    old = ModelIndex(["a"])
+    new = ModelIndex(["b"])
+    await model_registry.aget("p", AsyncMock(return_value=old))
+    clock.now += 20
+
+    assert await model_registry.aget("p", AsyncMock(return_value=new)) is old
+    await asyncio.sleep(0)
+    assert await model_registry.aget("p", AsyncMock()) is new
+
+
+def test_provider_instances_share_one_model_list(monkeypatch):
+    mock_client = MagicMock()
+    mock_model = MagicMock()
+    mock_model.id = "claude-sonnet-4-5"
+    mock_client.models.list.return_value = MagicMock(data=[mock_model])
+    monkeypatch.setattr(
+        "tokemon.providers.anthropic_ai.Anthropic",
+        lambda **kwargs: mock_client,
+    )
+
+    for _ in range(3):
+        assert AnthropicProvider().models() == ["claude-sonnet-4-5"]
+
+    mock_client.models.list.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_sync_and_async_providers_share_entries(monkeypatch):
+    mock_client = MagicMock()
+    mock_model = MagicMock()
+    mock_model.id = "claude-sonnet-4-5"
+    mock_client.models.list.return_value = MagicMock(data=[mock_model])
+    mock_async_client = MagicMock()
+    mock_async_client.models.list = AsyncMock()
+    monkeypatch.setattr(
+        "tokemon.providers.anthropic_ai.Anthropic",
+        lambda **kwargs: mock_client,
+    )
+    monkeypatch.setattr(
+        "tokemon.providers.anthropic_ai.AsyncAnthropic",
+        lambda **kwargs: mock_async_client,
+    )
+
+    AnthropicProvider().models()
+
+    assert await AsyncAnthropicProvider().models() == ["claude-sonnet-4-5"]
+    mock_async_client.models.list.assert_not_awaited()
+
+
+def test_snapshot_round_trip(tmp_path, clock):
+    snapshot = ModelSnapshot(tmp_path / "cache" / "models.json", max_age=1_000)
+    index = ModelIndex(["a", "b"], aliases={"x": "a"}, prefixes=["a-"])
+
+    snapshot.save("p", index, fetched_at=clock.now)
+    loaded, fetched_at = snapshot.load("p", now=clock.now + 1)
+
+    assert fetched_at == clock.now
+    assert list(loaded) == ["a", "b"]
+    assert loaded.resolve("x") == "a"
+    assert loaded.resolve("a-1") == "a-"
+    assert snapshot.load("p", now=clock.now + 1_000) is None
+    assert snapshot.load("missing", now=clock.now) is None
+
+
+def test_snapshot_ignores_corrupt_file(tmp_path):
+    path = tmp_path / "models.json"
+    path.write_text("{not json")
+
+    assert ModelSnapshot(path).load("p", now=0) is None
+
+
+def test_snapshot_from_env(tmp_path, monkeypatch):
+    monkeypatch.delenv(CACHE_DIR_ENV, raising=False)
+    assert ModelSnapshot.from_env() is None
+
+    monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path))
+    monkeypatch.setenv(MAX_AGE_ENV, "60")
+    snapshot = ModelSnapshot.from_env()
+
+    assert snapshot.path == tmp_path / "models.json"
+    assert snapshot.max_age == 60
+
+
+def test_snapshot_from_env_ignores_malformed_max_age(tmp_path, monkeypatch):
+    monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path))
+    monkeypatch.setenv(MAX_AGE_ENV, "1d")
+
+    assert ModelSnapshot.from_env().max_age == DEFAULT_MAX_AGE
+
+
+def test_cold_start_is_served_from_snapshot(tmp_path, clock):
+    path = tmp_path / "models.json"
+    writer = ModelRegistry(ttl=10, stale_ttl=100, clock=clock,
+                           snapshot=ModelSnapshot(path, max_age=10_000))
+    writer.get("p", lambda: ModelIndex(["a"]))
+    clock.now += 5_000
+    reader = ModelRegistry(ttl=10, stale_ttl=100, clock=clock,
+                           snapshot=ModelSnapshot(path, max_age=10_000))
+    refreshed = threading.Event()
+
+    def fetch():
+        refreshed.set()
+        return ModelIndex(["b"])
+
+    assert list(reader.get("p", fetch)) == ["a"]
+    assert refreshed.wait(timeout=5)
+
+
+def test_refresh_adopts_snapshot_written_by_another_process(tmp_path, clock):
+    path = tmp_path / "models.json"
+    registry = ModelRegistry(ttl=10, stale_ttl=100, clock=clock,
+                             snapshot=ModelSnapshot(path))
+    registry.get("p", lambda: ModelIndex(["a"]))
+    clock.now += 200
+    ModelSnapshot(path).save("p", ModelIndex(["b"]), fetched_at=clock.now)
+    fetch = MagicMock()
+
+    assert list(registry.get("p", fetch)) == ["b"]
+    fetch.assert_not_called()
@@ -0,0 +1,421 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from unittest.mock import MagicMock
+
+from tokemon.limits import AsyncRateLimiter, RateLimit
+from tokemon.model import TokenizerResponse
+from tokemon.resilience import (
+    HEDGE_MIN_SAMPLES,
+    AsyncGuard,
+    CircuitBreaker,
+    CircuitOpenError,
+    Guard,
+    LatencyWindow,
+    Resilience,
+    health,
+    is_transient,
+)
+
+MODEL = "claude-sonnet-4-5"
+
+
+class Unavailable(Exception):
+    status_code = 503
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def word_encoding(monkeypatch):
+    encoding = MagicMock()
+    encoding.encode_ordinary.side_effect = lambda text: text.split()
+    monkeypatch.setattr("tiktoken.get_encoding", lambda name: encoding)
+    return encoding
+
+
+def response(count):
+    return TokenizerResponse(input_tokens=count, model=MODEL, provider="anthropic")
+
+
+def fails(*errors, then=None):
+    outcomes = iter(errors)
+
+    def request():
+        error = next(outcomes, None)
+        if error is not None:
+            raise error
+        return then
+
+    return request
+
+
+def test_is_transient():
+    class APIConnectionError(Exception):
+        pass
+
+    class Grpc(Exception):
+        def code(self):
+            return SimpleNamespace(name="UNAVAILABLE")
+
+    assert is_transient(TimeoutError())
+    assert is_transient(asyncio.TimeoutError())
+    assert is_transient(Unavailable())
+    assert is_transient(APIConnectionError())
+    assert is_transient(Grpc())
+    assert not is_transient(BadRequest())
+    assert not is_transient(ValueError())
+
+
+def test_latency_window_needs_enough_samples():
+    window = LatencyWindow()
+    for i in range(HEDGE_MIN_SAMPLES - 1):
+        window.add(i)
+
+    assert window.percentile(95) is None
+    window.add(100)
+    assert window.percentile(50) == 10
+    assert window.percentile(None) is None
+
+
+def test_breaker_opens_then_probes_once():
+    clock = FakeClock()
+    breaker = CircuitBreaker(2, recovery_time=10, clock=clock)
+
+    breaker.record(False)
+    assert breaker.allow()
+    breaker.record(False)
+    assert not breaker.allow()
+
+    clock.now = 10
+    assert breaker.allow()
+    assert not breaker.allow()  # the probe is still in flight
+    breaker.record(True)
+    assert breaker.allow()
+    assert not breaker.is_open
+
+
+def test_breaker_release_lets_the_next_call_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker(1, recovery_time=10, clock=clock)
+    breaker.record(False)
+
+    clock.now = 10
+    assert breaker.allow()
+    breaker.release()
+
+    assert breaker.is_open
+    assert breaker.allow()
+
+
+def test_breaker_without_threshold_never_opens():
+    breaker = CircuitBreaker(None, recovery_time=10)
+    for _ in range(100):
+        breaker.record(False)
+
+    assert breaker.allow()
+
+
+def test_guard_retries_transient_errors():
+    guard = Guard(MODEL, "anthropic", policy=Resilience(retries=2, backoff=0))
+
+    result = guard.call(fails(Unavailable(), Unavailable(), then=response(3)), None)
+
+    assert result.input_tokens == 3
+
+
+def test_guard_does_not_retry_client_errors():
+    guard = Guard(MODEL, "anthropic", policy=Resilience(retries=2, backoff=0))
+    request = MagicMock(side_effect=BadRequest())
+
+    with pytest.raises(BadRequest):
+        guard.call(request, None)
+    assert request.call_count == 1
+
+
+def test_guard_times_out_slow_requests():
+    guard = Guard(MODEL, "anthropic", policy=Resilience(timeout=0.01))
+    release = threading.Event()
+
+    with pytest.raises(TimeoutError):
+        guard.call(lambda: release.wait(1), None)
+    release.set()
+
+
+def test_guards_share_one_thread_pool_until_cleared():
+    policy = Resilience(timeout=1.0)
+    first = Guard(MODEL, "anthropic", policy=policy)
+    second = Guard("claude-haiku-4-5", "anthropic", policy=policy)
+
+    assert first.call(lambda: response(1), None).input_tokens == 1
+    assert second.call(lambda: response(2), None).input_tokens == 2
+    executor = first.health.executor
+    assert second.health.executor is executor
+
+    health.clear()
+
+    assert executor._shutdown
+
+
+def test_guard_hedges_slow_requests():
+    guard = Guard(MODEL, "anthropic", policy=Resilience(hedge_after=50))
+    for _ in range(HEDGE_MIN_SAMPLES):
+        guard.health.latencies.add(0.01)
+    calls = []
+    release = threading.Event()
+
+    def request():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(1)
+            return response(1)
+        return response(2)
+
+    result = guard.call(request, None)
+    release.set()
+
+    assert result.input_tokens == 2
+    assert len(calls) == 2
+
+
+def test_guard_falls_back_to_estimate_when_open(word_encoding):
+    policy = Resilience(failure_threshold=1, recovery_time=60)
+    guard = Guard(MODEL, "anthropic", policy=policy)
+
+    with pytest.raises(Unavailable):
+        guard.call(fails(Unavailable()), lambda: guard.estimate("x"))
+    result = guard.call(
+        fails(Unavailable()), lambda: guard.estimate("one two three four")
+    )
+
+    assert result.input_tokens == 5
+    assert result.error_bound == 1
+
+
+def test_guard_fallback_uses_the_policy_encoding(monkeypatch):
+    def offline(name):
+        raise ConnectionError("no network")
+
+    monkeypatch.setattr("tiktoken.get_encoding", offline)
+    encoding = MagicMock()
+    encoding.encode_ordinary.side_effect = lambda text: text.split()
+    policy = Resilience(failure_threshold=1, recovery_time=60, encoding=encoding)
+    guard = Guard(MODEL, "anthropic", policy=policy)
+
+    with pytest.raises(Unavailable):
+        guard.call(fails(Unavailable()), None)
+    result = guard.call(fails(), lambda: guard.estimate("one two three four"))
+
+    assert result.input_tokens == 5
+
+
+def test_guard_breaker_is_shared_per_provider_and_key():
+    policy = Resilience(failure_threshold=1)
+    first = Guard(MODEL, "anthropic", policy=policy)
+    second = Guard("claude-haiku-4-5", "anthropic", policy=policy)
+    other = Guard(MODEL, "google", policy=policy)
+
+    with pytest.raises(Unavailable):
+        first.call(fails(Unavailable()), None)
+
+    assert second.health is first.health
+    assert second.health.breaker.is_open
+    assert not other.health.breaker.is_open
+
+
+def test_guard_without_fallback_raises_when_open():
+    policy = Resilience(failure_threshold=1, fallback=False)
+    guard = Guard(MODEL, "anthropic", policy=policy)
+
+    with pytest.raises(Unavailable):
+        guard.call(fails(Unavailable()), None)
+    with pytest.raises(CircuitOpenError):
+        guard.call(fails(), None)
+
+
+def test_client_errors_do_not_trip_the_breaker():
+    guard = Guard(MODEL, "anthropic", policy=Resilience(failure_threshold=1))
+
+    with pytest.raises(BadRequest):
+        guard.call(fails(BadRequest()), None)
+
+    assert not guard.health.breaker.is_open
+
+
+def async_fails(*errors, then=None):
+    request = fails(*errors, then=then)
+
+    async def call():
+        return request()
+
+    return call
+
+
+@pytest.mark.asyncio
+async def test_async_guard_retries_transient_errors():
+    guard = AsyncGuard(MODEL, "anthropic", policy=Resilience(retries=1, backoff=0))
+
+    result = await guard.call(async_fails(Unavailable(), then=response(3)), None)
+
+    assert result.input_tokens == 3
+
+
+@pytest.mark.asyncio
+async def test_async_guard_leaves_rate_limits_to_the_limiter():
+    class RateLimited(Exception):
+        status_code = 429
+
+    guard = AsyncGuard(MODEL, "anthropic", policy=Resilience(retries=3, backoff=0))
+    limiter = AsyncRateLimiter(RateLimit(max_retries=1))
+    limiter.penalize = lambda delay: None
+    calls = []
+
+    async def request():
+        calls.append(1)
+        raise RateLimited()
+
+    with pytest.raises(RateLimited):
+        await guard.call(request, None, limiter)
+
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_async_guard_times_out():
+    guard = AsyncGuard(MODEL, "anthropic", policy=Resilience(timeout=0.01))
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    with pytest.raises(TimeoutError):
+        await guard.call(slow, None)
+
+
+@pytest.mark.asyncio
+async def test_async_guard_timeouts_are_retried_and_open_the_breaker():
+    guard = AsyncGuard(
+        MODEL,
+        "anthropic",
+        policy=Resilience(timeout=0.01, retries=2, backoff=0, failure_threshold=1),
+    )
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await guard.call(slow, None)
+
+    assert len(calls) == 3
+    assert guard.health.breaker.is_open
+
+
+@pytest.mark.asyncio
+async def test_async_guard_hedges_and_cancels_the_loser():
+    guard = AsyncGuard(MODEL, "anthropic", policy=Resilience(hedge_after=50))
+    for _ in range(HEDGE_MIN_SAMPLES):
+        guard.health.latencies.add(0.01)
+    calls = []
+    cancelled = asyncio.Event()
+
+    async def request():
+        calls.append(1)
+        if len(calls) == 1:
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        return response(len(calls))
+
+    start = time.perf_counter()
+    result = await guard.call(request, None)
+    await asyncio.wait_for(cancelled.wait(), 1)
+
+    assert result.input_tokens == 2
+    assert time.perf_counter() - start < 0.5
+
+
+@pytest.mark.asyncio
+async def test_async_guard_falls_back_when_open(word_encoding):
+    guard = AsyncGuard(
+        MODEL, "anthropic", policy=Resilience(failure_threshold=1, recovery_time=60)
+    )
+
+    with pytest.raises(Unavailable):
+        await guard.call(async_fails(Unavailable()), None)
+    messages = [{"role": "user", "content": "hi"}]
+    result = await guard.call(async_fails(), lambda: guard.estimate_messages(messages))
+
+    assert result.input_tokens == 2
+
+
+@pytest.mark.asyncio
+async def test_async_guard_cancelled_probe_does_not_wedge_the_breaker():
+    guard = AsyncGuard(
+        MODEL, "anthropic", policy=Resilience(failure_threshold=1, recovery_time=0)
+    )
+    with pytest.raises(Unavailable):
+        await guard.call(async_fails(Unavailable()), None)
+
+    async def hang():
+        await asyncio.sleep(1)
+
+    probe = asyncio.ensure_future(guard.call(hang, None))
+    await asyncio.sleep(0)
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    result = await guard.call(async_fails(then=response(7)), None)
+
+    assert result.input_tokens == 7
+    assert not guard.health.breaker.is_open
+
+
+@pytest.mark.asyncio
+async def test_async_guard_does_not_time_local_queueing():
+    guard = AsyncGuard(
+        MODEL, "anthropic", policy=Resilience(timeout=0.1, failure_threshold=3)
+    )
+    limiter = AsyncRateLimiter(RateLimit(requests_per_second=20))
+
+    results = await asyncio.gather(*(
+        guard.call(async_fails(then=response(1)), None, limiter) for _ in range(12)
+    ))
+
+    assert len(results) == 12
+    assert not guard.health.breaker.is_open
+    assert max(guard.health.latencies._samples) < 0.1
+
+
+@pytest.mark.asyncio
+async def test_async_guard_skips_hedges_while_the_limiter_is_busy():
+    guard = AsyncGuard(MODEL, "anthropic", policy=Resilience(hedge_after=50))
+    for _ in range(HEDGE_MIN_SAMPLES):
+        guard.health.latencies.add(0.01)
+    limiter = AsyncRateLimiter(RateLimit(requests_per_second=1))
+    calls = []
+
+    async def request():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return response(1)
+
+    await guard.call(request, None, limiter)
+
+    assert len(calls) == 1
@@ -1,94 +1,63 @@
-import pytest
-from unittest.mock import MagicMock
-
-from tokemon import tokemon, tokemon_models
-from tokemon.model import ProviderName, Mode
-
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-@pytest.fixture
-def mock_tokenizers(monkeypatch):
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+
+from tokemon import (
+    ClientOptions,
+    scaffold,
+    tokemon,
+    tokemon_aclose,
+    tokemon_close,
+    tokemon_evict,
+    tokemon_models,
+)
+from tokemon.limits import RateLimit
+from tokemon.resilience import Resilience
+from tokemon.tokenizers.batcher import MicroBatch
+from tokemon.model import Accuracy, ProviderName, Mode
+from tokemon.tokenizers.estimate import AsyncEstimateTokenizer, EstimateTokenizer
+
+
+def make_mocks(monkeypatch, table, names):
     mocks = {}
-
-    def make_mock(name):
+    for key, name in names.items():
         mock_cls = MagicMock(name=name)
-        mock_instance = MagicMock(name=f"{name}Instance")
-        mock_cls.return_value = mock_instance
+        mock_cls.return_value = MagicMock(name=f"{name}Instance")
         mocks[name] = mock_cls
-        return mock_cls
-
-    monkeypatch.setattr(
-        "tokemon.scaffold.OpenAITokenizer",
-        make_mock("OpenAITokenizer"),
-    )
-    monkeypatch.setattr(
-        "tokemon.scaffold.AnthropicTokenizer",
-        make_mock("AnthropicTokenizer"),
-    )
-    monkeypatch.setattr(
-        "tokemon.scaffold.AsyncAnthropicTokenizer",
-        make_mock("AsyncAnthropicTokenizer"),
-    )
-    monkeypatch.setattr(
-        "tokemon.scaffold.GoogleAITokenizer",
-        make_mock("GoogleAITokenizer"),
-    )
-    monkeypatch.setattr(
-        "tokemon.scaffold.AsyncGoogleAITokenizer",
-        make_mock("AsyncGoogleAITokenizer"),
-    )
-    monkeypatch.setattr(
-        "tokemon.scaffold.XaiTokenizer",
-        make_mock("XaiTokenizer"),
-    )
-    monkeypatch.setattr(
-        "tokemon.scaffold.AsyncXaiTokenizer",
-        make_mock("AsyncXaiTokenizer"),
-    )
-
+        monkeypatch.setitem(table, key, mock_cls)
     return mocks
 
 
 @pytest.fixture
-def mock_providers(monkeypatch):
-    mocks = {}
-
-    def make_mock(name):
-        mock_cls = MagicMock(name=name)
-        mock_instance = MagicMock(name=f"{name}Instance")
-        mock_cls.return_value = mock_instance
-        mocks[name] = mock_cls
-        return mock_cls
+def mock_tokenizers(monkeypatch):
+    return make_mocks(monkeypatch, scaffold._TOKENIZERS, {
+        "openai": "OpenAITokenizer",
+        "async-openai": "AsyncOpenAITokenizer",
+        "anthropic": "AnthropicTokenizer",
+        "async-anthropic": "AsyncAnthropicTokenizer",
+        "google": "GoogleAITokenizer",
+        "async-google": "AsyncGoogleAITokenizer",
+        "xai": "XaiTokenizer",
+        "async-xai": "AsyncXaiTokenizer",
+    })
 
-    monkeypatch.setattr(
-        "tokemon.scaffold.OpenAIProvider",
-        make_mock("OpenAIProvider"),
-    )
-    monkeypatch.setattr(
-        "tokemon.scaffold.AnthropicProvider",
-        make_mock("AnthropicProvider"),
-    )
-    monkeypatch.setattr(
-        "tokemon.scaffold.AsyncAnthropicProvider",
-        make_mock("AsyncAnthropicProvider"),
-    )
-    monkeypatch.setattr(
-        "tokemon.scaffold.GoogleProvider",
-        make_mock("GoogleProvider"),
-    )
-    monkeypatch.setattr(
-        "tokemon.scaffold.AsyncGoogleProvider",
-        make_mock("AsyncGoogleProvider"),
-    )
-    monkeypatch.setattr(
-        "tokemon.scaffold.XaiProvider",
-        make_mock("XaiProvider"),
-    )
-    monkeypatch.setattr(
-        "tokemon.scaffold.AsyncXaiProvider",
-        make_mock("AsyncXaiProvider"),
-    )
 
-    return mocks
+@pytest.fixture
+def mock_providers(monkeypatch):
+    return make_mocks(monkeypatch, scaffold._PROVIDERS, {
+        "openai": "OpenAIProvider",
+        "async-openai": "AsyncOpenAIProvider",
+        "anthropic": "AnthropicProvider",
+        "async-anthropic": "AsyncAnthropicProvider",
+        "google": "GoogleProvider",
+        "async-google": "AsyncGoogleProvider",
+        "xai": "XaiProvider",
+        "async-xai": "AsyncXaiProvider",
+    })
 
 
 def test_openai_sync_factory(mock_tokenizers):
@@ -177,13 +146,15 @@ def test_unsupported_provider_raises():
         )
 
 
-def test_unsupported_async_openai_raises(mock_tokenizers):
-    with pytest.raises(ValueError, match="Unsupported provider"):
-        tokemon(
-            model="gpt-4",
-            provider=ProviderName.OPENAI.value,
-            mode=Mode.ASYNC,
-        )
+def test_openai_async_factory(mock_tokenizers):
+    result = tokemon(
+        model="gpt-4",
+        provider=ProviderName.OPENAI.value,
+        mode=Mode.ASYNC,
+    )
+
+    mock_tokenizers["AsyncOpenAITokenizer"].assert_called_once_with(model="gpt-4")
+    assert result is mock_tokenizers["AsyncOpenAITokenizer"].return_value
 
 
 def test_invalid_mode_treated_as_sync(mock_tokenizers):
@@ -275,9 +246,265 @@ def test_tokemon_models_unsupported_provider_raises():
         )
 
 
-def test_tokemon_models_unsupported_async_openai_raises(mock_providers):
-    with pytest.raises(ValueError, match="Unsupported provider"):
-        tokemon_models(
-            provider=ProviderName.OPENAI.value,
+def test_tokemon_models_openai_async(mock_providers):
+    result = tokemon_models(
+        provider=ProviderName.OPENAI.value,
+        mode=Mode.ASYNC,
+    )
+
+    mock_providers["AsyncOpenAIProvider"].assert_called_once_with()
+    assert result is mock_providers["AsyncOpenAIProvider"].return_value
+
+
+def test_client_and_options_are_forwarded(mock_tokenizers):
+    client = MagicMock()
+    options = ClientOptions(max_connections=50)
+
+    tokemon(
+        model="claude-3",
+        provider=ProviderName.ANTHROPIC.value,
+        client=client,
+        client_options=options,
+    )
+
+    mock_tokenizers["AnthropicTokenizer"].assert_called_once_with(
+        model="claude-3", client=client, client_options=options
+    )
+
+
+def test_rate_limit_is_forwarded_to_async_remote_tokenizers(mock_tokenizers):
+    limit = RateLimit(requests_per_second=5, max_concurrency=4)
+
+    tokemon(
+        model="gemini-2.5-flash",
+        provider=ProviderName.GOOGLE.value,
+        mode=Mode.ASYNC,
+        rate_limit=limit,
+    )
+
+    mock_tokenizers["AsyncGoogleAITokenizer"].assert_called_once_with(
+        model="gemini-2.5-flash", rate_limit=limit
+    )
+
+
+def test_resilience_is_forwarded_to_remote_tokenizers(mock_tokenizers):
+    policy = Resilience(timeout=2, retries=1, failure_threshold=5)
+
+    tokemon(model="grok-4", provider=ProviderName.XAI.value, resilience=policy)
+
+    mock_tokenizers["XaiTokenizer"].assert_called_once_with(
+        model="grok-4", resilience=policy
+    )
+
+
+def test_micro_batch_only_for_async_google(mock_tokenizers):
+    options = MicroBatch(max_batch_size=32)
+
+    tokemon(
+        model="gemini-2.5-flash",
+        provider=ProviderName.GOOGLE.value,
+        mode=Mode.ASYNC,
+        micro_batch=options,
+    )
+
+    mock_tokenizers["AsyncGoogleAITokenizer"].assert_called_once_with(
+        model="gemini-2.5-flash", micro_batch=options
+    )
+    with pytest.raises(ValueError, match="micro_batch is not supported"):
+        tokemon(
+            model="claude-3",
+            provider=ProviderName.ANTHROPIC.value,
             mode=Mode.ASYNC,
+            micro_batch=options,
         )
+
+
+def test_additive_counts_is_opt_in_for_remote_tokenizers(mock_tokenizers):
+    tokemon(
+        model="gemini-2.5-flash",
+        provider=ProviderName.GOOGLE.value,
+        additive_counts=True,
+    )
+
+    mock_tokenizers["GoogleAITokenizer"].assert_called_once_with(
+        model="gemini-2.5-flash", additive_counts=True
+    )
+    with pytest.raises(ValueError, match="additive_counts is not supported"):
+        tokemon(
+            model="gpt-4", provider=ProviderName.OPENAI.value, additive_counts=True
+        )
+
+
+def test_resilience_rejected_for_openai(mock_tokenizers):
+    with pytest.raises(ValueError, match="resilience is not supported"):
+        tokemon(
+            model="gpt-4", provider=ProviderName.OPENAI.value, resilience=Resilience()
+        )
+
+
+@pytest.mark.parametrize("provider, mode", [
+    (ProviderName.ANTHROPIC.value, Mode.SYNC),
+    (ProviderName.OPENAI.value, Mode.ASYNC),
+])
+def test_rate_limit_rejected_without_remote_async_calls(
+    mock_tokenizers, provider, mode
+):
+    with pytest.raises(ValueError, match="rate_limit is not supported"):
+        tokemon(model="m", provider=provider, mode=mode, rate_limit=RateLimit())
+
+
+def test_tokemon_models_forwards_client(mock_providers):
+    client = MagicMock()
+
+    tokemon_models(provider=ProviderName.XAI.value, client=client)
+
+    mock_providers["XaiProvider"].assert_called_once_with(client=client)
+
+
+def test_tokemon_is_memoized(mock_tokenizers):
+    first = tokemon(model="gpt-4", provider=ProviderName.OPENAI.value)
+    second = tokemon(model="gpt-4", provider=ProviderName.OPENAI.value)
+    other = tokemon(model="gpt-4o", provider=ProviderName.OPENAI.value)
+
+    assert first is second
+    assert mock_tokenizers["OpenAITokenizer"].call_count == 2
+    assert other is mock_tokenizers["OpenAITokenizer"].return_value
+
+
+def test_tokemon_memoizes_per_mode_and_options(mock_tokenizers):
+    tokemon(model="claude-3", provider=ProviderName.ANTHROPIC.value)
+    tokemon(model="claude-3", provider=ProviderName.ANTHROPIC.value, mode=Mode.ASYNC)
+    tokemon(
+        model="claude-3",
+        provider=ProviderName.ANTHROPIC.value,
+        client_options=ClientOptions(api_key="k"),
+    )
+    tokemon(
+        model="claude-3",
+        provider=ProviderName.ANTHROPIC.value,
+        client_options=ClientOptions(api_key="k"),
+    )
+
+    assert mock_tokenizers["AnthropicTokenizer"].call_count == 2
+    assert mock_tokenizers["AsyncAnthropicTokenizer"].call_count == 1
+
+
+def test_tokemon_evict(mock_tokenizers):
+    tokemon(model="gpt-4", provider=ProviderName.OPENAI.value)
+    tokemon_evict(model="gpt-4", provider=ProviderName.OPENAI.value)
+    tokemon(model="gpt-4", provider=ProviderName.OPENAI.value)
+
+    assert mock_tokenizers["OpenAITokenizer"].call_count == 2
+
+
+def test_slow_build_only_blocks_callers_for_the_same_instance(mock_tokenizers):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_build(**kwargs):
+        started.set()
+        release.wait(5)
+        return MagicMock(name="AnthropicTokenizerInstance")
+
+    mock_tokenizers["AnthropicTokenizer"].side_effect = slow_build
+    anthropic = {"model": "claude-sonnet-4-5", "provider": "anthropic"}
+
+    with ThreadPoolExecutor(2) as pool:
+        first = pool.submit(tokemon, **anthropic)
+        started.wait(5)
+        second = pool.submit(tokemon, **anthropic)
+        openai = tokemon(model="gpt-4", provider=ProviderName.OPENAI.value)
+        assert not first.done()
+        release.set()
+
+        assert first.result() is second.result()
+    assert openai is mock_tokenizers["OpenAITokenizer"].return_value
+    assert mock_tokenizers["AnthropicTokenizer"].call_count == 1
+
+
+def test_tokemon_close_closes_pooled_sync_clients(mock_tokenizers, monkeypatch):
+    sync_client = MagicMock(spec=["close"])
+    async_client = MagicMock(spec=["close"])
+    async_client.close = AsyncMock()
+    google_client = MagicMock(spec=["close", "aio"])
+    google_client.aio.aclose = AsyncMock()
+    pool = {("sync",): sync_client, ("async",): async_client, ("google",): google_client}
+    monkeypatch.setattr(scaffold.clients, "_clients", pool)
+    tokemon(model="gpt-4", provider=ProviderName.OPENAI.value)
+
+    tokemon_close()
+    tokemon(model="gpt-4", provider=ProviderName.OPENAI.value)
+
+    sync_client.close.assert_called_once_with()
+    async_client.close.assert_not_called()
+    google_client.close.assert_not_called()
+    assert pool == {("async",): async_client, ("google",): google_client}
+    assert mock_tokenizers["OpenAITokenizer"].call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_tokemon_aclose_awaits_async_clients(monkeypatch):
+    async_client = MagicMock(spec=["close"])
+    async_client.close = AsyncMock()
+    google_client = MagicMock(spec=["close", "aio"])
+    google_client.aio.aclose = AsyncMock()
+    pool = {("async",): async_client, ("google",): google_client}
+    monkeypatch.setattr(scaffold.clients, "_clients", pool)
+
+    tokemon_close()
+    await tokemon_aclose()
+
+    async_client.close.assert_awaited_once_with()
+    google_client.close.assert_called_once_with()
+    google_client.aio.aclose.assert_awaited_once_with()
+    assert pool == {}
+
+
+def test_import_does_not_load_provider_sdks():
+    code = (
+        "import sys, tokemon; "
+        "sdks = {'anthropic', 'google.genai', 'xai_sdk', 'tiktoken'}; "
+        "loaded = sdks & set(sys.modules); "
+        "assert not loaded, loaded"
+    )
+
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_missing_extra_raises_helpful_import_error():
+    lazy = scaffold._LazyClass(".not_installed", "SomeTokenizer", "anthropic")
+
+    with pytest.raises(ImportError, match=r"tokemon\[anthropic\]"):
+        lazy.load()
+
+
+def test_estimate_accuracy_wraps_exact_tokenizer_lazily(mock_tokenizers):
+    tokenizer = tokemon(
+        model="claude-3",
+        provider=ProviderName.ANTHROPIC.value,
+        accuracy=Accuracy.ESTIMATE,
+    )
+
+    assert isinstance(tokenizer, EstimateTokenizer)
+    mock_tokenizers["AnthropicTokenizer"].assert_not_called()
+    assert tokenizer.exact is mock_tokenizers["AnthropicTokenizer"].return_value
+    mock_tokenizers["AnthropicTokenizer"].assert_called_once_with(model="claude-3")
+
+
+def test_estimate_accuracy_async(mock_tokenizers):
+    tokenizer = tokemon(
+        model="grok-2",
+        provider=ProviderName.XAI.value,
+        mode=Mode.ASYNC,
+        accuracy=Accuracy.ESTIMATE,
+    )
+
+    assert isinstance(tokenizer, AsyncEstimateTokenizer)
+    assert tokenizer.exact is mock_tokenizers["AsyncXaiTokenizer"].return_value
+
+
+@pytest.mark.parametrize("provider", [
+    ProviderName.OPENAI.value, ProviderName.ANTHROPIC.value,
+])
+def test_estimate_accuracy_rejects_unknown_models(mock_tokenizers, provider):
+    with pytest.raises(ValueError, match="Unsupported model: not-a-model"):
+        tokemon(model="not-a-model", provider=provider, accuracy=Accuracy.ESTIMATE)
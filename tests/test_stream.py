@@ -0,0 +1,196 @@
+import io
+import random
+
+import pytest
+import tiktoken
+
+from tokemon.model import TokenizerResponse
+from tokemon.tokenizers.base import AsyncTokenizer, Tokenizer
+from tokemon.tokenizers.stream import Segmenter, split_point
+
+CL100K_PATTERN = (
+    r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}++|\p{N}{1,3}+"""
+    r"""| ?[^\s\p{L}\p{N}]++[\r\n]*+|\s++$|\s*[\r\n]|\s+(?!\S)|\s"""
+)
+
+
+def make_encoding():
+    ranks = {bytes([i]): i for i in range(256)}
+    for merge in [b"ab", b" a", b" ab", b"\n\n", b"  ", b"\xc3\xa9"]:
+        ranks[merge] = len(ranks)
+    return tiktoken.Encoding(
+        "test", pat_str=CL100K_PATTERN, mergeable_ranks=ranks, special_tokens={}
+    )
+
+
+ENCODING = make_encoding()
+
+
+class FakeTokenizer(Tokenizer):
+    def __init__(self):
+        super().__init__("fake")
+        self.calls = []
+
+    def count_tokens(self, text):
+        self.calls.append(text)
+        return TokenizerResponse(
+            input_tokens=len(ENCODING.encode(text)), model="fake", provider="test"
+        )
+
+
+class AsyncFakeTokenizer(AsyncTokenizer):
+    async def count_tokens(self, text):
+        return TokenizerResponse(
+            input_tokens=len(ENCODING.encode(text)), model="fake", provider="test"
+        )
+
+
+class FramedTokenizer(FakeTokenizer):
+    # Like a remote endpoint that adds a fixed cost to every request.
+    def count_tokens(self, text):
+        response = super().count_tokens(text)
+        return TokenizerResponse(
+            input_tokens=response.input_tokens + 7, model="fake", provider="test"
+        )
+
+
+class AsyncFramedTokenizer(AsyncFakeTokenizer):
+    async def count_tokens(self, text):
+        response = await super().count_tokens(text)
+        return TokenizerResponse(
+            input_tokens=response.input_tokens + 7, model="fake", provider="test"
+        )
+
+
+def random_text(n, seed=0):
+    rng = random.Random(seed)
+    words = ["ab", "a", "b", "é", "ab.", "\n\n", "12", "  ", "'s", "\t"]
+    return " ".join(rng.choice(words) for _ in range(n))
+
+
+def random_chunks(text, seed=0):
+    rng = random.Random(seed)
+    chunks, i = [], 0
+    while i < len(text):
+        step = rng.randint(1, 40)
+        chunks.append(text[i:i + step])
+        i += step
+    return chunks
+
+
+def test_split_point_before_space_after_non_space():
+    assert split_point("ab cd") == 2
+    assert split_point("ab  ") == 2
+    assert split_point("   ") == 0
+    assert split_point("abc") == 0
+
+
+def test_running_total_matches_whole_text():
+    text = random_text(2_000)
+    tokenizer = FakeTokenizer()
+
+    totals = list(tokenizer.count_tokens_stream(random_chunks(text), buffer_size=64))
+
+    assert len(totals) > 1
+    assert [t.input_tokens for t in totals] == sorted(t.input_tokens for t in totals)
+    assert totals[-1].input_tokens == len(ENCODING.encode(text))
+
+
+def test_running_total_keeps_request_overhead_once():
+    text = random_text(2_000)
+    tokenizer = FramedTokenizer()
+
+    totals = list(tokenizer.count_tokens_stream(random_chunks(text), buffer_size=64))
+
+    assert len(totals) > 1
+    assert tokenizer.request_overhead == 7
+    assert totals[-1].input_tokens == tokenizer.count_tokens(text).input_tokens
+
+
+def test_segments_stay_bounded():
+    tokenizer = FakeTokenizer()
+
+    chunks = random_chunks(random_text(5_000))
+    list(tokenizer.count_tokens_stream(chunks, buffer_size=64))
+
+    assert max(map(len, tokenizer.calls)) < 64 + 40
+
+
+def test_binary_file_splits_multibyte_characters():
+    text = random_text(1_000, seed=3)
+    stream = io.BytesIO(text.encode("utf-8"))
+
+    totals = list(FakeTokenizer().count_tokens_stream(stream, buffer_size=7))
+
+    assert totals[-1].input_tokens == len(ENCODING.encode(text))
+
+
+def test_text_file():
+    text = random_text(500, seed=4)
+
+    totals = list(FakeTokenizer().count_tokens_stream(io.StringIO(text), buffer_size=32))
+
+    assert totals[-1].input_tokens == len(ENCODING.encode(text))
+
+
+def test_per_record_counts():
+    stream = io.BytesIO(b"ab ab\n\nab\n")
+
+    counts = [r.input_tokens for r in FakeTokenizer().count_tokens_stream(
+        stream, per_record=True
+    )]
+
+    assert counts == [3, 1, 2]
+
+
+def test_empty_stream_yields_zero():
+    totals = list(FakeTokenizer().count_tokens_stream([]))
+
+    assert [t.input_tokens for t in totals] == [0]
+
+
+def test_unsplittable_run_is_cut_at_four_buffers():
+    segmenter = Segmenter(buffer_size=10)
+
+    assert list(segmenter.feed("x" * 39)) == []
+    assert list(segmenter.feed("x")) == ["x" * 10]
+    assert list(segmenter.flush()) == ["x" * 30]
+
+
+@pytest.mark.asyncio
+async def test_async_stream_from_async_generator():
+    text = random_text(1_000, seed=5)
+
+    async def chunks():
+        for chunk in random_chunks(text, seed=5):
+            yield chunk.encode("utf-8")
+
+    totals = [t async for t in AsyncFakeTokenizer("fake").count_tokens_stream(
+        chunks(), buffer_size=50
+    )]
+
+    assert totals[-1].input_tokens == len(ENCODING.encode(text))
+
+
+@pytest.mark.asyncio
+async def test_async_per_record_from_list():
+    tokenizer = AsyncFakeTokenizer("fake")
+
+    counts = [r.input_tokens async for r in tokenizer.count_tokens_stream(
+        ["ab", " ab ab"], per_record=True
+    )]
+
+    assert counts == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_async_running_total_keeps_request_overhead_once():
+    text = random_text(1_000, seed=3)
+    tokenizer = AsyncFramedTokenizer("fake")
+
+    totals = [t async for t in tokenizer.count_tokens_stream(
+        random_chunks(text, seed=3), buffer_size=50
+    )]
+
+    assert len(totals) > 1
+    assert totals[-1].input_tokens == len(ENCODING.encode(text)) + 7
@@ -0,0 +1,27 @@
+import tiktoken
+
+from tokemon.tokenizers.tokens import char_offsets, token_array
+
+ENCODING = tiktoken.Encoding(
+    "bytes",
+    pat_str=r"""\S+|\s+""",
+    mergeable_ranks={bytes([i]): i for i in range(256)},
+    special_tokens={},
+)
+
+
+def test_token_array_is_compact():
+    tokens = token_array([1, 2, 2**32 - 1])
+
+    assert tokens.typecode == "I"
+    assert tokens.itemsize == 4
+    assert list(tokens) == [1, 2, 2**32 - 1]
+
+
+def test_char_offsets_match_tiktoken():
+    text = "héllo 世界 🙂!"
+    tokens = ENCODING.encode(text)
+
+    offsets = char_offsets(ENCODING.decode_tokens_bytes(tokens))
+
+    assert list(offsets) == ENCODING.decode_with_offsets(tokens)[1]
@@ -5,6 +5,7 @@ from tokemon.tokenizers.xai import (
     XaiTokenizer,
     AsyncXaiTokenizer,
 )
+from tokemon.providers.index import ModelIndex
 from tokemon.model import ProviderName, TokenizerResponse
 
 
@@ -19,11 +20,11 @@ def valid_model():
 @pytest.fixture
 def mock_sync_provider(monkeypatch):
     mock_prov = MagicMock()
-    mock_prov.models.return_value = FAKE_MODELS
+    mock_prov.model_index.return_value = ModelIndex(FAKE_MODELS)
 
     monkeypatch.setattr(
         "tokemon.tokenizers.xai.XaiProvider",
-        lambda: mock_prov,
+        lambda **kwargs: mock_prov,
     )
 
     return mock_prov
@@ -32,11 +33,11 @@ def mock_sync_provider(monkeypatch):
 @pytest.fixture
 def mock_async_provider(monkeypatch):
     mock_prov = MagicMock()
-    mock_prov.models = AsyncMock(return_value=FAKE_MODELS)
+    mock_prov.model_index = AsyncMock(return_value=ModelIndex(FAKE_MODELS))
 
     monkeypatch.setattr(
         "tokemon.tokenizers.xai.AsyncXaiProvider",
-        lambda: mock_prov,
+        lambda **kwargs: mock_prov,
     )
 
     return mock_prov
@@ -49,8 +50,8 @@ def mock_sync_xai_client(monkeypatch):
     mock_client.tokenize.tokenize_text.return_value = ["t1", "t2", "t3"]
 
     monkeypatch.setattr(
-        "tokemon.tokenizers.xai.Client",
-        lambda: mock_client,
+        "tokemon.providers.xai.Client",
+        lambda **kwargs: mock_client,
     )
 
     return mock_client
@@ -65,8 +66,8 @@ def mock_async_xai_client(monkeypatch):
     )
 
     monkeypatch.setattr(
-        "tokemon.tokenizers.xai.AsyncClient",
-        lambda: mock_client,
+        "tokemon.providers.xai.AsyncClient",
+        lambda **kwargs: mock_client,
     )
 
     return mock_client
@@ -178,3 +179,52 @@ async def test_async_count_tokens_empty_string(
     response = await tokenizer.count_tokens("")
 
     assert response.input_tokens == 0
+
+
+def test_sync_count_messages_renders_one_request(
+    valid_model, mock_sync_provider, mock_sync_xai_client
+):
+    tokenizer = XaiTokenizer(valid_model)
+
+    response = tokenizer.count_messages(
+        [{"role": "user", "content": "hello"}], system="Be brief."
+    )
+
+    assert response.input_tokens == 3
+    mock_sync_xai_client.tokenize.tokenize_text.assert_called_once_with(
+        model=valid_model, text="system: Be brief.\nuser: hello"
+    )
+
+
+def test_sync_count_messages_leaves_out_media_parts(
+    valid_model, mock_sync_provider, mock_sync_xai_client
+):
+    tokenizer = XaiTokenizer(valid_model)
+    content = [
+        {"type": "text", "text": "what is "},
+        {"type": "image_url", "image_url": {"url": "https://example.com/a.png"}},
+        {"type": "text", "text": "this?"},
+    ]
+
+    tokenizer.count_messages([{"role": "user", "content": content}])
+
+    mock_sync_xai_client.tokenize.tokenize_text.assert_called_once_with(
+        model=valid_model, text="user: what is this?"
+    )
+
+
+def test_sync_count_tokens_can_return_tokens_and_offsets(
+    valid_model, mock_sync_provider, mock_sync_xai_client
+):
+    mock_sync_xai_client.tokenize.tokenize_text.return_value = [
+        MagicMock(token_id=10, token_bytes=b"h"),
+        MagicMock(token_id=11, token_bytes="é".encode()),
+        MagicMock(token_id=12, token_bytes=b"!"),
+    ]
+    tokenizer = XaiTokenizer(valid_model)
+
+    response = tokenizer.count_tokens("hé!", return_tokens=True, return_offsets=True)
+
+    assert response.input_tokens == 3
+    assert list(response.tokens) == [10, 11, 12]
+    assert list(response.offsets) == [0, 1, 2]